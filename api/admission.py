@@ -0,0 +1,252 @@
+"""
+Admission Control - Priority lanes and bounded queues for the API gateway
+
+Every gateway request is assigned to a priority lane:
+    interactive - live samvaad conversation turns (/s2s, /asr, /tts, /mt)
+    triage      - triage flows
+    background  - document and summary work (Lipi-Gyan OCR, Saraansh)
+
+Each lane has its own concurrency limit, a bounded wait queue and a maximum
+wait deadline. All lanes share a pool of upstream slots; lower-priority lanes
+may not use the slots reserved for the lanes above them, and a waiting
+higher-priority request is always admitted first. Background work is shed
+immediately while interactive requests are waiting, so it never adds to
+interactive latency. Within a lane, waiters are ordered by per-tenant
+weighted fair queuing (see tenancy.py).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from tenancy import ANONYMOUS_TENANT, FairQueue, TenantRegistry
+
+# Lanes in priority order (highest first)
+LANES = ("interactive", "triage", "background")
+
+# Default lane configuration: concurrency, queue bound, max wait (seconds) and
+# the number of shared slots kept free for the lanes above
+DEFAULT_LANE_CONFIG = {
+    "interactive": {"max_concurrency": 12, "max_queue": 32, "max_wait": 5.0, "reserve": 0},
+    "triage": {"max_concurrency": 8, "max_queue": 32, "max_wait": 10.0, "reserve": 2},
+    "background": {"max_concurrency": 4, "max_queue": 64, "max_wait": 30.0, "reserve": 6},
+}
+
+DEFAULT_TOTAL_SLOTS = 16
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries the lane, reason and Retry-After seconds"""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"{lane} request rejected: {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A request waiting for, or holding, an upstream slot"""
+
+    def __init__(self, lane: str, tenant: str = ANONYMOUS_TENANT):
+        self.lane = lane
+        self.tenant = tenant
+        self.finish = 0.0
+        self.seq = 0
+        self.enqueued_at = time.monotonic()
+        self.admitted_at = None
+
+
+class Lane:
+    """Per-lane limits, queue and counters"""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_wait: float, reserve: int,
+                 tenants: TenantRegistry):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.queue = FairQueue(tenants)
+        self.in_flight = 0
+        self.admitted = 0
+        self.completed = 0
+        self.rejected = {"queue_full": 0, "timeout": 0, "shed": 0}
+        # Exponentially weighted averages, in seconds
+        self.avg_wait = 0.0
+        self.avg_service = 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self.queue),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "rejected": dict(self.rejected),
+            "avg_wait_ms": round(self.avg_wait * 1000, 1),
+            "avg_service_ms": round(self.avg_service * 1000, 1),
+        }
+
+
+class AdmissionController:
+    """Admit requests to upstream slots by lane priority"""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, total_slots: int = DEFAULT_TOTAL_SLOTS, lane_config: Optional[Dict] = None,
+                 tenants: Optional[TenantRegistry] = None):
+        lane_config = lane_config or DEFAULT_LANE_CONFIG
+        self.total_slots = total_slots
+        self.tenants = tenants or TenantRegistry()
+        self.lanes = {name: Lane(name, tenants=self.tenants, **lane_config[name]) for name in LANES}
+        self.in_flight = 0
+        # Shares the registry's lock so idle tenants are never evicted mid-admission
+        self._cond = threading.Condition(self.tenants.lock)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """
+        Build a controller from environment variables, e.g.
+        ADMISSION_TOTAL_SLOTS=16, ADMISSION_BACKGROUND_MAX_CONCURRENCY=2,
+        ADMISSION_TRIAGE_MAX_WAIT=8
+        """
+        config = {}
+        for name in LANES:
+            lane = dict(DEFAULT_LANE_CONFIG[name])
+            prefix = f"ADMISSION_{name.upper()}_"
+            lane["max_concurrency"] = int(os.getenv(prefix + "MAX_CONCURRENCY", lane["max_concurrency"]))
+            lane["max_queue"] = int(os.getenv(prefix + "MAX_QUEUE", lane["max_queue"]))
+            lane["max_wait"] = float(os.getenv(prefix + "MAX_WAIT", lane["max_wait"]))
+            lane["reserve"] = int(os.getenv(prefix + "RESERVE", lane["reserve"]))
+            config[name] = lane
+        total_slots = int(os.getenv("ADMISSION_TOTAL_SLOTS", DEFAULT_TOTAL_SLOTS))
+        return cls(total_slots=total_slots, lane_config=config, tenants=TenantRegistry.from_env())
+
+    def _has_capacity(self, lane: Lane) -> bool:
+        """Lane is under its own limit and shared slots beyond its reserve are free"""
+        return (lane.in_flight < lane.max_concurrency
+                and self.in_flight < self.total_slots - lane.reserve)
+
+    def _higher_lane_ready(self, lane: Lane) -> bool:
+        """A higher-priority lane has a waiter that could take a slot now"""
+        for name in LANES:
+            if name == lane.name:
+                return False
+            higher = self.lanes[name]
+            if self._has_capacity(higher) and higher.queue.head() is not None:
+                return True
+        return False
+
+    def _interactive_waiting(self) -> bool:
+        """Interactive requests are queued that are not just held back by their tenant cap"""
+        return self.lanes["interactive"].queue.head() is not None
+
+    def _retry_after(self, lane: Lane) -> int:
+        """Estimate seconds until the lane drains its current queue"""
+        service = lane.avg_service or 1.0
+        estimate = service * (len(lane.queue) + 1) / max(1, lane.max_concurrency)
+        return int(min(60, max(1, round(estimate))))
+
+    def _admit(self, lane: Lane, ticket: Ticket):
+        ticket.admitted_at = time.monotonic()
+        lane.in_flight += 1
+        lane.admitted += 1
+        self.in_flight += 1
+        wait = ticket.admitted_at - ticket.enqueued_at
+        lane.avg_wait += self.EWMA_ALPHA * (wait - lane.avg_wait)
+        usage = self.tenants.get(ticket.tenant)
+        usage.in_flight += 1
+        usage.admitted += 1
+        usage.wait_seconds += wait
+
+    def _reject(self, lane: Lane, ticket: Ticket, reason: str, message: str):
+        lane.rejected[reason] += 1
+        self.tenants.get(ticket.tenant).rejected += 1
+        raise AdmissionRejected(lane.name, message, self._retry_after(lane))
+
+    def acquire(self, lane_name: str, tenant: str = ANONYMOUS_TENANT) -> Ticket:
+        """
+        Wait for an upstream slot in the given lane on behalf of a tenant.
+
+        Raises:
+            AdmissionRejected: If the lane queue is full, the request was shed
+                in favour of interactive traffic, or max_wait elapsed
+        """
+        lane = self.lanes[lane_name]
+        ticket = Ticket(lane_name, tenant)
+
+        with self._cond:
+            if (not lane.queue and self._has_capacity(lane) and self.tenants.has_capacity(tenant)
+                    and not self._higher_lane_ready(lane)):
+                self._admit(lane, ticket)
+                return ticket
+
+            if lane.name == "background" and self._interactive_waiting():
+                self._reject(lane, ticket, "shed", "shed under interactive load")
+
+            if len(lane.queue) >= lane.max_queue:
+                self._reject(lane, ticket, "queue_full", "queue full")
+
+            lane.queue.append(ticket)
+            deadline = ticket.enqueued_at + lane.max_wait
+            try:
+                while True:
+                    if (lane.queue.head() is ticket and self._has_capacity(lane)
+                            and not self._higher_lane_ready(lane)):
+                        lane.queue.pop(ticket)
+                        self._admit(lane, ticket)
+                        # Let the next waiter in this lane re-check
+                        self._cond.notify_all()
+                        return ticket
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        lane.queue.remove(ticket)
+                        self._cond.notify_all()
+                        self._reject(lane, ticket, "timeout", "max wait exceeded")
+                    self._cond.wait(remaining)
+            except AdmissionRejected:
+                raise
+            except BaseException:
+                if ticket in lane.queue:
+                    lane.queue.remove(ticket)
+                    self._cond.notify_all()
+                raise
+
+    def release(self, ticket: Ticket):
+        """Return a slot taken by acquire()"""
+        lane = self.lanes[ticket.lane]
+        with self._cond:
+            lane.in_flight -= 1
+            lane.completed += 1
+            self.in_flight -= 1
+            service = time.monotonic() - ticket.admitted_at
+            lane.avg_service += self.EWMA_ALPHA * (service - lane.avg_service)
+            usage = self.tenants.get(ticket.tenant)
+            usage.in_flight -= 1
+            usage.busy_seconds += service
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, lane_name: str, tenant: str = ANONYMOUS_TENANT):
+        """Hold an upstream slot for the duration of a with-block"""
+        ticket = self.acquire(lane_name, tenant)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self) -> Dict:
+        """Queue depth and counters for every lane"""
+        with self._cond:
+            return {
+                "total_slots": self.total_slots,
+                "in_flight": self.in_flight,
+                "queued": sum(len(lane.queue) for lane in self.lanes.values()),
+                "lanes": {name: self.lanes[name].snapshot() for name in LANES},
+            }
@@ -1,14 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from flask_sock import Sock
 import requests
 import sys
 import os
 import base64
+import hashlib
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
+
+# text_segmenter is shared with s2s and lives at the repository root
+# (the Docker image copies it next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from ocr.ocr_mapping import mappings as ocr_mappings
+from text_segmenter import segment_text, join_segments, Segment
+from admission import AdmissionController, AdmissionRejected, LANES
+from tenancy import ANONYMOUS_TENANT
+from jobs import BacklogFull, JobStore, report_progress, validate_callback_url
+from asr.streaming import PauseSegmenter, StreamResampler, parse_sample_rate, pcm_to_wav, TARGET_SAMPLE_RATE
 
 # Bhashini API Configuration
 BHASHINI_API_URL = "https://dhruva-api.bhashini.gov.in/services/inference/pipeline"
@@ -75,6 +92,16 @@ OCR_LANGUAGES = {
     "handwritten": ["as", "bn", "en", "gu", "hi", "kn", "ml", "mni", "mr", "or", "pa", "ta", "te", "ur"]
 }
 
+# MT segmentation: long inputs are split on sentence boundaries and the
+# segments are translated concurrently, at most MT_MAX_PARALLEL per request
+MT_SEGMENT_MAX_CHARS = int(os.getenv('MT_SEGMENT_MAX_CHARS', '400'))
+MT_MAX_PARALLEL = int(os.getenv('MT_MAX_PARALLEL', '4'))
+MT_SERVICE_ID = "ai4bharat/indictrans-v2-all-gpu--t4"
+
+# Pooled upstream connections shared by all requests
+bhashini_session = requests.Session()
+bhashini_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
 # Supported languages for MT and ASR (all languages from the list)
 SUPPORTED_LANGUAGES = [
     "en", "as", "bn", "brx", "doi", "gom", "gu", "hi", "kn", "ks",
@@ -130,15 +157,219 @@ def normalize_language(lang: str) -> str:
     # Return original if no mapping found
     return lang
 
+def translate_segment(text: str, source: str, dest: str) -> str:
+    """
+    Translate one segment through the Bhashini MT pipeline.
+    Returns the translated text, or None if Bhashini returned no output.
+    Raises requests exceptions and ValueError (invalid JSON) to the caller.
+    """
+    bhashini_payload = {
+        "pipelineTasks": [
+            {
+                "taskType": "translation",
+                "config": {
+                    "language": {
+                        "sourceLanguage": source,
+                        "targetLanguage": dest
+                    },
+                    "serviceId": MT_SERVICE_ID,
+                    "numTranslation": "True"
+                }
+            }
+        ],
+        "inputData": {
+            "input": [
+                {
+                    "source": text
+                }
+            ],
+            "audio": [
+                {
+                    "audioContent": None
+                }
+            ]
+        }
+    }
+    
+    headers = {
+        'Authorization': BHASHINI_API_KEY,
+        'Content-Type': 'application/json'
+    }
+    
+    response = bhashini_session.post(
+        BHASHINI_API_URL,
+        json=bhashini_payload,
+        headers=headers,
+        timeout=30
+    )
+    response.raise_for_status()
+    
+    bhashini_response = response.json()
+    
+    # Extract translated text from response
+    if 'pipelineResponse' in bhashini_response:
+        for task_response in bhashini_response['pipelineResponse']:
+            if task_response.get('taskType') == 'translation' and 'output' in task_response:
+                output_list = task_response['output']
+                if output_list and len(output_list) > 0:
+                    return output_list[0].get('target')
+    return None
+
+def recognize_segment(audio_base64: str, language: str) -> str:
+    """
+    Run one WAV clip (base64) through the Bhashini ASR pipeline.
+    Returns the recognized text, or None if Bhashini returned no output.
+    Raises requests exceptions and ValueError (invalid JSON) to the caller.
+    """
+    bhashini_payload = {
+        "pipelineTasks": [
+            {
+                "taskType": "asr",
+                "config": {
+                    "language": {
+                        "sourceLanguage": language
+                    },
+                    "serviceId": ASR_SERVICE_IDS[language],
+                    "audioFormat": "wav",
+                    "samplingRate": 16000
+                }
+            }
+        ],
+        "inputData": {
+            "audio": [
+                {
+                    "audioContent": audio_base64
+                }
+            ]
+        }
+    }
+    
+    headers = {
+        'Authorization': BHASHINI_API_KEY,
+        'Content-Type': 'application/json'
+    }
+    
+    response = bhashini_session.post(
+        BHASHINI_API_URL,
+        json=bhashini_payload,
+        headers=headers,
+        timeout=60
+    )
+    response.raise_for_status()
+    
+    bhashini_response = response.json()
+    
+    if 'pipelineResponse' in bhashini_response:
+        for task_response in bhashini_response['pipelineResponse']:
+            if task_response.get('taskType') == 'asr' and 'output' in task_response:
+                output_list = task_response['output']
+                if output_list and len(output_list) > 0:
+                    return output_list[0].get('source')
+    return None
+
+def translate_long_text(text: str, source: str, dest: str):
+    """
+    Segment text on sentence boundaries, translate the segments concurrently
+    (at most MT_MAX_PARALLEL at a time) and reassemble them in order.
+    Returns (translated_text, segment_count); translated_text is None if any
+    segment came back empty.
+    """
+    segments = segment_text(text, max_chars=MT_SEGMENT_MAX_CHARS)
+    if not segments:
+        segments = [Segment(text, "")]
+    
+    if len(segments) == 1:
+        translations = [translate_segment(segments[0].text, source, dest)]
+    else:
+        workers = min(MT_MAX_PARALLEL, len(segments))
+        translations = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # map() yields results in submission order and re-raises upstream errors
+            for translated in executor.map(
+                lambda segment: translate_segment(segment.text, source, dest),
+                segments
+            ):
+                translations.append(translated)
+                report_progress("mt", segments_done=len(translations), segments_total=len(segments))
+    
+    if any(not translated for translated in translations):
+        return None, len(segments)
+    
+    return join_segments(segments, translations), len(segments)
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+sock = Sock(app)  # WebSocket routes (streaming ASR)
+
+# Admission control: priority lanes with bounded queues (see admission.py)
+admission = AdmissionController.from_env()
+
+def resolve_lane(default_lane: str) -> str:
+    """Use the X-Priority header if it names a known lane, else the endpoint default"""
+    lane = (request.headers.get('X-Priority') or '').strip().lower()
+    return lane if lane in LANES else default_lane
+
+def resolve_tenant() -> str:
+    """
+    Identify the caller: the database service's userID (X-User-ID header,
+    form field or JSON field), else a digest of the X-API-Key header.
+    """
+    user_id = request.headers.get('X-User-ID') or request.form.get('userID')
+    if not user_id and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            user_id = data.get('userID')
+    if user_id:
+        return f"user:{str(user_id).strip()}"
+    
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        # Never expose the key itself in usage metrics
+        return f"key:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+    
+    return ANONYMOUS_TENANT
+
+def admitted(default_lane: str):
+    """
+    Decorator that holds an admission slot while the endpoint runs.
+    Waiters are fair-queued per tenant; shed requests get 503 with a
+    Retry-After header.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            lane = resolve_lane(default_lane)
+            tenant = admission.tenants.track(resolve_tenant())
+            admission.tenants.record_request(tenant, request.path, request.content_length or 0)
+            try:
+                ticket = admission.acquire(lane, tenant)
+            except AdmissionRejected as e:
+                response = jsonify({
+                    "status": "error",
+                    "message": "Server busy, retry later",
+                    "data": None,
+                    "error": str(e),
+                    "code": 503
+                })
+                response.status_code = 503
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            
+            try:
+                return view(*args, **kwargs)
+            finally:
+                admission.release(ticket)
+        return wrapper
+    return decorator
 
 @app.route('/tts', methods=['POST'])
+@admitted('interactive')
 def tts_endpoint():
     """
     Text-to-Speech endpoint using Bhashini API.
     Expects JSON: {"text": "...", "Language": "...", "gender": "female/male" (optional)}
-    Returns: Compatible response with audio_url field for frontend compatibility
+    Returns: Compatible response with audio_url field for frontend compatibility,
+             or the raw WAV body when the request sends "Accept: audio/wav"
     """
     try:
         # Get the request data
@@ -250,6 +481,10 @@ def tts_endpoint():
                     "code": 502
                 }), 502
             
+            # Callers that accept audio/wav (the s2s service) get the WAV body directly
+            if request.accept_mimetypes.best_match(["application/json", "audio/wav"]) == "audio/wav":
+                return Response(base64.b64decode(audio_base64), mimetype="audio/wav")
+            
             # Return response in format compatible with frontend
             return jsonify({
                 "status": "success",
@@ -301,6 +536,7 @@ def tts_endpoint():
         }), 500
 
 @app.route('/s2s', methods=['POST'])
+@admitted('interactive')
 def s2s_endpoint():
     """
     Speech-to-Speech endpoint: ASR -> MT -> TTS pipeline using Bhashini API
@@ -440,6 +676,8 @@ def s2s_endpoint():
                     "code": 502
                 }), 502
             
+            report_progress("asr", original_text=source_text)
+            
         except requests.exceptions.RequestException as e:
             return jsonify({
                 "status": "error",
@@ -449,54 +687,9 @@ def s2s_endpoint():
                 "code": 502
             }), 502
         
-        # Step 2: MT - Translate text
+        # Step 2: MT - Translate text (segmented for long transcripts)
         try:
-            mt_payload = {
-                "pipelineTasks": [
-                    {
-                        "taskType": "translation",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": source,
-                                "targetLanguage": dest
-                            },
-                            "serviceId": "ai4bharat/indictrans-v2-all-gpu--t4",
-                            "numTranslation": "True"
-                        }
-                    }
-                ],
-                "inputData": {
-                    "input": [
-                        {
-                            "source": source_text
-                        }
-                    ],
-                    "audio": [
-                        {
-                            "audioContent": None
-                        }
-                    ]
-                }
-            }
-            
-            mt_response = requests.post(
-                BHASHINI_API_URL,
-                json=mt_payload,
-                headers=headers,
-                timeout=30
-            )
-            mt_response.raise_for_status()
-            mt_result = mt_response.json()
-            
-            # Extract translated text
-            translated_text = None
-            if 'pipelineResponse' in mt_result:
-                for task_response in mt_result['pipelineResponse']:
-                    if task_response.get('taskType') == 'translation' and 'output' in task_response:
-                        output_list = task_response['output']
-                        if output_list and len(output_list) > 0:
-                            translated_text = output_list[0].get('target')
-                            break
+            translated_text, _ = translate_long_text(source_text, source, dest)
             
             if not translated_text:
                 return jsonify({
@@ -507,6 +700,8 @@ def s2s_endpoint():
                     "code": 502
                 }), 502
             
+            report_progress("mt", translated_text=translated_text)
+            
         except requests.exceptions.RequestException as e:
             return jsonify({
                 "status": "error",
@@ -612,6 +807,7 @@ def s2s_endpoint():
         }), 500
 
 @app.route('/asr', methods=['POST'])
+@admitted('interactive')
 def asr_endpoint():
     """
     Automatic Speech Recognition endpoint using Bhashini API.
@@ -843,6 +1039,7 @@ def asr_endpoint():
         }), 500
 
 @app.route('/ocr', methods=['POST'])
+@admitted('background')
 def ocr_endpoint():
     try:
         # Check if image file is present
@@ -969,6 +1166,7 @@ def ocr_endpoint():
 
 
 @app.route('/mt', methods=['POST'])
+@admitted('interactive')
 def mt_endpoint():
     """
     Machine Translation endpoint using Bhashini API.
@@ -1025,61 +1223,9 @@ def mt_endpoint():
                 "code": 400
             }), 400
         
-        # Prepare Bhashini API payload
-        bhashini_payload = {
-            "pipelineTasks": [
-                {
-                    "taskType": "translation",
-                    "config": {
-                        "language": {
-                            "sourceLanguage": source,
-                            "targetLanguage": dest
-                        },
-                        "serviceId": "ai4bharat/indictrans-v2-all-gpu--t4",
-                        "numTranslation": "True"
-                    }
-                }
-            ],
-            "inputData": {
-                "input": [
-                    {
-                        "source": text
-                    }
-                ],
-                "audio": [
-                    {
-                        "audioContent": None
-                    }
-                ]
-            }
-        }
-        
-        # Make the request to Bhashini API
+        # Translate (long inputs are segmented and fanned out in parallel)
         try:
-            headers = {
-                'Authorization': BHASHINI_API_KEY,
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(
-                BHASHINI_API_URL,
-                json=bhashini_payload,
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            bhashini_response = response.json()
-            
-            # Extract translated text from response
-            translated_text = None
-            if 'pipelineResponse' in bhashini_response:
-                for task_response in bhashini_response['pipelineResponse']:
-                    if task_response.get('taskType') == 'translation' and 'output' in task_response:
-                        output_list = task_response['output']
-                        if output_list and len(output_list) > 0:
-                            translated_text = output_list[0].get('target')
-                            break
+            translated_text, segment_count = translate_long_text(text, source, dest)
             
             if not translated_text:
                 return jsonify({
@@ -1098,7 +1244,8 @@ def mt_endpoint():
                     "output_text": translated_text,
                     "input_text": text,
                     "source_language": source,
-                    "target_language": dest
+                    "target_language": dest,
+                    "segments": segment_count
                 },
                 "error": None,
                 "code": 200
@@ -1172,12 +1319,353 @@ def health_check():
                 "mt": "/mt - Machine Translation (all pairs)",
                 "asr": "/asr - Automatic Speech Recognition (13 languages)",
                 "ocr": "/ocr - Optical Character Recognition (3 modalities)",
-                "s2s": "/s2s - Speech-to-Speech (full pipeline)"
+                "s2s": "/s2s - Speech-to-Speech (full pipeline)",
+                "admission_metrics": "/metrics/admission - Queue depth per priority lane",
+                "tenant_metrics": "/metrics/tenants - Usage and concurrency per tenant",
+                "jobs": "/jobs - Asynchronous jobs with SSE progress (/jobs/<id>/events) and webhooks",
+                "asr_stream": "/asr/stream - WebSocket streaming ASR with partial transcripts"
             }
         },
         "error": None,
         "code": 200
     })
 
+@app.route('/metrics/admission', methods=['GET'])
+def admission_metrics():
+    """Queue depth, in-flight requests and rejection counters per priority lane"""
+    return jsonify({
+        "status": "success",
+        "message": "Admission control metrics",
+        "data": admission.snapshot(),
+        "error": None,
+        "code": 200
+    })
+
+@app.route('/metrics/tenants', methods=['GET'])
+def tenant_metrics():
+    """Usage counters, weights and concurrency caps for every tenant seen"""
+    return jsonify({
+        "status": "success",
+        "message": "Tenant usage metrics",
+        "data": admission.tenants.snapshot(),
+        "error": None,
+        "code": 200
+    })
+
+@app.route('/metrics/tenants/<tenant_id>', methods=['GET'])
+def tenant_usage(tenant_id):
+    """Usage counters for one tenant (e.g. /metrics/tenants/user:clinic-42)"""
+    if tenant_id not in admission.tenants.usage:
+        return jsonify({
+            "status": "error",
+            "message": "Unknown tenant",
+            "data": None,
+            "error": f"No usage recorded for tenant '{tenant_id}'",
+            "code": 404
+        }), 404
+    
+    return jsonify({
+        "status": "success",
+        "message": "Tenant usage",
+        "data": admission.tenants.snapshot(tenant_id),
+        "error": None,
+        "code": 200
+    })
+
+# Asynchronous jobs (see jobs.py)
+job_store = JobStore.from_env()
+
+# Operations that can run as jobs: name -> (path, view function)
+JOB_OPERATIONS = {
+    "s2s": ('/s2s', s2s_endpoint),
+    "ocr": ('/ocr', ocr_endpoint),
+    "asr": ('/asr', asr_endpoint),
+    "mt": ('/mt', mt_endpoint),
+    "tts": ('/tts', tts_endpoint),
+}
+
+# Caller headers replayed into the job so admission and tenancy still apply
+JOB_FORWARDED_HEADERS = ('X-Priority', 'X-User-ID', 'X-API-Key')
+
+def build_job_request():
+    """
+    Capture the submitted operation so it can be replayed on a worker thread.
+    Returns (operation, request_kwargs, idempotency_key, callback_url).
+    """
+    if request.is_json:
+        body = request.get_json(silent=True) or {}
+        operation = body.get('operation')
+        callback_url = body.get('callback_url')
+        payload = body.get('payload') or {}
+        request_kwargs = {"json": payload}
+        digest_parts = [json.dumps(payload, sort_keys=True)]
+    else:
+        operation = request.form.get('operation')
+        callback_url = request.form.get('callback_url')
+        form = {key: value for key, value in request.form.items() if key not in ('operation', 'callback_url')}
+        data = dict(form)
+        digest_parts = [json.dumps(form, sort_keys=True)]
+        for field, storage in request.files.items():
+            content = storage.read()
+            data[field] = (io.BytesIO(content), storage.filename, storage.content_type)
+            digest_parts.append(f"{field}:{storage.filename}:{hashlib.sha256(content).hexdigest()}")
+        request_kwargs = {"data": data}
+    
+    headers = {name: request.headers[name] for name in JOB_FORWARDED_HEADERS if name in request.headers}
+    request_kwargs["headers"] = headers
+    
+    # Keys are scoped to the caller so one tenant cannot pick up another's job
+    client_key = request.headers.get('Idempotency-Key')
+    digest = hashlib.sha256()
+    parts = ["key", resolve_tenant(), client_key] if client_key else [operation or "", resolve_tenant()] + digest_parts
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    idempotency_key = digest.hexdigest()
+    
+    return operation, request_kwargs, idempotency_key, callback_url
+
+def job_links(job_id: str) -> dict:
+    return {
+        "self": f"/jobs/{job_id}",
+        "events": f"/jobs/{job_id}/events"
+    }
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Submit a long-running operation and return immediately.
+    Expects form-data with operation=s2s|ocr|asr|mt|tts plus that endpoint's fields,
+    or JSON: {"operation": "mt", "payload": {...}}. Optional callback_url receives
+    the finished job as a webhook. Identical submissions (or a repeated
+    Idempotency-Key header) return the retained job instead of starting a new one.
+    Returns: 202 with job_id and links to status and SSE events
+    """
+    try:
+        operation, request_kwargs, idempotency_key, callback_url = build_job_request()
+        
+        if operation not in JOB_OPERATIONS:
+            return jsonify({
+                "status": "error",
+                "message": "Unsupported operation",
+                "data": None,
+                "error": f"operation must be one of {list(JOB_OPERATIONS.keys())}",
+                "code": 400
+            }), 400
+        
+        path, view = JOB_OPERATIONS[operation]
+        
+        if callback_url:
+            try:
+                validate_callback_url(callback_url, job_store.callback_allowed_hosts)
+            except ValueError as e:
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid callback_url",
+                    "data": None,
+                    "error": str(e),
+                    "code": 400
+                }), 400
+        
+        def runner():
+            with app.test_request_context(path, method='POST', **request_kwargs):
+                response = app.make_response(view())
+                return response.status_code, response.get_json(silent=True)
+        
+        try:
+            job, created = job_store.submit(operation, runner, idempotency_key, callback_url)
+        except BacklogFull as e:
+            return jsonify({
+                "status": "error",
+                "message": "Too many jobs in progress, retry later",
+                "data": None,
+                "error": str(e),
+                "code": 429
+            }), 429
+        
+        return jsonify({
+            "status": "success",
+            "message": "Job accepted" if created else "Existing job returned",
+            "data": {
+                "job_id": job.id,
+                "job_status": job.status,
+                "created": created,
+                "links": job_links(job.id)
+            },
+            "error": None,
+            "code": 202
+        }), 202
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": "Internal server error",
+            "data": None,
+            "error": str(e),
+            "code": 500
+        }), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status, and the operation's response once finished"""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found",
+            "data": None,
+            "error": f"No job '{job_id}' (unknown or past retention)",
+            "code": 404
+        }), 404
+    
+    return jsonify({
+        "status": "success",
+        "message": "Job status",
+        "data": {**job.snapshot(), "links": job_links(job.id)},
+        "error": None,
+        "code": 200
+    }), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events: queued, running, progress (partial results), succeeded/failed"""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found",
+            "data": None,
+            "error": f"No job '{job_id}' (unknown or past retention)",
+            "code": 404
+        }), 404
+    
+    last_event_id = request.headers.get('Last-Event-ID', '0')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else 0
+    
+    return Response(
+        job_store.stream(job, last_event_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Streaming ASR: segments are recognized concurrently while the speaker continues
+ASR_STREAM_MAX_PARALLEL = int(os.getenv('ASR_STREAM_MAX_PARALLEL', '3'))
+
+@sock.route('/asr/stream')
+def asr_stream(ws):
+    """
+    WebSocket streaming ASR.
+    Connect with ?Language=hi&sample_rate=48000 (or send a JSON config message
+    {"Language": "...", "sample_rate": ...} first), then send binary 16-bit mono
+    PCM frames as they are recorded. Send {"event": "end"} to finish.
+    Server messages (JSON):
+      {"type": "ready", "language": ..., "sample_rate": ...}
+      {"type": "partial", "segment": i, "start": s, "end": e, "text": ..., "transcript": ...}
+      {"type": "error", "segment": i, "error": ...}
+      {"type": "final", "text": ..., "segments": n}
+    """
+    def reject(error):
+        ws.send(json.dumps({"type": "error", "error": error}))
+        ws.close()
+    
+    language = request.args.get('Language') or request.args.get('language')
+    sample_rate = request.args.get('sample_rate', TARGET_SAMPLE_RATE)
+    
+    if not language:
+        message = ws.receive()
+        if message is None:
+            return
+        try:
+            config = json.loads(message) if isinstance(message, str) else None
+        except ValueError:
+            config = None
+        if not isinstance(config, dict):
+            return reject('The first message must be a JSON config {"Language": "...", "sample_rate": ...}')
+        language = config.get('Language') or config.get('language')
+        sample_rate = config.get('sample_rate', sample_rate)
+    
+    try:
+        sample_rate = parse_sample_rate(sample_rate)
+    except ValueError as e:
+        return reject(str(e))
+    
+    if not isinstance(language, str) or not language.strip():
+        return reject("Language is required (query parameter or config message)")
+    language = normalize_language(language)
+    if language not in ASR_SERVICE_IDS:
+        return reject(f"Language '{language}' is not supported. Available languages: {list(ASR_SERVICE_IDS.keys())}")
+    
+    # Resolved here: worker threads have no request context
+    lane = resolve_lane('interactive')
+    tenant = admission.tenants.track(resolve_tenant())
+    resampler = StreamResampler(sample_rate)
+    segmenter = PauseSegmenter()
+    send_lock = threading.Lock()
+    results = {}
+    emitted = []
+    
+    def send(message):
+        with send_lock:
+            ws.send(json.dumps(message, ensure_ascii=False))
+    
+    def recognize(segment):
+        text = ""
+        try:
+            audio_base64 = base64.b64encode(pcm_to_wav(segment.pcm)).decode('utf-8')
+            with admission.slot(lane, tenant):
+                text = recognize_segment(audio_base64, language) or ""
+        except Exception as e:
+            try:
+                send({"type": "error", "segment": segment.index, "error": str(e)})
+            except Exception:
+                pass  # client gone; still record the segment below
+        finally:
+            emit(segment, text)
+    
+    def emit(segment, text):
+        """Record a result and emit partial transcripts in segment order"""
+        with send_lock:
+            results[segment.index] = (segment, text)
+            while len(emitted) in results:
+                done, done_text = results.pop(len(emitted))
+                emitted.append(done_text)
+                ws.send(json.dumps({
+                    "type": "partial",
+                    "segment": done.index,
+                    "start": done.start,
+                    "end": done.end,
+                    "text": done_text,
+                    "transcript": " ".join(t for t in emitted if t)
+                }, ensure_ascii=False))
+    
+    send({"type": "ready", "language": language, "sample_rate": sample_rate})
+    
+    with ThreadPoolExecutor(max_workers=ASR_STREAM_MAX_PARALLEL) as executor:
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            if isinstance(message, str):
+                # Text messages are control messages; only "end" is meaningful
+                try:
+                    control = json.loads(message)
+                except ValueError:
+                    control = {"event": message.strip()}
+                if isinstance(control, dict) and control.get('event') == 'end':
+                    break
+                continue
+            for segment in segmenter.feed(resampler.feed(message)):
+                executor.submit(recognize, segment)
+        
+        for segment in segmenter.flush():
+            executor.submit(recognize, segment)
+    
+    send({
+        "type": "final",
+        "text": " ".join(t for t in emitted if t),
+        "segments": len(emitted)
+    })
+    ws.close()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8005)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Streaming ASR - Pause-based segmentation of live PCM audio
+
+The /asr/stream WebSocket receives 16-bit mono PCM frames while the patient
+is still speaking. PauseSegmenter classifies 20 ms frames as speech or
+silence (vectorized RMS against an adaptive noise floor) and closes a
+segment at the first pause once it is long enough, or at max_seconds. Each
+closed segment is sent to ASR immediately, so the transcript is ready about
+one short segment after the speaker stops instead of after the whole upload.
+"""
+
+import io
+import wave
+from typing import List, NamedTuple
+
+import numpy as np
+
+TARGET_SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+# Capture rates accepted from clients (telephony up to studio audio)
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+
+
+class SpeechSegment(NamedTuple):
+    """A closed segment of 16 kHz PCM and its position in the stream"""
+    index: int
+    start: float
+    end: float
+    pcm: bytes
+
+
+def parse_sample_rate(value) -> int:
+    """A client-supplied capture rate as an int; ValueError if it is not a usable rate"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"Invalid sample_rate: {value!r}")
+    try:
+        rate = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid sample_rate: {value!r}")
+    if not MIN_SAMPLE_RATE <= rate <= MAX_SAMPLE_RATE:
+        raise ValueError(f"sample_rate must be between {MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE}")
+    return rate
+
+
+class StreamResampler:
+    """
+    Linearly resample a live 16-bit mono PCM stream (browsers usually capture
+    at 44.1/48 kHz). The interpolation phase, the last sample and any odd
+    trailing byte carry over between feeds, so message boundaries neither
+    drop samples nor need to fall on whole samples.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int = TARGET_SAMPLE_RATE):
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.step = source_rate / target_rate
+        self._pending = b""   # odd trailing byte
+        self._tail = None     # last input sample of the previous feed
+        self._position = 0.0  # next output position, relative to the tail sample
+
+    def feed(self, pcm: bytes) -> bytes:
+        """Consume PCM bytes and return the resampled PCM available so far"""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        if self.source_rate == self.target_rate:
+            return data[:usable]
+
+        samples = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32)
+        if self._tail is not None:
+            samples = np.concatenate([self._tail, samples])
+        if len(samples) < 2:
+            self._tail = samples if len(samples) else self._tail
+            return b""
+
+        last = len(samples) - 1
+        positions = np.arange(self._position, last, self.step, dtype=np.float64)
+        resampled = np.interp(positions, np.arange(len(samples)), samples)
+        next_position = positions[-1] + self.step if len(positions) else self._position
+        self._position = next_position - last
+        self._tail = samples[-1:]
+        return np.clip(np.round(resampled), -32768, 32767).astype(np.int16).tobytes()
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = TARGET_SAMPLE_RATE) -> bytes:
+    """Wrap 16-bit mono PCM in a WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class PauseSegmenter:
+    """Cut a live 16 kHz PCM stream into speech segments at pauses"""
+
+    def __init__(self, sample_rate: int = TARGET_SAMPLE_RATE, pause_ms: int = 400,
+                 min_seconds: float = 1.0, max_seconds: float = 12.0,
+                 preroll_ms: int = 200, min_rms: float = 200.0, noise_ratio: float = 2.5):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * FRAME_MS // 1000
+        self.pause_frames = pause_ms // FRAME_MS
+        self.long_pause_frames = 3 * self.pause_frames
+        self.min_frames = int(min_seconds * 1000 / FRAME_MS)
+        self.max_frames = int(max_seconds * 1000 / FRAME_MS)
+        self.preroll_frames = preroll_ms // FRAME_MS
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.noise_floor = min_rms / noise_ratio
+
+        self._pending = b""          # bytes not yet forming a whole frame
+        self._frames: List[bytes] = []  # frames of the open segment (incl. pre-roll)
+        self._speech_frames = 0
+        self._silence_run = 0
+        self._segment_start = 0      # frame index where the open segment starts
+        self._frame_index = 0        # total frames consumed
+        self._next_index = 0
+
+    def _classify(self, block: np.ndarray) -> np.ndarray:
+        """Speech/silence flag per frame; updates the noise floor from silent frames"""
+        frames = block.reshape(-1, self.frame_samples).astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        threshold = max(self.min_rms, self.noise_floor * self.noise_ratio)
+        speech = rms >= threshold
+        silent = rms[~speech]
+        if silent.size:
+            self.noise_floor = 0.9 * self.noise_floor + 0.1 * float(np.median(silent))
+        return speech
+
+    def _close(self) -> SpeechSegment:
+        # Drop trailing silence beyond the pause itself
+        keep = len(self._frames) - max(0, self._silence_run - self.pause_frames // 2)
+        frames = self._frames[:keep]
+        segment = SpeechSegment(
+            index=self._next_index,
+            start=self._segment_start * FRAME_MS / 1000,
+            end=(self._segment_start + len(frames)) * FRAME_MS / 1000,
+            pcm=b"".join(frames),
+        )
+        self._next_index += 1
+        self._frames = []
+        self._speech_frames = 0
+        self._silence_run = 0
+        return segment
+
+    def feed(self, pcm: bytes) -> List[SpeechSegment]:
+        """Consume PCM bytes and return any segments closed by them"""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % (self.frame_samples * 2)
+        self._pending = data[usable:]
+        if not usable:
+            return []
+
+        block = np.frombuffer(data[:usable], dtype=np.int16)
+        flags = self._classify(block)
+        frame_bytes = self.frame_samples * 2
+        closed = []
+
+        for i, is_speech in enumerate(flags):
+            frame = data[i * frame_bytes:(i + 1) * frame_bytes]
+            self._frame_index += 1
+
+            if not self._speech_frames:
+                # Waiting for speech: keep only a short pre-roll
+                self._frames.append(frame)
+                if len(self._frames) > self.preroll_frames:
+                    self._frames.pop(0)
+                self._segment_start = self._frame_index - len(self._frames)
+                if is_speech:
+                    self._speech_frames = 1
+                continue
+
+            self._frames.append(frame)
+            if is_speech:
+                self._speech_frames += 1
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+
+            paused = self._silence_run >= self.pause_frames and len(self._frames) >= self.min_frames
+            if paused or self._silence_run >= self.long_pause_frames or len(self._frames) >= self.max_frames:
+                closed.append(self._close())
+
+        return closed
+
+    def flush(self) -> List[SpeechSegment]:
+        """Close the open segment at end of stream (if it contains speech)"""
+        if self._speech_frames:
+            return [self._close()]
+        return []
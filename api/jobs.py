@@ -0,0 +1,275 @@
+"""
+Jobs - Asynchronous execution of long-running gateway operations
+
+/s2s and /ocr can hold a connection for minutes; proxies time out and
+clients retry, doubling upstream load. A job runs the same operation on a
+worker thread: submitting returns a job ID immediately, progress and partial
+results are published as events (streamed over Server-Sent Events by the
+gateway), completion can POST the result to a webhook, and finished jobs are
+retained for a bounded time so retries become lookups. At most max_backlog
+jobs may be queued or running at once; further submissions are refused
+rather than growing the worker queue without bound.
+
+Endpoints report progress with report_progress(); outside a job it is a
+no-op, so the synchronous routes are unaffected.
+
+Webhooks only go to http(s) URLs whose host resolves to public addresses,
+or, when JOBS_CALLBACK_ALLOWED_HOSTS is set, to the listed hosts only, so a
+callback cannot be used to reach services inside the deployment.
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+TERMINAL_STATES = ("succeeded", "failed")
+
+_current = threading.local()
+
+
+def validate_callback_url(url: str, allowed_hosts: Optional[List[str]] = None) -> str:
+    """
+    Check that a webhook URL is http(s) and points at an allowed or public host.
+
+    Raises:
+        ValueError: If the URL may not be used as a callback
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parsed.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"callback_url host '{host}' is not allowed")
+        return url
+    
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"callback_url host '{host}' does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"callback_url host '{host}' resolves to a non-public address")
+    return url
+
+
+def report_progress(stage: str, **data):
+    """Publish a progress event for the job running on this thread, if any"""
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.publish("progress", {"stage": stage, **data})
+
+
+class BacklogFull(Exception):
+    """Raised when max_backlog jobs are already queued or running"""
+
+    def __init__(self, backlog: int):
+        super().__init__(f"{backlog} jobs are already queued or running")
+        self.backlog = backlog
+
+
+class Job:
+    """State, result and event log of one submitted operation"""
+
+    def __init__(self, operation: str, idempotency_key: str, callback_url: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.idempotency_key = idempotency_key
+        self.callback_url = callback_url
+        self.status = "queued"
+        self.result = None
+        self.http_status = None
+        self.error = None
+        self.webhook = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self._cond = threading.Condition()
+
+    def publish(self, event: str, data: Dict, status: Optional[str] = None):
+        """Append an event; a status change is applied atomically with it"""
+        with self._cond:
+            if status is not None:
+                self.status = status
+            self.events.append((len(self.events) + 1, event, data))
+            self._cond.notify_all()
+
+    def wait_for_events(self, after: int, timeout: float):
+        """Return events with id > after, waiting up to timeout for new ones"""
+        with self._cond:
+            if len(self.events) <= after and self.status not in TERMINAL_STATES:
+                self._cond.wait(timeout)
+            return self.events[after:]
+
+    def snapshot(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "operation": self.operation,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "http_status": self.http_status,
+            "result": self.result,
+            "error": self.error,
+            "webhook": self.webhook,
+            "events": len(self.events),
+        }
+
+
+class JobStore:
+    """Run jobs on a bounded worker pool and retain them for a bounded time"""
+
+    WEBHOOK_ATTEMPTS = 3
+
+    def __init__(self, max_workers: int = 8, retention_seconds: float = 3600, max_jobs: int = 1000,
+                 max_backlog: int = 100, callback_allowed_hosts: Optional[List[str]] = None):
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self.max_backlog = max_backlog
+        self.callback_allowed_hosts = callback_allowed_hosts or []
+        self.jobs: Dict[str, Job] = {}
+        self.by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+    @classmethod
+    def from_env(cls) -> "JobStore":
+        return cls(
+            max_workers=int(os.getenv("JOBS_MAX_WORKERS", "8")),
+            retention_seconds=float(os.getenv("JOBS_RETENTION_SECONDS", "3600")),
+            max_jobs=int(os.getenv("JOBS_MAX_RETAINED", "1000")),
+            max_backlog=int(os.getenv("JOBS_MAX_BACKLOG", "100")),
+            callback_allowed_hosts=[host.strip().lower() for host in
+                                    os.getenv("JOBS_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()],
+        )
+
+    def submit(self, operation: str, runner: Callable[[], Tuple[int, Dict]], idempotency_key: str,
+               callback_url: Optional[str] = None) -> Tuple[Job, bool]:
+        """
+        Start a job unless one with the same idempotency key is retained.
+
+        Args:
+            operation: Operation name (s2s, ocr, ...)
+            runner: Callable returning (http_status, response_body)
+            idempotency_key: Key identifying identical submissions
+            callback_url: Optional webhook to POST the finished job to
+
+        Returns:
+            (job, created) - created is False when an existing job was reused
+
+        Raises:
+            ValueError: If callback_url is not an allowed webhook target
+            BacklogFull: If max_backlog jobs are already queued or running
+        """
+        if callback_url:
+            validate_callback_url(callback_url, self.callback_allowed_hosts)
+        with self._lock:
+            self._sweep()
+            existing = self.jobs.get(self.by_key.get(idempotency_key))
+            if existing is not None and existing.status != "failed":
+                return existing, False
+            backlog = sum(1 for queued in self.jobs.values() if queued.finished_at is None)
+            if backlog >= self.max_backlog:
+                raise BacklogFull(backlog)
+
+            job = Job(operation, idempotency_key, callback_url)
+            self.jobs[job.id] = job
+            self.by_key[idempotency_key] = job.id
+
+        job.publish("queued", {"job_id": job.id, "operation": operation})
+        self._executor.submit(self._run, job, runner)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._sweep()
+            return self.jobs.get(job_id)
+
+    def stream(self, job: Job, last_event_id: int = 0, heartbeat: float = 15.0) -> Iterator[str]:
+        """Yield Server-Sent Events for a job until it reaches a terminal state"""
+        after = last_event_id
+        while True:
+            events = job.wait_for_events(after, heartbeat)
+            if not events:
+                if job.status in TERMINAL_STATES:
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event, data in events:
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+                after = event_id
+            if job.status in TERMINAL_STATES and after >= len(job.events):
+                return
+
+    def _run(self, job: Job, runner: Callable[[], Tuple[int, Dict]]):
+        job.publish("running", {"job_id": job.id}, status="running")
+        _current.job = job
+        try:
+            http_status, body = runner()
+            job.http_status = http_status
+            job.result = body
+            final_status = "succeeded" if http_status < 400 else "failed"
+            if final_status == "failed":
+                job.error = (body or {}).get("error") or (body or {}).get("message")
+        except Exception as e:
+            job.http_status = 500
+            job.error = str(e)
+            final_status = "failed"
+        finally:
+            _current.job = None
+            job.finished_at = time.time()
+
+        # Clients see the outcome now; the webhook (with its retries) follows
+        if job.callback_url:
+            job.webhook = {"delivered": False, "pending": True}
+        snapshot = job.snapshot()
+        snapshot["status"] = final_status
+        job.publish(final_status, snapshot, status=final_status)
+        if job.callback_url:
+            job.webhook = self._deliver_webhook(job)
+
+    def _deliver_webhook(self, job: Job) -> Dict:
+        """POST the finished job to its callback URL, retrying with backoff"""
+        payload = job.snapshot()
+        payload.pop("webhook", None)
+        last_error = None
+        for attempt in range(1, self.WEBHOOK_ATTEMPTS + 1):
+            try:
+                # Re-checked per attempt: the host may resolve differently by now
+                validate_callback_url(job.callback_url, self.callback_allowed_hosts)
+                response = requests.post(job.callback_url, json=payload, timeout=10, allow_redirects=False)
+                if response.status_code < 500:
+                    return {"delivered": response.ok, "status_code": response.status_code, "attempts": attempt}
+                last_error = f"HTTP {response.status_code}"
+            except ValueError as e:
+                return {"delivered": False, "error": str(e), "attempts": attempt}
+            except requests.exceptions.RequestException as e:
+                last_error = str(e)
+            if attempt < self.WEBHOOK_ATTEMPTS:
+                time.sleep(2 ** (attempt - 1))
+        return {"delivered": False, "error": last_error, "attempts": self.WEBHOOK_ATTEMPTS}
+
+    def _sweep(self):
+        """Drop finished jobs past retention, then the oldest finished beyond max_jobs (lock held)"""
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.retention_seconds]
+        finished = sorted((job for job in self.jobs.values() if job.finished_at is not None),
+                          key=lambda job: job.finished_at)
+        overflow = len(self.jobs) - len(expired) - self.max_jobs
+        if overflow > 0:
+            expired.extend(job.id for job in finished[:overflow] if job.id not in expired)
+        for job_id in expired:
+            job = self.jobs.pop(job_id)
+            if self.by_key.get(job.idempotency_key) == job_id:
+                del self.by_key[job.idempotency_key]
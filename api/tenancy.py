@@ -0,0 +1,219 @@
+"""
+Tenancy - Per-tenant fair queuing, concurrency caps and usage counters
+
+A tenant is the caller of the gateway: the `userID` used by the database
+service, or an API key. Within each admission lane, waiting requests are
+ordered by weighted fair queuing: every request gets a virtual finish tag
+of max(lane virtual time, tenant's last tag) + 1 / weight, and the waiter
+with the smallest tag goes next. A clinic that queues hundreds of scans
+therefore only gets its weighted share of upstream slots, and each tenant is
+further limited to its own concurrency cap.
+
+Tenants come from client-supplied headers, so the registry tracks at most
+`max_tenants` of them: when it is full, the least recently seen idle tenant
+is forgotten, and if every tracked tenant is busy the newcomer is accounted
+to the shared OVERFLOW_TENANT bucket.
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+ANONYMOUS_TENANT = "anonymous"
+OVERFLOW_TENANT = "overflow"
+DEFAULT_TENANT_WEIGHT = 1.0
+DEFAULT_TENANT_MAX_CONCURRENCY = 4
+DEFAULT_MAX_TENANTS = 1000
+
+
+def _parse_overrides(value: str, cast) -> Dict:
+    """Parse "tenant=value,tenant=value" environment overrides"""
+    overrides = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            tenant, raw = item.split("=", 1)
+            overrides[tenant.strip()] = cast(raw.strip())
+    return overrides
+
+
+class TenantUsage:
+    """Counters for one tenant"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.bytes_in = 0
+        self.requests_by_endpoint = {}
+
+    def snapshot(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+            "bytes_in": self.bytes_in,
+            "requests_by_endpoint": dict(self.requests_by_endpoint),
+        }
+
+
+class TenantRegistry:
+    """Weights, concurrency caps and usage counters for every tenant seen"""
+
+    def __init__(self, default_weight: float = DEFAULT_TENANT_WEIGHT,
+                 default_max_concurrency: int = DEFAULT_TENANT_MAX_CONCURRENCY,
+                 weights: Optional[Dict[str, float]] = None,
+                 max_concurrency: Optional[Dict[str, int]] = None,
+                 max_tenants: int = DEFAULT_MAX_TENANTS):
+        self.default_weight = default_weight
+        self.default_max_concurrency = default_max_concurrency
+        self.weights = weights or {}
+        self.max_concurrency = max_concurrency or {}
+        self.max_tenants = max(1, max_tenants)
+        self.usage: "OrderedDict[str, TenantUsage]" = OrderedDict()
+        # Reentrant so the admission controller can share it as its condition lock
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> "TenantRegistry":
+        """
+        Build a registry from environment variables, e.g.
+        TENANT_MAX_CONCURRENCY=4, TENANT_MAX_TRACKED=1000,
+        TENANT_WEIGHTS="user:clinic-a=2,user:clinic-b=0.5",
+        TENANT_CONCURRENCY="user:clinic-a=8"
+        (tenant keys as reported by /metrics/tenants: "user:<userID>" or "key:<digest>")
+        """
+        return cls(
+            default_weight=float(os.getenv("TENANT_DEFAULT_WEIGHT", DEFAULT_TENANT_WEIGHT)),
+            default_max_concurrency=int(os.getenv("TENANT_MAX_CONCURRENCY", DEFAULT_TENANT_MAX_CONCURRENCY)),
+            weights=_parse_overrides(os.getenv("TENANT_WEIGHTS"), float),
+            max_concurrency=_parse_overrides(os.getenv("TENANT_CONCURRENCY"), int),
+            max_tenants=int(os.getenv("TENANT_MAX_TRACKED", DEFAULT_MAX_TENANTS)),
+        )
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, self.default_weight)
+
+    def cap(self, tenant: str) -> int:
+        return self.max_concurrency.get(tenant, self.default_max_concurrency)
+
+    def track(self, tenant: str) -> str:
+        """
+        The tenant to account a new request to: the tenant itself, or
+        OVERFLOW_TENANT when the registry is full of busy tenants
+        """
+        with self.lock:
+            if tenant in self.usage:
+                self.usage.move_to_end(tenant)
+                return tenant
+            tracked = len(self.usage) - (OVERFLOW_TENANT in self.usage)
+            if tracked >= self.max_tenants:
+                idle = next((name for name, usage in self.usage.items()
+                             if name != OVERFLOW_TENANT and not usage.in_flight and not usage.queued), None)
+                if idle is None:
+                    tenant = OVERFLOW_TENANT
+                else:
+                    del self.usage[idle]
+            self.get(tenant)
+            return tenant
+
+    def get(self, tenant: str) -> TenantUsage:
+        usage = self.usage.get(tenant)
+        if usage is None:
+            with self.lock:
+                usage = self.usage.setdefault(tenant, TenantUsage())
+        return usage
+
+    def has_capacity(self, tenant: str) -> bool:
+        return self.get(tenant).in_flight < self.cap(tenant)
+
+    def record_request(self, tenant: str, endpoint: str, bytes_in: int):
+        with self.lock:
+            usage = self.get(tenant)
+            usage.requests_by_endpoint[endpoint] = usage.requests_by_endpoint.get(endpoint, 0) + 1
+            usage.bytes_in += bytes_in
+
+    def snapshot(self, tenant: Optional[str] = None) -> Dict:
+        """Usage for one tenant, or for all tenants"""
+        if tenant is not None:
+            return {
+                "tenant": tenant,
+                "weight": self.weight(tenant),
+                "max_concurrency": self.cap(tenant),
+                **self.get(tenant).snapshot(),
+            }
+        with self.lock:
+            return {name: self.snapshot(name) for name in list(self.usage)}
+
+
+class FairQueue:
+    """
+    Weighted fair queue of admission tickets across tenants.
+
+    Tickets need `tenant`, `finish` and `seq` attributes; the queue assigns
+    `finish` and `seq` on append. head() is side-effect free so every waiter
+    can check whether it is next.
+    """
+
+    def __init__(self, tenants: TenantRegistry):
+        self.tenants = tenants
+        self._queues: Dict[str, deque] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __contains__(self, ticket) -> bool:
+        queue = self._queues.get(ticket.tenant)
+        return queue is not None and ticket in queue
+
+    def append(self, ticket):
+        tenant = ticket.tenant
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        ticket.finish = start + 1.0 / self.tenants.weight(tenant)
+        ticket.seq = self._seq
+        self._seq += 1
+        self._last_finish[tenant] = ticket.finish
+        self._queues.setdefault(tenant, deque()).append(ticket)
+        self._size += 1
+        self.tenants.get(tenant).queued += 1
+
+    def remove(self, ticket):
+        queue = self._queues[ticket.tenant]
+        queue.remove(ticket)
+        self._size -= 1
+        self.tenants.get(ticket.tenant).queued -= 1
+        if not queue:
+            del self._queues[ticket.tenant]
+
+    def head(self):
+        """The next ticket to admit: smallest finish tag among tenants under their cap"""
+        best = None
+        for tenant, queue in self._queues.items():
+            if not self.tenants.has_capacity(tenant):
+                continue
+            candidate = queue[0]
+            if best is None or (candidate.finish, candidate.seq) < (best.finish, best.seq):
+                best = candidate
+        return best
+
+    def pop(self, ticket):
+        """Remove the admitted head ticket and advance virtual time"""
+        self.remove(ticket)
+        self._virtual_time = max(self._virtual_time, ticket.finish - 1.0 / self.tenants.weight(ticket.tenant))
+        if not self._queues:
+            # Idle lane: forget history so returning tenants start level
+            self._last_finish.clear()
+            self._virtual_time = 0.0
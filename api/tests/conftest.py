@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Gateway modules are imported flat from the api directory (as apiserver.py does),
+# and the shared text_segmenter package from the repository root
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+sys.path.append(os.path.dirname(API_DIR))
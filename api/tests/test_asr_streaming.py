@@ -0,0 +1,136 @@
+import json
+from unittest import mock
+
+import numpy as np
+
+import apiserver
+from asr.streaming import PauseSegmenter, StreamResampler, TARGET_SAMPLE_RATE
+
+
+def tone(seconds, rate=TARGET_SAMPLE_RATE, amplitude=8000):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes()
+
+
+def silence(seconds, rate=TARGET_SAMPLE_RATE):
+    return np.zeros(int(seconds * rate), dtype=np.int16).tobytes()
+
+
+def test_resampler_is_independent_of_message_boundaries():
+    pcm = tone(1.0, rate=48000)
+    whole = StreamResampler(48000).feed(pcm)
+
+    resampler = StreamResampler(48000)
+    # Odd-length messages split samples across frames
+    pieces = [pcm[i:i + 997] for i in range(0, len(pcm), 997)]
+    chunked = b"".join(resampler.feed(piece) for piece in pieces)
+
+    assert chunked == whole
+    assert abs(len(whole) // 2 - TARGET_SAMPLE_RATE) <= 1
+
+
+def test_resampler_handles_44100():
+    resampler = StreamResampler(44100)
+    out = b"".join(resampler.feed(tone(0.1, rate=44100)) for _ in range(10))
+    assert abs(len(out) // 2 - TARGET_SAMPLE_RATE) <= 2
+
+
+def test_pause_segmenter_cuts_at_pauses():
+    segmenter = PauseSegmenter()
+    stream = tone(1.5) + silence(0.6) + tone(1.2) + silence(0.6)
+    segments = []
+    for i in range(0, len(stream), 3001):
+        segments.extend(segmenter.feed(stream[i:i + 3001]))
+    segments.extend(segmenter.flush())
+
+    assert [segment.index for segment in segments] == [0, 1]
+    assert segments[0].start < 0.05 and 1.4 < segments[0].end < 2.0
+    assert 1.85 < segments[1].start < 2.1  # 200 ms pre-roll before the second tone
+
+
+def test_pause_segmenter_ignores_silence():
+    segmenter = PauseSegmenter()
+    assert segmenter.feed(silence(2.0)) == []
+    assert segmenter.flush() == []
+
+
+class FakeSocket:
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+        self.closed = False
+
+    def receive(self):
+        return self.messages.pop(0) if self.messages else None
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+    def close(self):
+        self.closed = True
+
+
+def test_asr_stream_emits_partials_and_final_in_order():
+    audio = tone(1.5, rate=48000) + silence(0.6, rate=48000) + tone(1.2, rate=48000) + silence(0.6, rate=48000)
+    messages = [audio[i:i + 4801] for i in range(0, len(audio), 4801)] + [json.dumps({"event": "end"})]
+    ws = FakeSocket(messages)
+    texts = iter(["pehla vaakya", "doosra vaakya"])
+
+    with mock.patch.object(apiserver, "recognize_segment", side_effect=lambda audio, language: next(texts)):
+        with apiserver.app.test_request_context("/asr/stream?Language=hi&sample_rate=48000",
+                                                headers={"X-User-ID": "clinic-a"}):
+            apiserver.app.view_functions["asr_stream"].__wrapped__(ws)
+
+    kinds = [message["type"] for message in ws.sent]
+    assert kinds == ["ready", "partial", "partial", "final"]
+    assert ws.sent[-1] == {"type": "final", "text": "pehla vaakya doosra vaakya", "segments": 2}
+
+
+def test_asr_stream_failed_segment_does_not_stall_later_ones():
+    audio = tone(1.5) + silence(0.6) + tone(1.2) + silence(0.6)
+    ws = FakeSocket([audio, json.dumps({"event": "end"})])
+    results = iter([RuntimeError("upstream down"), "second"])
+
+    def recognize(audio, language):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with mock.patch.object(apiserver, "recognize_segment", side_effect=recognize):
+        with apiserver.app.test_request_context("/asr/stream?Language=hi"):
+            apiserver.app.view_functions["asr_stream"].__wrapped__(ws)
+
+    assert [m["type"] for m in ws.sent if m["type"] != "ready"].count("partial") == 2
+    assert any(m["type"] == "error" and m["segment"] == 0 for m in ws.sent)
+    assert ws.sent[-1] == {"type": "final", "text": "second", "segments": 2}
+
+
+def run_stream(url, messages):
+    ws = FakeSocket(messages)
+    with mock.patch.object(apiserver, "recognize_segment", side_effect=AssertionError("no ASR expected")):
+        with apiserver.app.test_request_context(url):
+            apiserver.app.view_functions["asr_stream"].__wrapped__(ws)
+    return ws
+
+
+def test_asr_stream_rejects_a_bad_sample_rate():
+    for rate in ("abc", "0", "48000.5", "1000000"):
+        ws = run_stream(f"/asr/stream?Language=hi&sample_rate={rate}", [])
+        assert [m["type"] for m in ws.sent] == ["error"]
+        assert "sample_rate" in ws.sent[0]["error"]
+        assert ws.closed
+
+
+def test_asr_stream_rejects_a_bad_config_message():
+    for first in (silence(0.1), "not json", json.dumps(["hi"]), json.dumps({"Language": "hi", "sample_rate": "fast"}),
+                  json.dumps({"sample_rate": 16000})):
+        ws = run_stream("/asr/stream", [first])
+        assert [m["type"] for m in ws.sent] == ["error"]
+        assert ws.closed
+
+
+def test_asr_stream_accepts_a_config_message():
+    ws = run_stream("/asr/stream", [json.dumps({"Language": "hi", "sample_rate": 44100})])
+    assert ws.sent[0] == {"type": "ready", "language": "hi", "sample_rate": 44100}
+    assert ws.sent[-1] == {"type": "final", "text": "", "segments": 0}
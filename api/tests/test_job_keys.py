@@ -0,0 +1,25 @@
+from unittest import mock
+
+import apiserver
+
+
+def submitted_key(headers):
+    with mock.patch.object(apiserver.job_store, "submit") as submit:
+        submit.return_value = (mock.Mock(id="job", status="queued"), True)
+        response = apiserver.app.test_client().post(
+            "/jobs", json={"operation": "mt", "payload": {"text": "hello"}}, headers=headers)
+        assert response.status_code == 202
+        return submit.call_args.args[2]
+
+
+def test_client_idempotency_key_is_scoped_to_tenant():
+    key_a = submitted_key({"Idempotency-Key": "k1", "X-User-ID": "clinic-a"})
+    key_b = submitted_key({"Idempotency-Key": "k1", "X-User-ID": "clinic-b"})
+    assert key_a != key_b
+    assert key_a == submitted_key({"Idempotency-Key": "k1", "X-User-ID": "clinic-a"})
+
+
+def test_internal_callback_url_is_rejected():
+    response = apiserver.app.test_client().post(
+        "/jobs", json={"operation": "mt", "payload": {}, "callback_url": "http://127.0.0.1:8005/health"})
+    assert response.status_code == 400
@@ -0,0 +1,102 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from jobs import BacklogFull, JobStore, validate_callback_url
+
+
+def wait_for(job, status, timeout=2.0):
+    deadline = time.time() + timeout
+    while job.status != status and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.org/hook",
+    "http://127.0.0.1:8005/health",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+    "http://localhost/hook",
+])
+def test_callback_url_rejects_non_http_and_internal_hosts(url):
+    with pytest.raises(ValueError):
+        validate_callback_url(url)
+
+
+def test_callback_url_allow_list():
+    assert validate_callback_url("https://hooks.clinic.example/done", ["hooks.clinic.example"])
+    with pytest.raises(ValueError):
+        validate_callback_url("https://other.example/done", ["hooks.clinic.example"])
+
+
+def test_submit_rejects_internal_callback():
+    store = JobStore(max_workers=1)
+    with pytest.raises(ValueError):
+        store.submit("mt", lambda: (200, {}), "key", callback_url="http://127.0.0.1/hook")
+    assert not store.jobs
+
+
+def test_final_status_is_published_before_webhook_delivery():
+    store = JobStore(max_workers=1, callback_allowed_hosts=["hooks.example"])
+    delivering = threading.Event()
+    release = threading.Event()
+
+    def post(*args, **kwargs):
+        delivering.set()
+        release.wait(2)
+        raise requests.exceptions.ConnectionError("down")
+
+    with mock.patch("jobs.requests.post", side_effect=post), mock.patch("jobs.time.sleep") as sleep:
+        job, created = store.submit("mt", lambda: (200, {"status": "success"}), "key",
+                                    callback_url="http://hooks.example/done")
+        assert created
+        assert delivering.wait(2)
+        # The job is already visible as finished while the webhook is still in flight
+        assert job.status == "succeeded"
+        assert job.events[-1][1] == "succeeded"
+        release.set()
+        deadline = time.time() + 2
+        while (job.webhook or {}).get("pending") and time.time() < deadline:
+            threading.Event().wait(0.01)  # time.sleep is patched
+
+    assert job.webhook == {"delivered": False, "error": "down", "attempts": JobStore.WEBHOOK_ATTEMPTS}
+    # Backoff only between attempts, never after the last one
+    assert sleep.call_count == JobStore.WEBHOOK_ATTEMPTS - 1
+
+
+def test_idempotency_key_reuses_retained_job():
+    store = JobStore(max_workers=1)
+    job, created = store.submit("mt", lambda: (200, {}), "key")
+    assert created
+    wait_for(job, "succeeded")
+    again, created = store.submit("mt", lambda: (200, {}), "key")
+    assert again is job and not created
+
+
+def test_submit_refuses_jobs_beyond_backlog():
+    store = JobStore(max_workers=1, max_backlog=2)
+    release = threading.Event()
+
+    def blocked():
+        release.wait(2)
+        return 200, {}
+
+    first, _ = store.submit("mt", blocked, "a")
+    second, _ = store.submit("mt", lambda: (200, {}), "b")
+    with pytest.raises(BacklogFull):
+        store.submit("mt", lambda: (200, {}), "c")
+    assert len(store.jobs) == 2
+
+    # A retained job is still returned while the backlog is full
+    job, created = store.submit("mt", blocked, "a")
+    assert job is first and not created
+
+    release.set()
+    assert wait_for(second, "succeeded") == "succeeded"
+    job, created = store.submit("mt", lambda: (200, {}), "c")
+    assert created
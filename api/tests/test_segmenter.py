@@ -0,0 +1,42 @@
+from text_segmenter import join_segments, segment_text, split_sentences
+
+
+def test_split_sentences_across_scripts():
+    text = "Fever since two days. रोगी को खांसी है। مریض کو کھانسی ہے۔ Any pain?"
+    assert split_sentences(text) == [
+        "Fever since two days.",
+        "रोगी को खांसी है।",
+        "مریض کو کھانسی ہے۔",
+        "Any pain?",
+    ]
+
+
+def test_abbreviations_and_initials_do_not_end_sentences():
+    text = "Dr. A. K. Sharma prescribed tab. Metformin. Review in a week."
+    assert split_sentences(text) == [
+        "Dr. A. K. Sharma prescribed tab. Metformin.",
+        "Review in a week.",
+    ]
+
+
+def test_segments_respect_max_chars_and_paragraphs():
+    text = "One short sentence. Another short one.\n\nA new paragraph here."
+    segments = segment_text(text, max_chars=25)
+    assert all(len(segment.text) <= 25 for segment in segments)
+    assert join_segments(segments, [segment.text for segment in segments]) == text
+    assert segments[-1].separator == ""
+    assert any(segment.separator == "\n\n" for segment in segments)
+
+
+def test_long_sentence_splits_on_clauses_then_words():
+    sentence = "word " * 50 + "end, " + "more " * 50
+    segments = segment_text(sentence.strip(), max_chars=60)
+    assert len(segments) > 1
+    assert all(len(segment.text) <= 60 for segment in segments)
+
+
+def test_token_longer_than_max_chars_is_hard_split():
+    url = "https://example.org/" + "x" * 150
+    segments = segment_text(f"See {url} for details.", max_chars=40)
+    assert all(len(segment.text) <= 40 for segment in segments)
+    assert "".join(segment.text for segment in segments).replace(" ", "") == f"See{url}fordetails."
@@ -0,0 +1,84 @@
+import threading
+
+from admission import AdmissionController
+from tenancy import OVERFLOW_TENANT, FairQueue, TenantRegistry
+
+
+class Ticket:
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self.finish = 0.0
+        self.seq = 0
+
+
+def drain(queue, count):
+    order = []
+    for _ in range(count):
+        ticket = queue.head()
+        queue.pop(ticket)
+        order.append(ticket.tenant)
+    return order
+
+
+def test_fair_queue_interleaves_tenants():
+    queue = FairQueue(TenantRegistry())
+    for _ in range(5):
+        queue.append(Ticket("user:busy"))
+    queue.append(Ticket("user:quiet"))
+    # The quiet tenant's only request does not wait behind the whole backlog
+    assert drain(queue, 6)[:2] == ["user:busy", "user:quiet"]
+
+
+def test_fair_queue_honours_weights():
+    queue = FairQueue(TenantRegistry(weights={"user:a": 2.0}))
+    for _ in range(6):
+        queue.append(Ticket("user:a"))
+        queue.append(Ticket("user:b"))
+    order = drain(queue, 6)
+    assert order.count("user:a") == 4
+    assert order.count("user:b") == 2
+
+
+def test_fair_queue_skips_tenants_at_their_cap():
+    tenants = TenantRegistry(max_concurrency={"user:a": 1})
+    tenants.get("user:a").in_flight = 1
+    queue = FairQueue(tenants)
+    queue.append(Ticket("user:a"))
+    queue.append(Ticket("user:b"))
+    assert queue.head().tenant == "user:b"
+
+
+def test_registry_evicts_least_recently_seen_idle_tenant():
+    tenants = TenantRegistry(max_tenants=2)
+    assert tenants.track("user:a") == "user:a"
+    assert tenants.track("user:b") == "user:b"
+    tenants.track("user:a")
+    assert tenants.track("user:c") == "user:c"
+    assert list(tenants.usage) == ["user:a", "user:c"]
+
+
+def test_registry_overflows_when_every_tenant_is_busy():
+    tenants = TenantRegistry(max_tenants=2)
+    for name in ("user:a", "user:b"):
+        tenants.track(name)
+        tenants.get(name).in_flight = 1
+    assert tenants.track("user:c") == OVERFLOW_TENANT
+    assert tenants.track("user:d") == OVERFLOW_TENANT
+    assert len(tenants.usage) == 3
+
+
+def test_rotating_tenants_stay_bounded_under_load():
+    controller = AdmissionController(tenants=TenantRegistry(max_tenants=8))
+
+    def client(i):
+        tenant = controller.tenants.track(f"user:{i}")
+        with controller.slot("interactive", tenant):
+            pass
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(controller.tenants.usage) <= 9
+    assert all(usage.in_flight == 0 and usage.queued == 0 for usage in controller.tenants.usage.values())
@@ -0,0 +1,15 @@
+from .schema import (
+    CompiledSchema,
+    ParsedAnswer,
+    SchemaError,
+    object_schema,
+    repair_json,
+    string_list_schema,
+    string_schema,
+    structured_config,
+)
+
+__all__ = [
+    'CompiledSchema', 'ParsedAnswer', 'SchemaError', 'object_schema', 'repair_json',
+    'string_list_schema', 'string_schema', 'structured_config',
+]
@@ -0,0 +1,208 @@
+"""
+Structured-output schemas and the one parse path for Gemini JSON answers
+
+Shared by Saraansh and Lipigyan. Every JSON prompt is sent with
+responseMimeType "application/json" and a responseSchema, so Gemini returns
+bare JSON of the requested shape. Answers are then read through the schema
+they were requested with, compiled once at import: json.loads straight away
+(the fast path, no regex or fence stripping), and only if that fails a cheap
+local repair of near-misses, such as a stray code fence, text around the
+object or trailing commas. An answer cut off at maxOutputTokens is closed so
+that it parses, but is reported as truncated so callers never serve it as a
+complete answer. The result is validated against the schema, with harmless
+type slips (a number where a string was asked for, a lone string where a
+list was, "True" for a boolean or "Normal" for an enum value) coerced rather
+than failing the request.
+"""
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+
+class SchemaError(ValueError):
+    """A Gemini answer that does not match its response schema"""
+
+
+class ParsedAnswer(NamedTuple):
+    """A validated Gemini answer"""
+    value: Any
+    repaired: bool  # parsed only after the local repair
+    truncated: bool  # cut off mid-answer; the repair closed it
+
+
+def string_schema(description: str = None) -> Dict:
+    schema = {"type": "STRING"}
+    if description:
+        schema["description"] = description
+    return schema
+
+
+def object_schema(properties: Dict, required=None) -> Dict:
+    keys = list(properties)
+    return {
+        "type": "OBJECT",
+        "properties": properties,
+        "required": keys if required is None else required,
+        "propertyOrdering": keys,
+    }
+
+
+def string_list_schema() -> Dict:
+    return {"type": "ARRAY", "items": string_schema()}
+
+
+def structured_config(generation_config: Dict, schema: Dict) -> Dict:
+    """A generation config asking Gemini for JSON matching schema"""
+    return dict(generation_config, responseMimeType="application/json", responseSchema=schema)
+
+
+def repair_json(text: str) -> str:
+    """
+    Cheap local repair of an almost-JSON object: drop anything around the
+    outermost object (fences, prose), trailing commas, and close an answer
+    that was cut off mid-string or mid-object
+    """
+    return _repair(text)[0]
+
+
+def _repair(text: str) -> Tuple[str, bool]:
+    """repair_json, also reporting whether the answer had to be closed"""
+    start = text.find("{")
+    if start < 0:
+        raise SchemaError("No JSON object in Gemini response")
+
+    out = []
+    closers = []
+    in_string = False
+    escape = False
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if not closers:
+                break
+            closers.pop()
+            out.append(ch)
+            if not closers:
+                break
+            continue
+        out.append(ch)
+
+    # Cut off at the token limit: finish the open string and containers
+    truncated = in_string or bool(closers)
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    if closers and closers[-1] == "}":
+        _drop_dangling_key(out)
+    for closer in reversed(closers):
+        _drop_trailing_comma(out)
+        out.append(closer)
+    return "".join(out), truncated
+
+
+def _drop_trailing_comma(out: List[str]):
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def _drop_dangling_key(out: List[str]):
+    """Remove an object's trailing key that has no value ({"a": 1, "b" / {"a": 1, "b":)"""
+    text = "".join(out).rstrip()
+    if text.endswith(":"):
+        text = text[:-1].rstrip()
+    if text.endswith('"'):
+        # Is this string a key (preceded by { or ,) rather than a value?
+        i = len(text) - 2
+        while i >= 0 and not (text[i] == '"' and (i == 0 or text[i - 1] != "\\")):
+            i -= 1
+        before = text[:i].rstrip()
+        if before.endswith("{") or before.endswith(","):
+            text = before
+    out[:] = list(text)
+
+
+def _compile(schema: Dict, path: str) -> Callable[[Any], Any]:
+    kind = schema.get("type")
+    if kind == "OBJECT":
+        fields = {key: _compile(sub, f"{path}.{key}") for key, sub in schema.get("properties", {}).items()}
+        required = schema.get("required", [])
+
+        def check_object(value):
+            if not isinstance(value, dict):
+                raise SchemaError(f"{path}: expected an object")
+            missing = [key for key in required if key not in value]
+            if missing:
+                raise SchemaError(f"{path}: missing {', '.join(missing)}")
+            checked = dict(value)
+            for key, check in fields.items():
+                if checked.get(key) is not None:
+                    checked[key] = check(checked[key])
+            return checked
+        return check_object
+
+    if kind == "ARRAY":
+        check_item = _compile(schema.get("items", {}), f"{path}[]")
+
+        def check_array(value):
+            if not isinstance(value, list):
+                value = [value]  # a lone item where a list was asked for
+            return [check_item(item) for item in value]
+        return check_array
+
+    if kind == "STRING":
+        allowed = {option.lower(): option for option in schema.get("enum", [])}
+
+        def check_string(value):
+            if isinstance(value, (dict, list)):
+                raise SchemaError(f"{path}: expected a string")
+            value = value if isinstance(value, str) else json.dumps(value)
+            return allowed.get(value.strip().lower(), value)
+        return check_string
+
+    if kind == "BOOLEAN":
+        def check_boolean(value):
+            if isinstance(value, str) and value.strip().lower() in ("true", "false", "yes", "no"):
+                return value.strip().lower() in ("true", "yes")
+            if not isinstance(value, bool):
+                raise SchemaError(f"{path}: expected a boolean")
+            return value
+        return check_boolean
+
+    return lambda value: value
+
+
+class CompiledSchema:
+    """A response schema compiled once into a validator"""
+
+    def __init__(self, schema: Dict):
+        self.schema = schema
+        self._check = _compile(schema, "$")
+
+    def parse(self, text: str) -> ParsedAnswer:
+        """Parse and validate a Gemini answer, repairing near-misses locally"""
+        try:
+            value = json.loads(text)
+        except ValueError:
+            try:
+                repaired, truncated = _repair(text)
+                value = json.loads(repaired)
+            except ValueError as e:
+                raise SchemaError(f"Unparseable JSON from Gemini: {e}") from e
+            return ParsedAnswer(self._check(value), True, truncated)
+        return ParsedAnswer(self._check(value), False, False)
@@ -5,10 +5,15 @@ Uses existing OCR/MT API + Gemini summarization
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# gemini_schema is shared with Saraansh and lives at the repository root
+# (the Docker image copies it next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from doc_ingestion.processor import DocumentProcessor
 
 app = Flask(__name__)
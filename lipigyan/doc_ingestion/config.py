@@ -12,3 +12,6 @@ if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in .env file")
 
 GEMINI_TIMEOUT = 60
+
+# Gateway admission lane for document work (interactive traffic goes first)
+GATEWAY_HEADERS = {"X-Priority": "background"}
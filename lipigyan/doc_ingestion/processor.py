@@ -3,7 +3,8 @@ Document Processing Service - Uses existing OCR/MT endpoints + Gemini
 """
 import requests
 from typing import Dict, Optional
-from .config import GEMINI_API_KEY, GEMINI_TIMEOUT
+from .config import GEMINI_API_KEY, GEMINI_TIMEOUT, GATEWAY_HEADERS
+from .schemas import SchemaError, schema_for, structured_config
 
 
 class DocumentProcessor:
@@ -82,6 +83,9 @@ class DocumentProcessor:
             return result
         
         result["summary_english"] = summary_result["summary"]
+        result["truncated"] = summary_result["truncated"]
+        if summary_result["truncated"]:
+            result["warning"] = "Summary was cut off at the output limit and may be incomplete"
         
         # Step 4: Translate summary back (if needed)
         if target_language != "English":
@@ -125,7 +129,7 @@ class DocumentProcessor:
                 with open(image_file, 'rb') as f:
                     files = {'file': (image_file, f, 'image/png')}
                     data = {'Language': language}
-                    response = requests.post(url, files=files, data=data, timeout=120)
+                    response = requests.post(url, files=files, data=data, headers=GATEWAY_HEADERS, timeout=120)
             else:
                 # File object (FileStorage from Flask)
                 # Reset file pointer to beginning
@@ -146,7 +150,7 @@ class DocumentProcessor:
                 # Send with proper multipart format
                 files = {'file': (filename, file_content, content_type)}
                 data = {'Language': language}
-                response = requests.post(url, files=files, data=data, timeout=120)
+                response = requests.post(url, files=files, data=data, headers=GATEWAY_HEADERS, timeout=120)
             
             response.raise_for_status()
             result = response.json()
@@ -179,7 +183,7 @@ class DocumentProcessor:
                 "dest": target
             }
             
-            response = requests.post(url, json=payload, timeout=30)
+            response = requests.post(url, json=payload, headers=GATEWAY_HEADERS, timeout=30)
             response.raise_for_status()
             result = response.json()
             print(result)
@@ -195,20 +199,19 @@ class DocumentProcessor:
             return {"success": False, "error": str(e)}
     
     def _call_gemini(self, text: str, document_type: Optional[str] = None) -> Dict:
-        """Call Gemini API for summarization"""
+        """Call Gemini API for summarization (structured output for the document type)"""
         try:
-            import json
-            print('gemini api key:', self.gemini_api_key)
             prompt = self._create_prompt(text, document_type)
+            schema = schema_for(document_type)
             
             url = f"{self.gemini_base_url}/{self.gemini_model}:generateContent?key={self.gemini_api_key}"
             
             payload = {
                 "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {
+                "generationConfig": structured_config({
                     "temperature": 0.2,
                     "maxOutputTokens": 2048,
-                }
+                }, schema.schema)
             }
             
             response = requests.post(url, json=payload, timeout=GEMINI_TIMEOUT)
@@ -221,20 +224,14 @@ class DocumentProcessor:
                 if parts and "text" in parts[0]:
                     raw_text = parts[0]["text"].strip()
                     
-                    # Try to parse as JSON
+                    # Parse and validate against the response schema
                     try:
-                        # Remove markdown code blocks if present
-                        if raw_text.startswith("```"):
-                            # Remove ```json or ``` at start and ``` at end
-                            raw_text = raw_text.split("```")[1]
-                            if raw_text.startswith("json"):
-                                raw_text = raw_text[4:].strip()
-                        
-                        parsed_json = json.loads(raw_text)
-                        return {"success": True, "summary": parsed_json, "raw_text": raw_text}
-                    except json.JSONDecodeError:
-                        # If JSON parsing fails, return as text
-                        return {"success": True, "summary": raw_text, "raw_text": raw_text}
+                        parsed = schema.parse(raw_text)
+                    except SchemaError as e:
+                        return {"success": False, "error": f"Gemini answer did not match the schema: {e}",
+                                "raw_text": raw_text}
+                    return {"success": True, "summary": parsed.value, "raw_text": raw_text,
+                            "repaired": parsed.repaired, "truncated": parsed.truncated}
             
             return {"success": False, "error": f"Gemini failed: {result}"}
             
@@ -0,0 +1,61 @@
+"""
+Gemini response schemas for Lipigyan document summaries
+
+Each document type is requested with its schema as responseSchema, so Gemini
+answers with bare JSON instead of a fenced block, and the answer is read back
+through the same schema, compiled once at import by the shared gemini_schema
+package (also used by Saraansh).
+"""
+from typing import Optional
+
+from gemini_schema import (
+    CompiledSchema,
+    SchemaError,
+    object_schema,
+    string_schema,
+    structured_config,
+)
+
+
+PRESCRIPTION_SCHEMA = object_schema({
+    "medicines": {"type": "ARRAY", "items": object_schema({
+        "medicine_name": string_schema("name of medicine"),
+        "dosage_mg": string_schema("dosage in mg (number only, or 'not specified')"),
+        "timing": object_schema({
+            "morning": {"type": "BOOLEAN"},
+            "afternoon": {"type": "BOOLEAN"},
+            "evening": {"type": "BOOLEAN"},
+            "night": {"type": "BOOLEAN"},
+        }),
+        "number_of_days": string_schema("number of days (number only, or 'not specified')"),
+    })},
+})
+
+LAB_REPORT_SCHEMA = object_schema({
+    "tests": {"type": "ARRAY", "items": object_schema({
+        "test_name": string_schema("name of the test"),
+        "result": string_schema("test result value"),
+        "reference_range": string_schema("normal reference range"),
+        "status": {"type": "STRING", "enum": ["normal", "abnormal", "borderline"]},
+    })},
+})
+
+SUMMARY_SCHEMA = object_schema({
+    "summary": string_schema("A clear, concise summary of the document"),
+})
+
+
+PRESCRIPTION = CompiledSchema(PRESCRIPTION_SCHEMA)
+LAB_REPORT = CompiledSchema(LAB_REPORT_SCHEMA)
+SUMMARY = CompiledSchema(SUMMARY_SCHEMA)
+
+DOCUMENT_SCHEMAS = {
+    "prescription": PRESCRIPTION,
+    "lab_report": LAB_REPORT,
+    "discharge_summary": SUMMARY,
+}
+
+
+def schema_for(document_type: Optional[str]) -> CompiledSchema:
+    """Compiled response schema for a document type (plain summary by default)"""
+    return DOCUMENT_SCHEMAS.get(document_type, SUMMARY)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Alignment - Merge ASR transcripts of overlapping audio chunks
+
+Consecutive chunks share `overlap` seconds of audio, so the head of each
+chunk's transcript usually repeats the tail of the previous one. The aligner
+only compares a bounded window: the tail of the previous chunk against the
+head of the next, sized from the chunk timestamps and the previous chunk's
+speaking rate. Tokens are normalized (case, punctuation) and mapped to
+integer IDs; an exact suffix/prefix overlap is found with the KMP failure
+function, and a small edit-distance alignment over the same window accepts
+overlaps where ASR heard the edge words slightly differently. Each boundary
+costs O(window), so merging an hour-long recording is linear in its length.
+"""
+
+import math
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+# Upper bound on tokens compared at one chunk boundary
+DEFAULT_MAX_WINDOW = 48
+
+# Edit operations allowed per matched token in a fuzzy overlap (at least one)
+DEFAULT_TOLERANCE = 0.25
+
+# Fuzzy overlaps with fewer exactly matching tokens than this are ignored
+# (one matching word next to an edit is too easy to match by chance)
+MIN_FUZZY_MATCHES = 2
+
+
+def normalize_token(word: str) -> str:
+    """Casefold a word and strip punctuation (any script)"""
+    return "".join(ch for ch in word.casefold() if not unicodedata.category(ch).startswith('P'))
+
+
+class TokenVocabulary:
+    """Maps normalized tokens to integer IDs so comparisons are int compares"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def encode(self, words: Sequence[str]) -> List[int]:
+        ids = []
+        for word in words:
+            token = normalize_token(word)
+            ids.append(self.ids.setdefault(token, len(self.ids)))
+        return ids
+
+
+def exact_overlap(tail: Sequence[int], head: Sequence[int]) -> int:
+    """
+    Length of the longest suffix of tail that equals a prefix of head.
+
+    KMP failure function over head + [separator] + tail, O(len(head) + len(tail)).
+    """
+    if not tail or not head:
+        return 0
+    sequence = list(head) + [-1] + list(tail)
+    failure = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = failure[i - 1]
+        while k and sequence[i] != sequence[k]:
+            k = failure[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        failure[i] = k
+    return failure[-1]
+
+
+def fuzzy_overlap(tail: Sequence[int], head: Sequence[int], tolerance: float = DEFAULT_TOLERANCE) -> int:
+    """
+    Number of head tokens that align with a suffix of tail within tolerance.
+
+    Semi-global edit distance: the alignment may start anywhere in tail but
+    must run to its end, and must start at the beginning of head. Returns
+    the longest head prefix whose cost is at most tolerance per token, with
+    at least one edit allowed: the short overlaps of a chunk boundary are
+    exactly where ASR hears the cut edge words differently. The alignment
+    must contain MIN_FUZZY_MATCHES exact matches and end with the last tail
+    token paired to the last head token, so a real word after a repeated
+    edge word is never taken for an insertion and dropped.
+    """
+    m, n = len(tail), len(head)
+    if not m or not n:
+        return 0
+    # previous[j]: (cost, matches) aligning some suffix of tail[:i] with head[:j]
+    previous = [(j, 0) for j in range(n + 1)]
+    for i in range(1, m):
+        current = [(0, 0)]  # a suffix may start after any tail token
+        a = tail[i - 1]
+        for j in range(1, n + 1):
+            same = a == head[j - 1]
+            current.append(min(
+                (previous[j - 1][0] + (not same), previous[j - 1][1] + same),
+                (previous[j][0] + 1, previous[j][1]),
+                (current[j - 1][0] + 1, current[j - 1][1]),
+                key=lambda cell: (cell[0], -cell[1]),
+            ))
+        previous = current
+
+    best = 0
+    last = tail[-1]
+    for j in range(1, n + 1):
+        same = last == head[j - 1]
+        cost = previous[j - 1][0] + (not same)
+        matches = previous[j - 1][1] + same
+        if matches >= MIN_FUZZY_MATCHES and cost <= max(1, math.floor(j * tolerance)):
+            best = j
+    return best
+
+
+class TranscriptAligner:
+    """Merge chunk transcripts by aligning each chunk's head to the previous tail"""
+
+    def __init__(self, max_window: int = DEFAULT_MAX_WINDOW, tolerance: float = DEFAULT_TOLERANCE):
+        self.max_window = max_window
+        self.tolerance = tolerance
+        self.vocabulary = TokenVocabulary()
+
+    def window(self, previous_words: int, previous_duration: Optional[float],
+               overlap_seconds: Optional[float]) -> int:
+        """Tokens to compare, from the overlap length and the previous chunk's speaking rate"""
+        if overlap_seconds is None or not previous_duration:
+            return self.max_window
+        if overlap_seconds <= 0:
+            return 0
+        words_per_second = previous_words / previous_duration
+        return min(self.max_window, math.ceil(overlap_seconds * words_per_second * 1.5) + 2)
+
+    def overlap(self, previous_words: Sequence[str], words: Sequence[str],
+                previous_duration: Optional[float] = None, overlap_seconds: Optional[float] = None) -> int:
+        """Number of leading words of `words` that repeat the end of `previous_words`"""
+        size = self.window(len(previous_words), previous_duration, overlap_seconds)
+        if not size:
+            return 0
+        tail = self.vocabulary.encode(previous_words[-size:])
+        head = self.vocabulary.encode(words[:size])
+        matched = exact_overlap(tail, head)
+        if matched < MIN_FUZZY_MATCHES:
+            matched = max(matched, fuzzy_overlap(tail, head, self.tolerance))
+        return matched
+
+    def trim(self, previous_text: str, text: str, previous_duration: Optional[float] = None,
+             overlap_seconds: Optional[float] = None) -> str:
+        """Drop the words at the start of text that repeat the end of previous_text"""
+        words = text.split()
+        dropped = self.overlap(previous_text.split(), words, previous_duration, overlap_seconds)
+        return " ".join(words[dropped:])
+
+    def merge(self, chunks: Sequence) -> str:
+        """
+        Merge the text of consecutive chunks (objects with text, start_time, end_time).
+
+        Only the previous non-empty chunk is compared, never the accumulated
+        transcript, so the cost per boundary stays constant.
+        """
+        return " ".join(word for words in self.merge_words(chunks) for word in words)
+
+    def merge_words(self, chunks: Sequence) -> List[List[str]]:
+        """The words each chunk adds to the merged transcript, one list per chunk"""
+        merged: List[List[str]] = []
+        previous = None
+        previous_words: List[str] = []
+        for chunk in chunks:
+            words = chunk.text.split()
+            if not words:
+                merged.append([])
+                continue
+            dropped = 0
+            if previous is not None:
+                dropped = self.overlap(
+                    previous_words, words,
+                    previous_duration=previous.end_time - previous.start_time,
+                    overlap_seconds=previous.end_time - chunk.start_time,
+                )
+            merged.append(words[dropped:])
+            previous = chunk
+            previous_words = words
+        return merged
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Audio - In-process PCM decoding and WAV encoding for the S2S pipeline
+
+The input recording is decoded once to 16 kHz mono 16-bit PCM. A WAV file
+that is already in that format is memory-mapped directly; other PCM WAVs are
+downmixed and resampled with numpy, and anything else (mp3, webm, ...) goes
+through a single ffmpeg decode piped into memory. Chunks are numpy slices
+of that buffer (no copies, no temp files) and are wrapped in a WAV header
+only when they are uploaded.
+
+Translated TTS chunks are joined by concatenate_wav: each WAV header is
+parsed, every chunk is converted to the first chunk's sample rate and
+channel layout, the seams get a short crossfade and the output is written
+once. Run this module directly to benchmark it against ffmpeg concat.
+"""
+
+import argparse
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+_PCM_FORMAT = 1
+_EXTENSIBLE_FORMAT = 0xFFFE
+
+
+class WavInfo(NamedTuple):
+    """Format and location of the sample data in a WAV file"""
+    sample_rate: int
+    channels: int
+    sample_width: int
+    data_offset: int
+    data_size: int
+
+
+def parse_wav_header(header: bytes) -> WavInfo:
+    """
+    Locate the fmt and data chunks of a RIFF/WAVE file.
+
+    Args:
+        header (bytes): The start of the file (at least up to the data chunk header)
+
+    Returns:
+        WavInfo: Format and data offset/size
+
+    Raises:
+        ValueError: If the bytes are not a PCM WAV file
+    """
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size = struct.unpack_from('<I', header, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            audio_format, channels, sample_rate = struct.unpack_from('<HHI', header, body)
+            sample_width = struct.unpack_from('<H', header, body + 14)[0] // 8
+            if audio_format not in (_PCM_FORMAT, _EXTENSIBLE_FORMAT):
+                raise ValueError(f"Unsupported WAV encoding {audio_format}")
+            fmt = (sample_rate, channels, sample_width)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streamed WAVs may carry a 0 or 0xFFFFFFFF placeholder size
+            return WavInfo(*fmt, data_offset=body, data_size=chunk_size)
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV data chunk not found")
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Linearly resample samples shaped (frames,) or (frames, channels)"""
+    if source_rate == target_rate or len(samples) < 2:
+        return samples
+    count = int(round(len(samples) * target_rate / source_rate))
+    positions = np.linspace(0, len(samples) - 1, num=count, dtype=np.float64)
+    index = np.arange(len(samples))
+    if samples.ndim == 1:
+        return np.interp(positions, index, samples)
+    return np.stack([np.interp(positions, index, samples[:, c]) for c in range(samples.shape[1])], axis=1)
+
+
+def to_mono_16k(samples: np.ndarray, sample_rate: int, channels: int) -> np.ndarray:
+    """Downmix interleaved int16 samples and linearly resample to SAMPLE_RATE"""
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    samples = resample(samples, sample_rate, SAMPLE_RATE)
+    if samples.dtype != np.int16:
+        samples = np.clip(np.round(samples), -32768, 32767).astype(np.int16)
+    return samples
+
+
+def _decode_with_ffmpeg(path: str) -> np.ndarray:
+    """Decode any container ffmpeg understands to 16 kHz mono PCM in memory"""
+    cmd = [
+        'ffmpeg', '-v', 'error', '-i', path, '-f', 's16le', '-acodec', 'pcm_s16le',
+        '-ar', str(SAMPLE_RATE), '-ac', '1', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {path}: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype='<i2')
+
+
+def load_pcm(path: str) -> np.ndarray:
+    """
+    Decode an audio file once to 16 kHz mono int16 samples.
+
+    A 16 kHz mono 16-bit WAV is returned as a read-only memory map of the
+    file, so slicing it costs nothing until the samples are read.
+
+    Args:
+        path (str): Input audio file
+
+    Returns:
+        np.ndarray: 16 kHz mono int16 samples
+    """
+    with open(path, 'rb') as audio_file:
+        header = audio_file.read(4096)
+        audio_file.seek(0, 2)
+        file_size = audio_file.tell()
+
+    try:
+        info = parse_wav_header(header)
+    except (ValueError, struct.error):
+        return _decode_with_ffmpeg(path)
+
+    if info.sample_width != 2:
+        return _decode_with_ffmpeg(path)
+
+    available = file_size - info.data_offset
+    data_size = info.data_size if 0 < info.data_size <= available else available
+    count = data_size // 2
+    if count == 0:
+        return np.zeros(0, dtype=np.int16)
+
+    samples = np.memmap(path, dtype='<i2', mode='r', offset=info.data_offset, shape=(count,))
+    if info.channels == 1 and info.sample_rate == SAMPLE_RATE:
+        return samples
+    return to_mono_16k(samples, info.sample_rate, info.channels)
+
+
+def wav_duration(path: str) -> Optional[float]:
+    """Duration of a WAV file in seconds from its header alone; None for other formats"""
+    with open(path, 'rb') as audio_file:
+        header = audio_file.read(4096)
+        audio_file.seek(0, 2)
+        file_size = audio_file.tell()
+    try:
+        info = parse_wav_header(header)
+    except (ValueError, struct.error):
+        return None
+    available = file_size - info.data_offset
+    data_size = info.data_size if 0 < info.data_size <= available else available
+    frame_size = info.channels * info.sample_width
+    if not frame_size or not info.sample_rate:
+        return None
+    return data_size / frame_size / info.sample_rate
+
+
+def wav_header(data_size: int, sample_rate: int = SAMPLE_RATE, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Canonical 44-byte PCM WAV header"""
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, _PCM_FORMAT, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b'data', data_size
+    )
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Wrap int16 samples, shaped (frames,) or (frames, channels), in a WAV container"""
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    pcm = memoryview(np.ascontiguousarray(samples, dtype='<i2')).cast('B')
+    return wav_header(len(pcm), sample_rate, channels) + pcm
+
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decode PCM WAV bytes (8/16/24/32-bit) to float32 samples.
+
+    Returns:
+        Tuple[np.ndarray, int]: Samples shaped (frames, channels) in [-1, 1]
+            and the sample rate
+    """
+    info = parse_wav_header(data[:4096] if len(data) > 4096 else data)
+    available = len(data) - info.data_offset
+    size = info.data_size if 0 < info.data_size <= available else available
+    width = info.sample_width
+    size -= size % (width * info.channels)
+    raw = np.frombuffer(data, dtype=np.uint8, count=size, offset=info.data_offset)
+
+    if width == 1:
+        samples = (raw.astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = raw.view('<i2').astype(np.float32) / 32768.0
+    elif width == 3:
+        triplets = raw.reshape(-1, 3).astype(np.int32)
+        values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        samples = values.astype(np.float32) / float(1 << 23)
+    elif width == 4:
+        samples = raw.view('<i4').astype(np.float32) / float(1 << 31)
+    else:
+        raise ValueError(f"Unsupported WAV sample width {width}")
+
+    return samples.reshape(-1, info.channels), info.sample_rate
+
+
+def _match_channels(samples: np.ndarray, channels: int) -> np.ndarray:
+    if samples.shape[1] == channels:
+        return samples
+    mono = samples.mean(axis=1, keepdims=True)
+    return np.repeat(mono, channels, axis=1)
+
+
+def concatenate_wav(chunks: List[bytes], crossfade_ms: float = 10.0) -> bytes:
+    """
+    Join WAV chunks into one 16-bit WAV with short crossfades at the seams.
+
+    Every chunk is converted to the sample rate and channel count of the
+    first chunk, so TTS responses with differing formats do not click or
+    play at the wrong speed.
+
+    Args:
+        chunks (List[bytes]): WAV files in playback order
+        crossfade_ms (float): Crossfade length at each seam
+
+    Returns:
+        bytes: The combined WAV file
+    """
+    if not chunks:
+        raise ValueError("No audio chunks to concatenate")
+
+    decoded = [decode_wav(chunk) for chunk in chunks]
+    sample_rate = decoded[0][1]
+    channels = decoded[0][0].shape[1]
+    parts = [_match_channels(resample(samples, rate, sample_rate), channels) for samples, rate in decoded]
+
+    fade = int(sample_rate * crossfade_ms / 1000)
+    overlaps = [min(fade, len(previous) // 2, len(current) // 2) for previous, current in zip(parts, parts[1:])]
+    output = np.zeros((sum(len(part) for part in parts) - sum(overlaps), channels), dtype=np.float32)
+
+    position = 0
+    for i, part in enumerate(parts):
+        overlap = overlaps[i - 1] if i else 0
+        start = position - overlap
+        if overlap:
+            # Linear crossfade: the tail already in output fades out as this part fades in
+            ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)[:, None]
+            output[start:position] *= 1.0 - ramp
+            output[start:position] += part[:overlap] * ramp
+        output[position:start + len(part)] = part[overlap:]
+        position = start + len(part)
+
+    pcm = np.clip(np.round(output * 32767.0), -32768, 32767).astype(np.int16)
+    return encode_wav(pcm if channels > 1 else pcm[:, 0], sample_rate)
+
+
+def speech_segments(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, min_seconds: float = 2.0,
+                    max_seconds: float = 15.0, pause_ms: int = 300, pad_ms: int = 150,
+                    frame_ms: int = 20, min_rms: float = 200.0, noise_ratio: float = 2.5) -> List[Tuple[int, int]]:
+    """
+    Find speech chunks with an energy VAD and cut them at pauses.
+
+    Frames are classified in one vectorized pass (RMS against the larger of
+    min_rms and noise_ratio x the 10th-percentile frame energy). Speech runs
+    separated by less than pause_ms are joined; runs are then packed into
+    chunks of at most max_seconds, preferring to cut at pauses once a chunk
+    has min_seconds of audio. A single run longer than max_seconds is cut
+    at its quietest frame. Non-speech between chunks is skipped.
+
+    Returns:
+        List[Tuple[int, int]]: (start_sample, end_sample) of each chunk
+    """
+    frame = sample_rate * frame_ms // 1000
+    count = len(samples) // frame
+    if not count:
+        return []
+
+    frames = np.asarray(samples[:count * frame], dtype=np.float32).reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    threshold = max(min_rms, float(np.percentile(rms, 10)) * noise_ratio)
+    speech = rms >= threshold
+    if not speech.any():
+        return []
+
+    # Speech runs as [start, end) frame indices
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Join runs separated by short pauses
+    pause_frames = max(1, pause_ms // frame_ms)
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= pause_frames))
+    starts = starts[keep]
+    ends = np.concatenate((ends[np.flatnonzero(keep)[1:] - 1], ends[-1:]))
+
+    min_frames = int(min_seconds * 1000 / frame_ms)
+    max_frames = int(max_seconds * 1000 / frame_ms)
+    pad = pad_ms // frame_ms
+
+    chunks = []
+    chunk_start = None
+    chunk_end = None
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        # Split runs that alone exceed max_frames at their quietest frame
+        while end - start > max_frames:
+            if chunk_start is not None:
+                chunks.append((chunk_start, chunk_end))
+                chunk_start = None
+            low = start + max(1, min(min_frames, max_frames - 1))
+            window = rms[low:start + max_frames]
+            # Latest quietest frame, so steady speech is cut near max_seconds
+            cut = start + max_frames - 1 - int(np.argmin(window[::-1]))
+            chunks.append((start, cut))
+            start = cut
+        if chunk_start is None:
+            chunk_start, chunk_end = start, end
+        elif end - chunk_start <= max_frames and chunk_end - chunk_start < min_frames:
+            chunk_end = end
+        else:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start, chunk_end = start, end
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+
+    return [(max(0, start - pad) * frame, min(count, end + pad) * frame) for start, end in chunks]
+
+
+def _benchmark_chunks(count: int) -> List[bytes]:
+    """Synthetic TTS-like chunks (~2 s each) with mixed formats"""
+    formats = [(22050, 1), (16000, 1), (24000, 1), (22050, 2)]
+    chunks = []
+    for i in range(count):
+        rate, channels = formats[i % len(formats)]
+        t = np.arange(int(rate * 2.0)) / rate
+        tone = (np.sin(2 * np.pi * (220 + 20 * i) * t) * 8000).astype(np.int16)
+        chunks.append(encode_wav(np.repeat(tone[:, None], channels, axis=1) if channels > 1 else tone, rate))
+    return chunks
+
+
+def _ffmpeg_concat(chunks: List[bytes], output_file: str):
+    """The previous path: temp files, a concat list and an ffmpeg process"""
+    work_dir = tempfile.mkdtemp()
+    try:
+        list_path = os.path.join(work_dir, 'list.txt')
+        with open(list_path, 'w') as list_file:
+            for i, chunk in enumerate(chunks):
+                path = os.path.join(work_dir, f'{i}.wav')
+                with open(path, 'wb') as chunk_file:
+                    chunk_file.write(chunk)
+                list_file.write(f"file '{path}'\n")
+        cmd = ['ffmpeg', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', '-y', output_file]
+        subprocess.run(cmd, capture_output=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark in-process WAV concatenation against ffmpeg concat')
+    parser.add_argument('--chunks', type=int, nargs='+', default=[10, 50, 100, 200], help='Chunk counts to test')
+    parser.add_argument('--runs', type=int, default=3, help='Number of timed runs (default: 3)')
+
+    args = parser.parse_args()
+    have_ffmpeg = shutil.which('ffmpeg') is not None
+    if not have_ffmpeg:
+        print("ffmpeg not found; timing the in-process path only")
+
+    for count in args.chunks:
+        chunks = _benchmark_chunks(count)
+        output_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False).name
+        try:
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                combined = concatenate_wav(chunks)
+                with open(output_file, 'wb') as out:
+                    out.write(combined)
+                timings.append(time.perf_counter() - start)
+            line = f"{count:4d} chunks: in-process {min(timings) * 1000:8.1f} ms"
+
+            if have_ffmpeg:
+                timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    _ffmpeg_concat(chunks, output_file)
+                    timings.append(time.perf_counter() - start)
+                line += f" | ffmpeg concat {min(timings) * 1000:8.1f} ms"
+            print(line)
+        finally:
+            os.unlink(output_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
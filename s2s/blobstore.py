@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Blob Store - Content-addressed audio storage for the S2S server
+
+Uploads and translated outputs are stored once under their SHA-256, so the
+same clip uploaded twice (or the same translation produced twice) takes the
+space of one. Writes are streamed to a temp file while being hashed, then
+renamed into place. Blobs expire after a TTL since their last access, and
+the least recently used ones are evicted whenever the total size exceeds the
+configured limit. Blobs in use by a running request are pinned and are never
+evicted under it.
+
+    <root>/<digest[:2]>/<digest>      blob data
+    <root>/tmp/                       in-progress writes
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, NamedTuple, Optional
+
+BLOCK_SIZE = 64 * 1024
+
+DEFAULT_ROOT = '/tmp/s2s_store'
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+class Blob(NamedTuple):
+    """A stored blob"""
+    digest: str
+    size: int
+    path: str
+    mimetype: str
+
+
+class AudioStore:
+    """Content-addressed blobs with TTL and total-size LRU eviction"""
+
+    def __init__(self, root: str = DEFAULT_ROOT, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.temp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        # digest -> [size, last_access, mimetype], least recently used first
+        self._index: "OrderedDict[str, list]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.bytes_stored = 0
+        self.counters = {
+            "writes": 0, "bytes_written": 0, "dedup_hits": 0,
+            "hits": 0, "misses": 0, "evicted": 0, "bytes_evicted": 0, "expired": 0,
+        }
+        self._load_index()
+
+    @classmethod
+    def from_env(cls) -> "AudioStore":
+        return cls(
+            root=os.getenv('S2S_STORE_DIR', DEFAULT_ROOT),
+            max_bytes=int(os.getenv('S2S_STORE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            ttl_seconds=float(os.getenv('S2S_STORE_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+        )
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _load_index(self):
+        """Rebuild the index from disk (mtime is the last access) after a restart"""
+        entries = []
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if prefix == 'tmp' or not os.path.isdir(directory):
+                continue
+            for digest in os.listdir(directory):
+                stat = os.stat(os.path.join(directory, digest))
+                entries.append((stat.st_mtime, digest, stat.st_size))
+        for mtime, digest, size in sorted(entries):
+            self._index[digest] = [size, mtime, 'audio/wav']
+            self.bytes_stored += size
+        # Leftovers from writes interrupted by a crash
+        for name in os.listdir(self.temp_dir):
+            os.remove(os.path.join(self.temp_dir, name))
+        with self._lock:
+            self._evict()
+
+    def put_stream(self, stream: BinaryIO, mimetype: str = 'audio/wav') -> Blob:
+        """Store a stream, hashing it block by block while it is written"""
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        try:
+            with os.fdopen(handle, 'wb') as out:
+                for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                    digest.update(block)
+                    out.write(block)
+                    size += len(block)
+            return self._commit(temp_path, digest.hexdigest(), size, mimetype)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def put_bytes(self, data: bytes, mimetype: str = 'audio/wav') -> Blob:
+        """Store an in-memory blob with a single write"""
+        handle, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        try:
+            with os.fdopen(handle, 'wb') as out:
+                out.write(data)
+            return self._commit(temp_path, hashlib.sha256(data).hexdigest(), len(data), mimetype)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def put_file(self, path: str, mimetype: str = 'audio/wav') -> Blob:
+        """Move an existing file into the store (renamed, not copied, on the same filesystem)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+                digest.update(block)
+        handle, temp_path = tempfile.mkstemp(dir=self.temp_dir)
+        os.close(handle)
+        try:
+            shutil.move(path, temp_path)
+            return self._commit(temp_path, digest.hexdigest(), os.path.getsize(temp_path), mimetype)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _commit(self, temp_path: str, digest: str, size: int, mimetype: str) -> Blob:
+        path = self._blob_path(digest)
+        with self._lock:
+            entry = self._index.get(digest)
+            if entry is not None and os.path.exists(path):
+                # Identical content is already stored: keep one copy
+                self.counters["dedup_hits"] += 1
+                entry[1] = time.time()
+                self._index.move_to_end(digest)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                self._index[digest] = [size, time.time(), mimetype]
+                self.bytes_stored += size
+                self.counters["writes"] += 1
+                self.counters["bytes_written"] += size
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+            try:
+                self._evict()
+            finally:
+                self._unpin(digest)
+            return Blob(digest, size, path, self._index[digest][2])
+
+    def get(self, digest: str) -> Optional[Blob]:
+        """Look up a blob and mark it used; None if unknown or expired"""
+        with self._lock:
+            entry = self._index.get(digest)
+            now = time.time()
+            if entry is None or now - entry[1] > self.ttl_seconds:
+                self.counters["misses"] += 1
+                if entry is not None and not self._pins.get(digest):
+                    self._remove(digest, "expired")
+                return None
+            entry[1] = now
+            self._index.move_to_end(digest)
+            self.counters["hits"] += 1
+            return Blob(digest, entry[0], self._blob_path(digest), entry[2])
+
+    @contextmanager
+    def pinned(self, digest: str):
+        """Keep a blob from being evicted while a request reads it"""
+        with self._lock:
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._unpin(digest)
+
+    def _unpin(self, digest: str):
+        count = self._pins.get(digest, 0) - 1
+        if count > 0:
+            self._pins[digest] = count
+        else:
+            self._pins.pop(digest, None)
+
+    def _remove(self, digest: str, reason: str):
+        size = self._index.pop(digest)[0]
+        self.bytes_stored -= size
+        self.counters[reason] += 1
+        self.counters["bytes_evicted"] += size
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop expired blobs, then least recently used ones over max_bytes (lock held)"""
+        now = time.time()
+        for digest, entry in list(self._index.items()):
+            if now - entry[1] > self.ttl_seconds and not self._pins.get(digest):
+                self._remove(digest, "expired")
+        for digest in list(self._index):
+            if self.bytes_stored <= self.max_bytes:
+                break
+            if not self._pins.get(digest):
+                self._remove(digest, "evicted")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._evict()
+            return {
+                "blobs": len(self._index),
+                "bytes_stored": self.bytes_stored,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "pinned": len(self._pins),
+                **self.counters,
+            }
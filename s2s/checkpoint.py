@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Checkpoint - Per-chunk stage results for resumable S2S runs
+
+A run directory is keyed by the SHA-256 of the input audio, the chunking
+configuration and the language pair, so the same recording translated the
+same way always maps to the same directory. Every completed ASR chunk,
+translation and TTS clip is written there atomically as soon as it exists:
+
+    <root>/<digest>_<source>_<dest>/
+        asr/<chunk_id>.json      recognized text of one audio chunk
+        mt/<text digest>.json    translation of one piece of merged text
+        tts/<text digest>.wav    synthesized audio of one translated piece
+
+Translations and clips are keyed by the digest of their input text, so they
+are reused only when the text they were made from is unchanged. Pieces are
+cut near ASR chunk boundaries (see s2s.translation_pieces), so a chunk that
+is filled in on resume only invalidates the pieces around it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Dict, Optional
+
+DEFAULT_CHECKPOINT_ROOT = os.getenv('S2S_CHECKPOINT_DIR', '/tmp/s2s_runs')
+
+STAGES = ("asr", "mt", "tts")
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]
+
+
+class RunCheckpoint:
+    """Stage results of one (input, config, language pair) run on disk"""
+
+    def __init__(self, input_file: str, source_lang: str, dest_lang: str, config: Dict,
+                 root: str = DEFAULT_CHECKPOINT_ROOT, resume: bool = True):
+        digest = hashlib.sha256()
+        digest.update(file_digest(input_file).encode())
+        digest.update(json.dumps(config, sort_keys=True).encode())
+        self.run_id = f"{digest.hexdigest()[:16]}_{source_lang}_{dest_lang}"
+        self.path = os.path.join(root, self.run_id)
+        self.resume = resume
+        self.stats = {stage: {"reused": 0, "computed": 0} for stage in STAGES}
+        self._lock = threading.Lock()
+
+        if not resume and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        for stage in STAGES:
+            os.makedirs(os.path.join(self.path, stage), exist_ok=True)
+
+    def _count(self, stage: str, reused: bool):
+        with self._lock:
+            self.stats[stage]["reused" if reused else "computed"] += 1
+
+    def _write(self, path: str, data: bytes):
+        # Write-then-rename so an interrupted run never leaves a partial result
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as out:
+            out.write(data)
+        os.replace(temp_path, path)
+
+    def _json_path(self, stage: str, key) -> str:
+        return os.path.join(self.path, stage, f"{key}.json")
+
+    def load_text(self, stage: str, key) -> Optional[str]:
+        """A saved text result, or None (counts as reused when found)"""
+        path = self._json_path(stage, key)
+        if not self.resume or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as saved:
+                text = json.load(saved)["text"]
+        except (ValueError, KeyError, OSError):
+            return None
+        self._count(stage, reused=True)
+        return text
+
+    def save_text(self, stage: str, key, text: str, **metadata):
+        record = {"text": text, **metadata}
+        self._write(self._json_path(stage, key), json.dumps(record, ensure_ascii=False).encode('utf-8'))
+        self._count(stage, reused=False)
+
+    def load_audio(self, text: str) -> Optional[bytes]:
+        """A saved TTS clip for this translated text, or None"""
+        path = os.path.join(self.path, "tts", f"{text_key(text)}.wav")
+        if not self.resume or not os.path.exists(path):
+            return None
+        with open(path, 'rb') as saved:
+            audio = saved.read()
+        self._count("tts", reused=True)
+        return audio
+
+    def save_audio(self, text: str, audio: bytes):
+        self._write(os.path.join(self.path, "tts", f"{text_key(text)}.wav"), audio)
+        self._count("tts", reused=False)
+
+    def summary(self) -> str:
+        parts = []
+        for stage in STAGES:
+            counts = self.stats[stage]
+            total = counts["reused"] + counts["computed"]
+            parts.append(f"{stage.upper()} {counts['reused']}/{total}")
+        return "reused " + ", ".join(parts)
+
+    def remove(self):
+        """Delete the run directory once the output is written"""
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Profiler - Per-stage timing and real-time factor for S2S runs
+
+Every stage of a run (decode, ASR, MT, TTS, merge, concatenation, write, or
+the single gateway call in simple mode) records its wall time, bytes in and
+out, and the chunk it worked on. The report gives totals per stage and per
+chunk and the real-time factor: processing seconds per second of input audio
+(below 1.0 is faster than real time). Stage totals add up concurrent calls,
+so with a worker pool they can exceed the run's wall time. Wall time ends
+when the run calls finish(), so a report built later is not inflated.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class Measurement:
+    """Bytes in/out of one measured call, filled in by the caller"""
+
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class StageProfiler:
+    """Thread-safe per-stage and per-chunk counters for one run"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.stages: Dict[str, Dict] = {}
+        self.chunks: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, bytes_in: int = 0, bytes_out: int = 0,
+               chunk: Optional[int] = None):
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0, "bytes_in": 0, "bytes_out": 0})
+            totals["seconds"] += seconds
+            totals["calls"] += 1
+            totals["bytes_in"] += bytes_in
+            totals["bytes_out"] += bytes_out
+            if chunk is not None:
+                per_chunk = self.chunks.setdefault(chunk, {})
+                per_chunk[stage] = per_chunk.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage: str, chunk: Optional[int] = None):
+        """Time a with-block; set bytes_in/bytes_out on the yielded Measurement"""
+        measurement = Measurement()
+        started = time.monotonic()
+        try:
+            yield measurement
+        finally:
+            self.record(stage, time.monotonic() - started, measurement.bytes_in, measurement.bytes_out, chunk)
+
+    def finish(self):
+        """Mark the end of the run (a later step of the same run may move it)"""
+        self.finished = time.monotonic()
+
+    def report(self, audio_seconds: Optional[float] = None) -> Dict:
+        """Totals per stage and per chunk, with real-time factors when the audio length is known"""
+        wall_seconds = (self.finished or time.monotonic()) - self.started
+        with self._lock:
+            stages = {}
+            for stage, totals in self.stages.items():
+                stages[stage] = {
+                    "seconds": round(totals["seconds"], 4),
+                    "calls": totals["calls"],
+                    "bytes_in": totals["bytes_in"],
+                    "bytes_out": totals["bytes_out"],
+                    "rtf": round(totals["seconds"] / audio_seconds, 4) if audio_seconds else None,
+                }
+            chunks = {
+                str(chunk): {stage: round(seconds, 4) for stage, seconds in per_chunk.items()}
+                for chunk, per_chunk in sorted(self.chunks.items())
+            }
+        return {
+            "audio_seconds": round(audio_seconds, 3) if audio_seconds else None,
+            "wall_seconds": round(wall_seconds, 4),
+            "rtf": round(wall_seconds / audio_seconds, 4) if audio_seconds else None,
+            "stages": stages,
+            "chunks": chunks,
+        }
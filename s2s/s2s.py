@@ -6,46 +6,125 @@ Uses API server endpoints instead of direct API calls
 """
 
 import argparse
+import base64
+import json
 import os
+import queue
 import sys
-import tempfile
-import subprocess
-import shutil
-from typing import List, Tuple, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+# text_segmenter is shared with the API gateway and lives at the repository root
+# (the Docker image copies it next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alignment import TranscriptAligner
+from audio import SAMPLE_RATE, concatenate_wav, encode_wav, load_pcm, speech_segments, wav_duration
+from checkpoint import DEFAULT_CHECKPOINT_ROOT, RunCheckpoint, text_key
+from profiler import StageProfiler
+from text_segmenter import DEFAULT_MAX_CHARS, segment_text, split_sentences
+
 # Load environment variables
 load_dotenv()
 
 # Get the API server base URL from environment variables
 API_SERVER_BASE_URL = os.getenv('API_SERVER_BASE_URL', 'http://localhost:8000')
 
+def create_session(pool_size: int) -> requests.Session:
+    """A requests session with a connection pool of the given size"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def translation_pieces(chunk_words: List[List[str]]) -> List[str]:
+    """
+    Cut a merged transcript (the words each ASR chunk added) into MT/TTS pieces.
+    
+    There is one cut per chunk boundary, moved forward to the first sentence
+    end among the next chunk's words, or left at the boundary (a pause) when
+    that chunk has no sentence end. A cut depends only on the chunk after its
+    boundary, so a chunk filled in by a resumed run changes only the pieces
+    around it and every other piece keeps its checkpointed MT and TTS result.
+    """
+    words = [word for chunk in chunk_words for word in chunk]
+    sentence_ends = set()
+    position = 0
+    for sentence in split_sentences(" ".join(words)):
+        position += len(sentence.split())
+        sentence_ends.add(position)
+    
+    cuts = [0]
+    boundary = 0
+    for current, following in zip(chunk_words, chunk_words[1:]):
+        boundary += len(current)
+        ends = [end for end in range(boundary, boundary + len(following)) if end in sentence_ends]
+        cuts.append(ends[0] if ends else boundary)
+    cuts.append(len(words))
+    
+    pieces = []
+    for start, end in zip(cuts, cuts[1:]):
+        if end > start:
+            # Rarely needed: a piece over the gateway segment size is split on sentences
+            pieces.extend(segment.text for segment in segment_text(" ".join(words[start:end]), DEFAULT_MAX_CHARS))
+    return pieces
+
 class AudioChunk:
     """Represents an audio chunk with metadata"""
-    def __init__(self, file_path: str, start_time: float, end_time: float, chunk_id: int):
-        self.file_path = file_path
+    def __init__(self, samples: np.ndarray, start_time: float, end_time: float, chunk_id: int,
+                 sample_rate: int = SAMPLE_RATE):
+        self.samples = samples  # view into the decoded input, not a copy
+        self.sample_rate = sample_rate
         self.start_time = start_time
         self.end_time = end_time
         self.chunk_id = chunk_id
         self.text = ""
         self.translated_text = ""
-        self.tts_audio_path = None
+    
+    def wav_bytes(self) -> bytes:
+        """Encode the chunk as WAV for upload"""
+        return encode_wav(self.samples, self.sample_rate)
 
 class S2SPipeline:
     """End-to-end Speech-to-Speech Pipeline"""
     
-    def __init__(self, source_lang: str, dest_lang: str, chunk_duration: int = 6, overlap: int = 0.1):
+    def __init__(self, source_lang: str, dest_lang: str, chunk_duration: int = 6, overlap: int = 0.1,
+                 max_workers: int = 4, vad: bool = False, min_chunk: float = 2.0, max_chunk: float = 15.0,
+                 session: Optional[requests.Session] = None, upstream_limit: Optional[threading.Semaphore] = None,
+                 validate: bool = True):
         self.source_lang = source_lang
         self.dest_lang = dest_lang
         self.chunk_duration = chunk_duration * 1000  # Convert to milliseconds
         self.overlap = overlap * 1000  # Convert to milliseconds
+        self.vad = vad  # cut chunks at pauses instead of fixed windows
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.max_workers = max(1, max_workers)
         self.chunks: List[AudioChunk] = []
         self.original_text = ""
         self.translated_text = ""
+        self.failures: List[Dict] = []
+        self.aligner = TranscriptAligner()
+        self.checkpoint: Optional[RunCheckpoint] = None
+        self.audio_seconds = 0.0
+        self.profiler = StageProfiler()
+        
+        # Pooled connections to the API server, sized for the stage worker pool.
+        # Batch runs pass one shared session and a semaphore capping upstream calls.
+        self.session = session or create_session(self.max_workers)
+        self.upstream_limit = upstream_limit
         
         # Validate language mappings
-        self._validate_languages()
+        if validate:
+            self._validate_languages()
         
     def _validate_languages(self):
         """Validate that required language mappings exist by checking API server health endpoint"""
@@ -64,27 +143,44 @@ class S2SPipeline:
         print(f"Available MT: {available_mt}")
         print(f"Available TTS: {available_tts}")
     
-    def get_audio_duration(self, audio_file_path: str) -> float:
-        """Get audio duration using ffprobe"""
-        cmd = [
-            'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1', audio_file_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return float(result.stdout.strip())
-
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """POST to the API server, holding an upstream slot when a limit is shared"""
+        with self.upstream_limit or nullcontext():
+            return self.session.post(url, **kwargs)
+    
+    def profile_report(self) -> Dict:
+        """Per-stage and per-chunk timings of the last run, with real-time factors"""
+        return self.profiler.report(self.audio_seconds)
+    
     def chunk_audio_with_overlap(self, audio_file_path: str) -> List[AudioChunk]:
         """
-        Chunk audio into overlapping segments using ffmpeg
+        Chunk audio into overlapping segments (views into one decoded buffer)
+        """
+        chunks = list(self.iter_audio_chunks(audio_file_path))
+        self.chunks = chunks
+        return chunks
+    
+    def iter_audio_chunks(self, audio_file_path: str) -> Iterator[AudioChunk]:
+        """
+        Yield overlapping audio chunks one at a time.
+        The input is decoded once; each chunk is a zero-copy slice of it.
         """
         print(f"Loading audio file: {audio_file_path}")
         
-        # Get audio duration
-        total_duration = self.get_audio_duration(audio_file_path)
+        with self.profiler.measure("decode") as measured:
+            samples = load_pcm(audio_file_path)
+            measured.bytes_in = os.path.getsize(audio_file_path)
+            measured.bytes_out = samples.nbytes
+        total_duration = len(samples) / SAMPLE_RATE
+        self.audio_seconds = total_duration
         print(f"Audio duration: {total_duration:.2f} seconds")
+        
+        if self.vad:
+            yield from self._iter_speech_chunks(samples, total_duration)
+            return
+        
         print(f"Chunking with {self.chunk_duration/1000}s duration and {self.overlap/1000}s overlap")
         
-        chunks = []
         chunk_id = 0
         current_pos = 0
         
@@ -92,32 +188,19 @@ class S2SPipeline:
             # Calculate chunk boundaries
             chunk_end = min(current_pos + self.chunk_duration, total_duration * 1000)
             
-            # Create temporary file for this chunk
-            temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_file.close()
-            
-            # Extract chunk using ffmpeg
-            start_seconds = current_pos / 1000.0
-            duration_seconds = (chunk_end - current_pos) / 1000.0
-            
-            cmd = [
-                'ffmpeg', '-i', audio_file_path, '-ss', str(start_seconds),
-                '-t', str(duration_seconds), '-acodec', 'pcm_s16le',
-                '-ar', '16000', '-ac', '1', '-y', temp_file.name
-            ]
-            
-            subprocess.run(cmd, capture_output=True)
+            # Slice the chunk out of the decoded samples
+            start_sample = int(current_pos * SAMPLE_RATE / 1000)
+            end_sample = int(chunk_end * SAMPLE_RATE / 1000)
             
             # Create AudioChunk object
             chunk = AudioChunk(
-                file_path=temp_file.name,
+                samples=samples[start_sample:end_sample],
                 start_time=current_pos / 1000.0,
                 end_time=chunk_end / 1000.0,
                 chunk_id=chunk_id
             )
-            chunks.append(chunk)
-            
             print(f"Created chunk {chunk_id}: {chunk.start_time:.2f}s - {chunk.end_time:.2f}s")
+            yield chunk
             
             # Move to next position with overlap
             current_pos = chunk_end - self.overlap
@@ -126,9 +209,56 @@ class S2SPipeline:
             # Break if we've reached the end
             if chunk_end >= total_duration * 1000:
                 break
+    
+    def _iter_speech_chunks(self, samples: np.ndarray, total_duration: float) -> Iterator[AudioChunk]:
+        """
+        Yield chunks cut at pauses by the VAD; silent spans are skipped.
+        Chunks do not overlap, so the overlap merge has nothing to remove.
+        """
+        print(f"Chunking at pauses ({self.min_chunk}s - {self.max_chunk}s per chunk)")
         
-        self.chunks = chunks
-        return chunks
+        segments = speech_segments(samples, SAMPLE_RATE, min_seconds=self.min_chunk, max_seconds=self.max_chunk)
+        speech_seconds = sum(end - start for start, end in segments) / SAMPLE_RATE
+        print(f"Found {len(segments)} speech chunks covering {speech_seconds:.2f}s of {total_duration:.2f}s")
+        
+        for chunk_id, (start_sample, end_sample) in enumerate(segments):
+            chunk = AudioChunk(
+                samples=samples[start_sample:end_sample],
+                start_time=start_sample / SAMPLE_RATE,
+                end_time=end_sample / SAMPLE_RATE,
+                chunk_id=chunk_id
+            )
+            print(f"Created chunk {chunk_id}: {chunk.start_time:.2f}s - {chunk.end_time:.2f}s")
+            yield chunk
+    
+    def _run_stage(self, stage: str, func: Callable, items: List, retries: int = 1) -> List:
+        """
+        Run func over items on a bounded worker pool.
+        Results come back in input order; an item that still fails after
+        `retries` extra attempts gets None and is recorded in self.failures,
+        without discarding the items that completed.
+        """
+        results = [None] * len(items)
+        errors = {i: None for i in range(len(items))}
+        
+        for attempt in range(retries + 1):
+            if not errors:
+                break
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(errors))) as executor:
+                futures = {executor.submit(func, items[i]): i for i in sorted(errors)}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                        del errors[i]
+                    except Exception as e:
+                        print(f"Warning: {stage} failed for item {i} (attempt {attempt + 1}): {e}")
+                        errors[i] = str(e)
+        
+        for i, error in sorted(errors.items()):
+            self.failures.append({"stage": stage, "index": i, "error": error})
+        
+        return results
     
     def process_asr(self, chunk: AudioChunk) -> str:
         """
@@ -138,280 +268,216 @@ class S2SPipeline:
         
         asr_api_url = f"{API_SERVER_BASE_URL}/asr"
         
-        with open(chunk.file_path, 'rb') as audio_file:
-            files = {
-                'audio_file': (f'chunk_{chunk.chunk_id}.wav', audio_file, 'audio/wav')
-            }
-            data = {
-                'Language': self.source_lang
-            }
-            
-            response = requests.post(asr_api_url, files=files, data=data, timeout=60)
-            asr_result = response.json()
-            
-            # Extract text from ASR response
-            if asr_result.get('status') == 'success' and 'data' in asr_result:
-                if 'recognized_text' in asr_result['data']:
-                    text = asr_result['data']['recognized_text']
-                else:
-                    text = ""
-            elif 'recognized_text' in asr_result:
-                text = asr_result['recognized_text']
-            else:
-                print(f"Warning: Unexpected ASR response format for chunk {chunk.chunk_id}")
-                print(f"Response: {asr_result}")
-                text = ""
-            
-            chunk.text = text
-            print(f"ASR result for chunk {chunk.chunk_id}: '{text}'")
-            
+        wav = chunk.wav_bytes()
+        files = {
+            'audio_file': (f'chunk_{chunk.chunk_id}.wav', wav, 'audio/wav')
+        }
+        data = {
+            'Language': self.source_lang
+        }
+        
+        with self.profiler.measure("asr", chunk.chunk_id) as measured:
+            response = self._post(asr_api_url, files=files, data=data, timeout=60)
+            measured.bytes_in = len(wav)
+            measured.bytes_out = len(response.content)
+        # Gateway errors (503 from admission control, 502 upstream) must fail the
+        # chunk so it is retried and never checkpointed as an empty transcript
+        response.raise_for_status()
+        asr_result = response.json()
+        
+        # Extract text from ASR response
+        if asr_result.get('status') == 'success' and 'recognized_text' in (asr_result.get('data') or {}):
+            text = asr_result['data']['recognized_text']
+        elif 'recognized_text' in asr_result:
+            text = asr_result['recognized_text']
+        else:
+            raise ValueError(f"Unexpected ASR response for chunk {chunk.chunk_id}: {asr_result}")
+        
+        chunk.text = text
+        print(f"ASR result for chunk {chunk.chunk_id}: '{text}'")
+        
         return text
     
-    def merge_overlapping_text(self, chunks: List[AudioChunk]) -> str:
+    def merge_overlapping_text(self, chunks: List[AudioChunk]) -> List[List[str]]:
         """
-        Merge text from overlapping chunks, removing duplicates
+        Merge text from overlapping chunks, removing duplicates.
+        Each chunk's head is aligned only against the previous chunk's tail
+        (see alignment.py), so merging is linear in transcript length.
+        Returns the words each chunk adds to the merged transcript.
         """
         print("Merging overlapping text from chunks")
         
-        if not chunks:
-            return ""
-        
-        if len(chunks) == 1:
-            return chunks[0].text
+        with self.profiler.measure("merge"):
+            chunk_words = self.aligner.merge_words(chunks)
         
-        merged_text = chunks[0].text
-        
-        for i in range(1, len(chunks)):
-            current_text = chunks[i].text
-            if not current_text:
-                continue
-            
-            # Find overlap between previous merged text and current chunk text
-            overlap_text = self._find_text_overlap(merged_text, current_text)
-            
-            if overlap_text:
-                # Remove overlap from current text and append the rest
-                overlap_pos = current_text.find(overlap_text)
-                if overlap_pos >= 0:
-                    remaining_text = current_text[overlap_pos + len(overlap_text):].strip()
-                    if remaining_text:
-                        merged_text += " " + remaining_text
-                else:
-                    merged_text += " " + current_text
-            else:
-                # No overlap found, just concatenate
-                merged_text += " " + current_text
-        
-        print(f"Merged text: '{merged_text}'")
-        return merged_text.strip()
+        print(f"Merged text: '{' '.join(word for words in chunk_words for word in words)}'")
+        return chunk_words
     
-    def _find_text_overlap(self, text1: str, text2: str) -> str:
+    def translate_text_chunks(self, chunk_words: List[List[str]]) -> List[str]:
         """
-        Find overlapping text between two strings
+        Translate the merged transcript in pieces cut on sentence boundaries
+        (same rules as the gateway's /mt segmenter) near each ASR chunk
+        boundary, so no sentence is split in half where punctuation allows it
+        and checkpointed pieces survive a resumed run (see translation_pieces)
         """
-        if not text1 or not text2:
-            return ""
+        text_chunks = translation_pieces(chunk_words)
+        if not text_chunks:
+            return []
         
-        # Split into words for better matching
-        words1 = text1.split()
-        words2 = text2.split()
+        print(f"Split text into {len(text_chunks)} chunks for translation")
         
-        # Look for the longest matching suffix of text1 with prefix of text2
-        max_overlap = ""
+        # Translate concurrently; results stay in text order, failed chunks become ""
+        translated_chunks = self._run_stage("mt", self._translate_with_checkpoint, text_chunks)
+        translated_chunks = [translated or "" for translated in translated_chunks]
         
-        for i in range(1, min(len(words1), len(words2)) + 1):
-            suffix = " ".join(words1[-i:])
-            prefix = " ".join(words2[:i])
-            
-            if suffix.lower() == prefix.lower():
-                max_overlap = suffix
+        for i, translated_text in enumerate(translated_chunks):
+            print(f"Translation result for chunk {i+1}: '{translated_text}'")
         
-        return max_overlap
+        return translated_chunks
+    
+    def _asr_with_checkpoint(self, chunk: AudioChunk) -> str:
+        """ASR for one chunk, reusing a checkpointed result when resuming"""
+        if self.checkpoint is not None:
+            text = self.checkpoint.load_text("asr", chunk.chunk_id)
+            if text is not None:
+                chunk.text = text
+                return text
+        text = self.process_asr(chunk)
+        # Empty text is not checkpointed, so --resume asks ASR again
+        if self.checkpoint is not None and text.strip():
+            self.checkpoint.save_text("asr", chunk.chunk_id, text,
+                                      start_time=chunk.start_time, end_time=chunk.end_time)
+        return text
+    
+    def _translate_with_checkpoint(self, text: str) -> str:
+        """MT for one piece of text, reusing a checkpointed result when resuming"""
+        if self.checkpoint is not None:
+            translated = self.checkpoint.load_text("mt", text_key(text))
+            if translated is not None:
+                return translated
+        translated = self.translate_text(text)
+        if self.checkpoint is not None and translated:
+            self.checkpoint.save_text("mt", text_key(text), translated, source=text)
+        return translated
     
-    def translate_text_chunks(self, text: str) -> List[str]:
+    def translate_text(self, text: str, chunk_id: Optional[int] = None) -> str:
         """
-        Translate text by chunking it into 50-word segments and translating each chunk
+        Translate one piece of text through the API server MT endpoint
+        (chunk_id attributes the call to an audio chunk in the profile)
         """
-        if not text.strip():
-            return []
-        
-        # Split text into 50-word chunks
-        words = text.split()
-        text_chunks = []
-        
-        for i in range(0, len(words), 50):
-            chunk = " ".join(words[i:i+50])
-            text_chunks.append(chunk)
-        
-        print(f"Split text into {len(text_chunks)} chunks for translation")
-        
-        translated_chunks = []
         mt_api_url = f"{API_SERVER_BASE_URL}/mt"
         
-        for i, chunk in enumerate(text_chunks):
-            print(f"Translating chunk {i+1}/{len(text_chunks)}: '{chunk}'")
-            
-            payload = {
-                "text": chunk,
-                "source": self.source_lang,
-                "dest": self.dest_lang
-            }
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(mt_api_url, json=payload, headers=headers, timeout=30)
-            mt_result = response.json()
-            
-            # Extract translated text
-            if mt_result.get('status') == 'success' and 'data' in mt_result:
-                if 'output_text' in mt_result['data']:
-                    translated_text = mt_result['data']['output_text']
-                else:
-                    translated_text = ""
-            elif 'output_text' in mt_result:
-                translated_text = mt_result['output_text']
-            else:
-                print(f"Warning: Unexpected MT response format for chunk {i+1}")
-                print(f"Response: {mt_result}")
-                translated_text = ""
-            
-            print(f"Translation result for chunk {i+1}: '{translated_text}'")
-            translated_chunks.append(translated_text)
+        payload = {
+            "text": text,
+            "source": self.source_lang,
+            "dest": self.dest_lang
+        }
+        headers = {
+            'Content-Type': 'application/json'
+        }
+        
+        with self.profiler.measure("mt", chunk_id) as measured:
+            response = self._post(mt_api_url, json=payload, headers=headers, timeout=30)
+            measured.bytes_in = len(text.encode('utf-8'))
+            measured.bytes_out = len(response.content)
+        response.raise_for_status()
+        mt_result = response.json()
+        
+        # Extract translated text
+        if mt_result.get('status') == 'success' and 'data' in mt_result:
+            if 'output_text' in mt_result['data']:
+                return mt_result['data']['output_text']
+            return ""
+        elif 'output_text' in mt_result:
+            return mt_result['output_text']
         
-        return translated_chunks
+        print(f"Warning: Unexpected MT response format")
+        print(f"Response: {mt_result}")
+        return ""
     
-    def generate_tts_from_translated_chunks(self, translated_chunks: List[str]) -> List[str]:
+    def synthesize_speech(self, text: str, chunk_id: Optional[int] = None) -> Optional[bytes]:
+        """
+        Synthesize one piece of text through the API server TTS endpoint
+        Returns WAV bytes, or None if no audio came back
+        """
+        tts_api_url = f"{API_SERVER_BASE_URL}/tts"
+        
+        payload = {
+            "text": text,
+            "Language": self.dest_lang,
+            "gender": "female"
+        }
+        headers = {
+            'Content-Type': 'application/json',
+            # Ask for the WAV body directly; older gateways answer with JSON + audio_base64
+            'Accept': 'audio/wav, application/json;q=0.5'
+        }
+        
+        with self.profiler.measure("tts", chunk_id) as measured:
+            response = self._post(tts_api_url, json=payload, headers=headers, timeout=30)
+            measured.bytes_in = len(text.encode('utf-8'))
+            measured.bytes_out = len(response.content)
+        response.raise_for_status()
+        if response.headers.get('Content-Type', '').startswith('audio/'):
+            return response.content
+        tts_result = response.json()
+        
+        data = tts_result.get('data') or {}
+        if data.get('audio_base64'):
+            return base64.b64decode(data['audio_base64'])
+        
+        print(f"Warning: No audio found in TTS response")
+        print(f"Response: {tts_result}")
+        return None
+    
+    def generate_tts_from_translated_chunks(self, translated_chunks: List[str]) -> List[bytes]:
         """
         Generate TTS audio directly from translated text chunks using API server
-        Returns list of temporary audio file paths
+        Returns WAV bytes per non-empty chunk, in chunk order
         """
         print(f"Generating TTS for {len(translated_chunks)} translated chunks")
         
-        tts_api_url = f"{API_SERVER_BASE_URL}/tts"
-        tts_file_paths = []
-        
         for i, text_chunk in enumerate(translated_chunks):
             if not text_chunk.strip():
                 print(f"Skipping empty chunk {i}")
-                continue
-            
-            print(f"Generating TTS for chunk {i+1}: '{text_chunk}'")
-            
-            payload = {
-                "text": text_chunk,
-                "Language": self.dest_lang,
-                "gender": "female"
-            }
-            
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(tts_api_url, json=payload, headers=headers, timeout=30)
-            tts_result = response.json()
-            
-            # Extract S3 URL from TTS response
-            s3_url = None
-            if tts_result.get('status') == 'success' and 'data' in tts_result:
-                if 's3_url' in tts_result['data']:
-                    s3_url = tts_result['data']['s3_url']
-            elif 's3_url' in tts_result:
-                s3_url = tts_result['s3_url']
-            
-            if s3_url:
-                # Download audio from S3 URL
-                audio_response = requests.get(s3_url, timeout=30)
-                
-                # Save to temporary file
-                temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                temp_file.write(audio_response.content)
-                temp_file.close()
-                
-                tts_file_paths.append(temp_file.name)
-                print(f"Generated TTS chunk {i+1}: saved to {temp_file.name}")
-            else:
-                print(f"Warning: No S3 URL found in TTS response for chunk {i}")
-                print(f"Response: {tts_result}")
         
-        return tts_file_paths
+        indexed_chunks = [(i, text_chunk) for i, text_chunk in enumerate(translated_chunks) if text_chunk.strip()]
+        
+        # Synthesize concurrently; audio stays in chunk order
+        audio_chunks = self._run_stage("tts", self._generate_tts_audio, indexed_chunks)
+        
+        return [audio for audio in audio_chunks if audio]
     
-    def _split_text_proportionally(self, text: str, original_chunks: List[AudioChunk]) -> List[str]:
+    def _generate_tts_audio(self, indexed_chunk: Tuple[int, str]) -> Optional[bytes]:
         """
-        Split translated text proportionally based on original chunk durations
+        Generate TTS for one translated chunk, reusing a checkpointed clip when resuming
         """
-        if not text.strip():
-            return ["" for _ in original_chunks]
-        
-        words = text.split()
-        if not words:
-            return ["" for _ in original_chunks]
-        
-        # Calculate proportions based on original chunk durations
-        total_duration = sum(len(chunk.audio_segment) for chunk in original_chunks)
-        proportions = [len(chunk.audio_segment) / total_duration for chunk in original_chunks]
-        
-        # Distribute words proportionally
-        text_chunks = []
-        word_index = 0
-        
-        for i, proportion in enumerate(proportions):
-            words_for_chunk = max(1, int(len(words) * proportion))
-            
-            # Don't exceed available words
-            words_for_chunk = min(words_for_chunk, len(words) - word_index)
-            
-            if word_index < len(words):
-                chunk_text = " ".join(words[word_index:word_index + words_for_chunk])
-                text_chunks.append(chunk_text)
-                word_index += words_for_chunk
-            else:
-                text_chunks.append("")
-        
-        # Distribute any remaining words to the last chunk
-        if word_index < len(words):
-            remaining_words = " ".join(words[word_index:])
-            if text_chunks:
-                text_chunks[-1] += " " + remaining_words
-        
-        return text_chunks
+        i, text_chunk = indexed_chunk
+        print(f"Generating TTS for chunk {i+1}: '{text_chunk}'")
+        
+        audio = self.checkpoint.load_audio(text_chunk) if self.checkpoint is not None else None
+        if audio is None:
+            audio = self.synthesize_speech(text_chunk)
+            if audio is None:
+                return None
+            if self.checkpoint is not None:
+                self.checkpoint.save_audio(text_chunk, audio)
+        
+        print(f"Generated TTS chunk {i+1}: {len(audio)} bytes")
+        return audio
     
-    def combine_audio_chunks(self, tts_file_paths: List[str], output_file: str):
+    def write_combined_audio(self, audio_chunks: List[bytes], output_file: str):
         """
-        Combine TTS audio chunks into final output using ffmpeg
+        Concatenate in-memory WAV chunks and write the output once
         """
-        print("Combining audio chunks into final output")
-        
-        if not tts_file_paths:
-            print("No audio chunks to combine")
-            return
-        
-        if len(tts_file_paths) == 1:
-            # Just copy the single file
-            shutil.copy2(tts_file_paths[0], output_file)
-        else:
-            # Create a file list for ffmpeg concat
-            list_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
-            for file_path in tts_file_paths:
-                list_file.write(f"file '{file_path}'\n")
-            list_file.close()
-            
-            # Use ffmpeg to concatenate files
-            cmd = [
-                'ffmpeg', '-f', 'concat', '-safe', '0', '-i', list_file.name,
-                '-c', 'copy', '-y', output_file
-            ]
-            subprocess.run(cmd, capture_output=True)
-            
-            # Clean up list file
-            os.unlink(list_file.name)
-        
-        # Clean up temporary TTS files
-        for file_path in tts_file_paths:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-        
-        print(f"Final audio saved to: {output_file}")
+        with self.profiler.measure("concat") as measured:
+            combined = audio_chunks[0] if len(audio_chunks) == 1 else concatenate_wav(audio_chunks)
+            measured.bytes_in = sum(len(chunk) for chunk in audio_chunks)
+            measured.bytes_out = len(combined)
+        with self.profiler.measure("write") as measured:
+            with open(output_file, 'wb') as out:
+                out.write(combined)
+            measured.bytes_in = measured.bytes_out = len(combined)
     
     def process_file_simple(self, input_file: str, output_file: str):
         """
@@ -420,7 +486,32 @@ class S2SPipeline:
         print(f"Starting simple S2S pipeline: {self.source_lang} -> {self.dest_lang}")
         print(f"Input: {input_file}, Output: {output_file}")
         
+        audio = self.translate_file_simple(input_file)
+        if audio is None:
+            return False
+        
+        # Write the audio once
+        with self.profiler.measure("write") as measured:
+            with open(output_file, 'wb') as out_file:
+                out_file.write(audio)
+            measured.bytes_in = measured.bytes_out = len(audio)
+        self.profiler.finish()
+        
+        print(f"Pipeline completed successfully! Output saved to: {output_file}")
+        print(f"Original text: {self.original_text}")
+        print(f"Translated text: {self.translated_text}")
+        
+        return True
+    
+    def translate_file_simple(self, input_file: str) -> Optional[bytes]:
+        """
+        Send a file to the API server's s2s endpoint and return the translated WAV bytes
+        (decoded from the inline audio_base64; no second download)
+        """
         s2s_api_url = f"{API_SERVER_BASE_URL}/s2s"
+        self.profiler = StageProfiler()
+        self.failures = []
+        self.audio_seconds = wav_duration(input_file) or 0.0
         
         with open(input_file, 'rb') as audio_file:
             files = {
@@ -431,103 +522,280 @@ class S2SPipeline:
                 'dest': self.dest_lang
             }
             
-            response = requests.post(s2s_api_url, files=files, data=data, timeout=120)
-            s2s_result = response.json()
-            
-            # Extract S3 URL from TTS result
-            data = s2s_result.get('data', {})
-            tts_result = data.get('tts_result', {})
-            
-            s3_url = None
-            if 's3_url' in tts_result:
-                s3_url = tts_result['s3_url']
-            elif 'data' in tts_result and 's3_url' in tts_result['data']:
-                s3_url = tts_result['data']['s3_url']
-            
-            if s3_url:
-                # Download and save the audio
-                audio_response = requests.get(s3_url, timeout=60)
-                
-                # Save the audio directly
-                with open(output_file, 'wb') as out_file:
-                    out_file.write(audio_response.content)
-                
-                # Store results in instance variables
-                self.original_text = data.get('original_text', '')
-                self.translated_text = data.get('translated_text', '')
-                
-                print(f"Pipeline completed successfully! Output saved to: {output_file}")
-                print(f"Original text: {self.original_text}")
-                print(f"Translated text: {self.translated_text}")
-                
-                return True
-            else:
-                print(f"Error: No S3 URL found in S2S response")
-                print(f"Response: {s2s_result}")
-                return False
+            with self.profiler.measure("s2s") as measured:
+                response = self._post(s2s_api_url, files=files, data=data, timeout=120)
+                measured.bytes_in = os.path.getsize(input_file)
+                measured.bytes_out = len(response.content)
+        self.profiler.finish()
+        s2s_result = response.json()
+        
+        data = s2s_result.get('data') or {}
+        if not data.get('audio_base64'):
+            print(f"Error: No audio found in S2S response")
+            print(f"Response: {s2s_result}")
+            return None
+        
+        # Store results in instance variables
+        self.original_text = data.get('original_text', '')
+        self.translated_text = data.get('translated_text', '')
+        
+        return base64.b64decode(data['audio_base64'])
 
-    def process_file(self, input_file: str, output_file: str):
+    def process_file(self, input_file: str, output_file: str, resume: bool = False,
+                     checkpoint_root: str = DEFAULT_CHECKPOINT_ROOT):
         """
-        Process the complete S2S pipeline
+        Process the complete S2S pipeline.
+        Every completed stage result is checkpointed; with resume=True a
+        restarted run reuses them and only redoes the missing chunks.
         """
         print(f"Starting S2S pipeline: {self.source_lang} -> {self.dest_lang}")
         print(f"Input: {input_file}, Output: {output_file}")
+        self.profiler = StageProfiler()
+        self.failures = []
+        
+        config = {
+            "chunk_duration": self.chunk_duration,
+            "overlap": self.overlap,
+            "vad": self.vad,
+            "min_chunk": self.min_chunk,
+            "max_chunk": self.max_chunk
+        }
+        self.checkpoint = RunCheckpoint(input_file, self.source_lang, self.dest_lang, config,
+                                        root=checkpoint_root, resume=resume)
+        print(f"Checkpoint directory: {self.checkpoint.path}")
         
         # Step 1: Chunk audio with overlap
         chunks = self.chunk_audio_with_overlap(input_file)
         
-        # Step 2: Process each chunk through ASR
-        for chunk in chunks:
-            self.process_asr(chunk)
+        # Step 2: Process chunks through ASR concurrently (failed chunks keep empty text)
+        self._run_stage("asr", self._asr_with_checkpoint, chunks)
         
-        # Step 3: Merge overlapping text
-        merged_text = self.merge_overlapping_text(chunks)
+        # Step 3: Merge overlapping text, keeping the words each chunk adds
+        chunk_words = self.merge_overlapping_text(chunks)
         
-        # Step 4: Translate merged text in chunks
-        translated_chunks = self.translate_text_chunks(merged_text)
+        # Step 4: Translate the merged text in pieces
+        translated_chunks = self.translate_text_chunks(chunk_words)
         
         if not translated_chunks or all(not chunk.strip() for chunk in translated_chunks):
             print("Error: No translated text generated")
+            self.profiler.finish()
             return False
         
-        # Step 5: Generate TTS directly from translated chunks
-        tts_file_paths = self.generate_tts_from_translated_chunks(translated_chunks)
+        # Step 5: Generate TTS directly from translated chunks (kept in memory)
+        audio_chunks = self.generate_tts_from_translated_chunks(translated_chunks)
         
-        if not tts_file_paths:
+        if not audio_chunks:
             print("Error: No TTS audio generated")
+            self.profiler.finish()
             return False
         
-        # Step 6: Combine chunks into final audio
-        self.combine_audio_chunks(tts_file_paths, output_file)
+        # Step 6: Combine chunks and write the final audio once
+        self.write_combined_audio(audio_chunks, output_file)
+        self.profiler.finish()
+        print(f"Final audio saved to: {output_file}")
+        
+        if resume:
+            print(f"Resumed run: {self.checkpoint.summary()}")
         
-        # Step 7: Clean up chunk files
-        for chunk in chunks:
-            if os.path.exists(chunk.file_path):
-                os.unlink(chunk.file_path)
+        if self.failures:
+            print(f"Warning: {len(self.failures)} chunk(s) failed and were skipped:")
+            for failure in self.failures:
+                print(f"  {failure['stage']} item {failure['index']}: {failure['error']}")
+            print(f"Checkpoint kept for --resume: {self.checkpoint.path}")
+        else:
+            self.checkpoint.remove()
         
         print(f"Pipeline completed successfully! Output saved to: {output_file}")
+        print(f"Real-time factor: {self.profile_report()['rtf']}")
         
         return True
 
+    def process_file_streaming(self, input_file: str, queue_size: int = 2) -> Iterator[Dict]:
+        """
+        Pipelined S2S: each chunk flows through ASR -> MT -> TTS as soon as it
+        exists, with bounded queues between the stages, so the first translated
+        audio is ready after one chunk instead of after the whole file.
+        
+        Yields one dict per chunk with translated audio ('type': 'chunk'), then a
+        summary ('type': 'summary') with time-to-first-audio and per-stage
+        wall-clock. An upstream failure yields ('type': 'error') and stops.
+        """
+        print(f"Starting streaming S2S pipeline: {self.source_lang} -> {self.dest_lang}")
+        
+        started = time.monotonic()
+        self.profiler = StageProfiler()
+        self.failures = []
+        stage_seconds = {"chunking": 0.0, "asr": 0.0, "mt": 0.0, "tts": 0.0}
+        stop = threading.Event()
+        closed = threading.Event()
+        done = object()
+        
+        asr_queue = queue.Queue(maxsize=queue_size)
+        mt_queue = queue.Queue(maxsize=queue_size)
+        tts_queue = queue.Queue(maxsize=queue_size)
+        out_queue = queue.Queue(maxsize=queue_size)
+        
+        def put(target, item):
+            # Give up if a downstream stage failed, instead of blocking forever
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def take(source):
+            # Stop waiting once the pipeline is shutting down (client gone, stage failed)
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+            return done
+        
+        def stage(name, source, target, work):
+            try:
+                while True:
+                    item = take(source) if source is not None else None
+                    if item is done:
+                        break
+                    t0 = time.monotonic()
+                    result = work(item)
+                    stage_seconds[name] += time.monotonic() - t0
+                    if source is None:
+                        # Producer stage: work() returns an iterator
+                        for produced in result:
+                            if not put(target, produced):
+                                return
+                        break
+                    if result is not None and not put(target, result):
+                        return
+            except Exception as e:
+                stop.set()
+                error = {"type": "error", "stage": name, "error": str(e)}
+                while not closed.is_set():
+                    try:
+                        out_queue.put(error, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+            finally:
+                # Always hand the sentinel on (a no-op once stopped) so downstream stages exit
+                put(target, done)
+        
+        def chunk_stage(_):
+            iterator = self.iter_audio_chunks(input_file)
+            while True:
+                t0 = time.monotonic()
+                chunk = next(iterator, None)
+                stage_seconds["chunking"] += time.monotonic() - t0
+                if chunk is None:
+                    return
+                yield chunk
+        
+        previous = {"chunk": None}
+        
+        def asr_stage(chunk):
+            self.process_asr(chunk)
+            # Drop words repeated from the previous chunk's overlap
+            text = chunk.text
+            last = previous["chunk"]
+            if last is not None and last.text:
+                text = self.aligner.trim(last.text, text,
+                                         previous_duration=last.end_time - last.start_time,
+                                         overlap_seconds=last.end_time - chunk.start_time)
+            if chunk.text:
+                previous["chunk"] = chunk
+            return (chunk, text) if text.strip() else None
+        
+        def mt_stage(item):
+            chunk, text = item
+            chunk.translated_text = self.translate_text(text, chunk.chunk_id)
+            return (chunk, text) if chunk.translated_text.strip() else None
+        
+        def tts_stage(item):
+            chunk, text = item
+            audio = self.synthesize_speech(chunk.translated_text, chunk.chunk_id)
+            if audio is None:
+                return None
+            return {
+                "type": "chunk",
+                "chunk_id": chunk.chunk_id,
+                "start_time": chunk.start_time,
+                "end_time": chunk.end_time,
+                "original_text": text,
+                "translated_text": chunk.translated_text,
+                "audio": audio
+            }
+        
+        threads = [
+            threading.Thread(target=stage, args=("chunking", None, asr_queue, chunk_stage), daemon=True),
+            threading.Thread(target=stage, args=("asr", asr_queue, mt_queue, asr_stage), daemon=True),
+            threading.Thread(target=stage, args=("mt", mt_queue, tts_queue, mt_stage), daemon=True),
+            threading.Thread(target=stage, args=("tts", tts_queue, out_queue, tts_stage), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        
+        time_to_first_audio = None
+        chunks_out = 0
+        original_parts = []
+        translated_parts = []
+        
+        try:
+            while True:
+                # Every stage exit hands on the sentinel or queues an error
+                item = out_queue.get()
+                if item is done:
+                    break
+                if item["type"] == "error":
+                    print(f"Error in {item['stage']} stage: {item['error']}")
+                    yield item
+                    return
+                if time_to_first_audio is None:
+                    time_to_first_audio = time.monotonic() - started
+                    print(f"First audio ready after {time_to_first_audio:.2f}s")
+                chunks_out += 1
+                original_parts.append(item["original_text"])
+                translated_parts.append(item["translated_text"])
+                yield item
+        finally:
+            self.profiler.finish()
+            stop.set()
+            closed.set()
+        
+        self.original_text = " ".join(original_parts)
+        self.translated_text = " ".join(translated_parts)
+        
+        yield {
+            "type": "summary",
+            "chunks": chunks_out,
+            "time_to_first_audio": round(time_to_first_audio, 3) if time_to_first_audio is not None else None,
+            "total_seconds": round(time.monotonic() - started, 3),
+            "stage_seconds": {name: round(value, 3) for name, value in stage_seconds.items()},
+            "original_text": self.original_text,
+            "translated_text": self.translated_text,
+            "profile": self.profile_report()
+        }
+    
     def run(self, input_audio_path: str) -> dict:
         """
         Run the complete S2S pipeline and return results as a dictionary
+        (the translated audio is returned in memory as 'audio' bytes)
         """
         try:
-            # Create temporary output file
-            temp_output = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_output.close()
-            
-            # Process the file using simple method for faster processing
-            success = self.process_file_simple(input_audio_path, temp_output.name)
+            # Use the simple method for faster processing
+            audio = self.translate_file_simple(input_audio_path)
             
-            if success:
+            if audio is not None:
                 return {
                     'status': 'success',
                     'data': {
                         'original_text': self.original_text,
                         'translated_text': self.translated_text,
-                        'output_audio': temp_output.name
+                        'audio': audio,
+                        'profile': self.profile_report()
                     }
                 }
             else:
@@ -542,15 +810,129 @@ class S2SPipeline:
                 'message': f'S2S pipeline error: {str(e)}'
             }
 
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.webm', '.ogg', '.m4a'}
+
+
+def collect_batch_inputs(input_dir: Optional[str], manifest: Optional[str], output_dir: str,
+                         dest_lang: str) -> List[Tuple[str, str]]:
+    """
+    List (input, output) pairs from a directory of audio files or a manifest.
+    Manifest lines are "input" or "input,output"; blank lines and # comments are skipped.
+    """
+    inputs = []
+    if input_dir:
+        for name in sorted(os.listdir(input_dir)):
+            if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                inputs.append((os.path.join(input_dir, name), None))
+    else:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r', encoding='utf-8') as manifest_file:
+            for line in manifest_file:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = [part.strip() for part in line.split(',', 1)]
+                input_path = parts[0] if os.path.isabs(parts[0]) else os.path.join(base_dir, parts[0])
+                inputs.append((input_path, parts[1] if len(parts) > 1 and parts[1] else None))
+    
+    pairs = []
+    for input_path, output_path in inputs:
+        if output_path is None:
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = f"{stem}_{dest_lang}.wav"
+        if not os.path.isabs(output_path):
+            output_path = os.path.join(output_dir, output_path)
+        pairs.append((input_path, output_path))
+    return pairs
+
+
+def run_batch(pairs: List[Tuple[str, str]], pipeline_options: Dict, concurrency: int = 4,
+              upstream_limit: int = 8, simple: bool = False, resume: bool = False,
+              checkpoint_root: str = DEFAULT_CHECKPOINT_ROOT) -> Dict:
+    """
+    Translate many files with one configuration.
+    Files run `concurrency` at a time; all of them share one connection pool,
+    one /health check and a cap of `upstream_limit` in-flight API calls.
+    
+    Returns:
+        Dict: Summary report with per-file results and throughput
+    """
+    session = create_session(max(upstream_limit, 1))
+    limit = threading.BoundedSemaphore(max(upstream_limit, 1))
+    
+    # Validate once for the whole batch
+    S2SPipeline(**pipeline_options, session=session)
+    
+    def process(pair):
+        input_path, output_path = pair
+        started = time.monotonic()
+        pipeline = S2SPipeline(**pipeline_options, session=session, upstream_limit=limit, validate=False)
+        result = {"input": input_path, "output": output_path}
+        try:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            if simple:
+                success = pipeline.process_file_simple(input_path, output_path)
+            else:
+                success = pipeline.process_file(input_path, output_path, resume=resume,
+                                                checkpoint_root=checkpoint_root)
+            if not pipeline.audio_seconds:
+                pipeline.audio_seconds = len(load_pcm(input_path)) / SAMPLE_RATE
+            result["status"] = "success" if success else "failed"
+            if pipeline.failures:
+                result["chunk_failures"] = pipeline.failures
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        result["audio_seconds"] = round(pipeline.audio_seconds, 3)
+        result["seconds"] = round(time.monotonic() - started, 3)
+        if pipeline.profiler.finished is None:
+            pipeline.profiler.finish()  # the run raised before finishing
+        result["profile"] = pipeline.profile_report()
+        print(f"[{result['status']}] {input_path} -> {output_path} ({result['seconds']}s)")
+        return result
+    
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        results = list(executor.map(process, pairs))
+    wall_seconds = time.monotonic() - started
+    
+    succeeded = [result for result in results if result["status"] == "success"]
+    audio_seconds = sum(result["audio_seconds"] for result in succeeded)
+    return {
+        "files": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "wall_seconds": round(wall_seconds, 3),
+        "files_per_hour": round(len(succeeded) * 3600 / wall_seconds, 1) if wall_seconds else None,
+        "audio_seconds": round(audio_seconds, 3),
+        "audio_seconds_per_second": round(audio_seconds / wall_seconds, 3) if wall_seconds else None,
+        "failures": [result for result in results if result["status"] != "success"],
+        "results": results
+    }
+
+
 def main():
     parser = argparse.ArgumentParser(description='Speech-to-Speech Translation Pipeline')
-    parser.add_argument('--input', required=True, help='Input audio file path')
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument('--input', help='Input audio file path')
+    inputs.add_argument('--input-dir', help='Batch mode: translate every audio file in a directory')
+    inputs.add_argument('--manifest', help='Batch mode: file listing "input[,output]" per line')
     parser.add_argument('--source', required=True, help='Source language')
     parser.add_argument('--dest', required=True, help='Destination language')
-    parser.add_argument('--output', required=True, help='Output audio file path')
+    parser.add_argument('--output', required=True, help='Output audio file path (output directory in batch mode)')
     parser.add_argument('--chunk-duration', type=int, default=6, help='Chunk duration in seconds (default: 6)')
     parser.add_argument('--overlap', type=int, default=1, help='Overlap duration in seconds (default: 1)')
     parser.add_argument('--simple', action='store_true', help='Use simple API server endpoint (faster, no chunking)')
+    parser.add_argument('--stream', action='store_true', help='Pipeline chunks through ASR -> MT -> TTS and report time-to-first-audio')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent API calls per stage (default: 4)')
+    parser.add_argument('--resume', action='store_true', help='Reuse checkpointed chunk results from an interrupted run')
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_ROOT, help=f'Checkpoint root directory (default: {DEFAULT_CHECKPOINT_ROOT})')
+    parser.add_argument('--vad', action='store_true', help='Cut chunks at pauses and skip silence instead of fixed windows')
+    parser.add_argument('--min-chunk', type=float, default=2.0, help='Minimum VAD chunk length in seconds (default: 2)')
+    parser.add_argument('--max-chunk', type=float, default=15.0, help='Maximum VAD chunk length in seconds (default: 15)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Batch mode: files processed at once (default: 4)')
+    parser.add_argument('--upstream-limit', type=int, default=8, help='Batch mode: max in-flight API calls across all files (default: 8)')
+    parser.add_argument('--profile-json', help='Also write the run summary with per-stage timings to this JSON file')
     parser.add_argument('--api-server', default='http://localhost:8000', help='API server base URL (default: http://localhost:8000)')
     
     args = parser.parse_args()
@@ -559,21 +941,80 @@ def main():
     global API_SERVER_BASE_URL
     API_SERVER_BASE_URL = args.api_server
     
+    pipeline_options = {
+        "source_lang": args.source,
+        "dest_lang": args.dest,
+        "chunk_duration": args.chunk_duration,
+        "overlap": args.overlap,
+        "max_workers": args.workers,
+        "vad": args.vad,
+        "min_chunk": args.min_chunk,
+        "max_chunk": args.max_chunk
+    }
+    
+    if args.input_dir or args.manifest:
+        pairs = collect_batch_inputs(args.input_dir, args.manifest, args.output, args.dest)
+        print(f"Batch mode: {len(pairs)} files, {args.concurrency} at a time, "
+              f"{args.upstream_limit} upstream calls max")
+        report = run_batch(pairs, pipeline_options, concurrency=args.concurrency,
+                           upstream_limit=args.upstream_limit, simple=args.simple,
+                           resume=args.resume, checkpoint_root=args.checkpoint_dir)
+        os.makedirs(args.output, exist_ok=True)
+        report_path = os.path.join(args.output, 'batch_report.json')
+        with open(report_path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+        print(f"Processed {report['succeeded']}/{report['files']} files in {report['wall_seconds']}s "
+              f"({report['files_per_hour']} files/hour, {report['audio_seconds_per_second']} audio-seconds/second)")
+        for failure in report["failures"]:
+            print(f"  Failed: {failure['input']}: {failure.get('error', 'see log')}")
+        print(f"Report saved to: {report_path}")
+        if args.profile_json:
+            with open(args.profile_json, 'w', encoding='utf-8') as profile_file:
+                json.dump(report, profile_file, indent=2, ensure_ascii=False)
+        return 0 if not report["failed"] else 1
+    
     # Create S2S pipeline
-    pipeline = S2SPipeline(
-        source_lang=args.source,
-        dest_lang=args.dest,
-        chunk_duration=args.chunk_duration,
-        overlap=args.overlap
-    )
+    pipeline = S2SPipeline(**pipeline_options)
     
     # Process the file
+    mode = "simple" if args.simple else "stream" if args.stream else "chunked"
     if args.simple:
         print("Using simple API server endpoint...")
         success = pipeline.process_file_simple(args.input, args.output)
+    elif args.stream:
+        print("Using pipelined streaming processing...")
+        audio_chunks = []
+        success = False
+        for event in pipeline.process_file_streaming(args.input):
+            if event["type"] == "chunk":
+                audio_chunks.append(event["audio"])
+                print(f"Audio for chunk {event['chunk_id']} ready: '{event['translated_text']}'")
+            elif event["type"] == "summary":
+                print(f"Time to first audio: {event['time_to_first_audio']}s, total: {event['total_seconds']}s")
+                print(f"Stage wall-clock: {event['stage_seconds']}")
+                success = bool(audio_chunks)
+        if success:
+            pipeline.write_combined_audio(audio_chunks, args.output)
+            print(f"Final audio saved to: {args.output}")
     else:
         print("Using advanced chunked processing...")
-        success = pipeline.process_file(args.input, args.output)
+        success = pipeline.process_file(args.input, args.output, resume=args.resume,
+                                        checkpoint_root=args.checkpoint_dir)
+    
+    summary = {
+        "input": args.input,
+        "output": args.output,
+        "source": args.source,
+        "dest": args.dest,
+        "mode": mode,
+        "success": bool(success),
+        "chunk_failures": pipeline.failures,
+        "profile": pipeline.profile_report()
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.profile_json:
+        with open(args.profile_json, 'w', encoding='utf-8') as profile_file:
+            json.dump(summary, profile_file, indent=2, ensure_ascii=False)
     
     return 0 if success else 1
 
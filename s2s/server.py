@@ -5,25 +5,26 @@ Simple Flask server that provides an endpoint for speech-to-speech translation
 """
 
 import os
-import tempfile
-import shutil
-from flask import Flask, request, jsonify, send_file
+import base64
+import json
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from blobstore import AudioStore
 from s2s import S2SPipeline
+from sessions import DIRECTIONS, SessionManager
 import uuid
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Configure upload folder
-UPLOAD_FOLDER = '/tmp/s2s_uploads'
-OUTPUT_FOLDER = '/tmp/s2s_outputs'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+# Uploads and outputs live in one content-addressed store with TTL + size eviction
+# (S2S_STORE_DIR, S2S_STORE_MAX_BYTES, S2S_STORE_TTL_SECONDS)
+store = AudioStore.from_env()
+
+# Conversation sessions, reclaimed after S2S_SESSION_TTL_SECONDS idle
+sessions = SessionManager.from_env(store)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'webm', 'ogg', 'm4a'}
@@ -32,6 +33,10 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def audio_url(blob):
+    """Public URL of a stored blob"""
+    return f"{request.host_url}audio/{blob.digest}.wav"
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -40,10 +45,20 @@ def health_check():
         'service': 's2s_api'
     })
 
+@app.route('/metrics/store', methods=['GET'])
+def store_metrics():
+    """Blob counts, bytes stored/written/evicted and hit rates of the audio store"""
+    return jsonify({
+        'status': 'success',
+        'data': store.snapshot()
+    })
+
 @app.route('/save-audio', methods=['POST'])
 def save_audio():
     """
-    Save uploaded WAV audio file to the specified folder
+    Save an uploaded recording in the audio store.
+    Recordings are deduplicated by content and expire like every other blob;
+    saveLocation is accepted for compatibility but no longer selects a folder.
     """
     try:
         # Check if audio file is present
@@ -62,40 +77,18 @@ def save_audio():
             }), 400
         
         if file:
-            # Get the base directory (megathon-bhashini folder)
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            base_dir = os.path.dirname(current_dir)  # Go up one level from s2s
-            
-            # Determine save directory based on saveLocation parameter
-            if save_location == 'samvaad':
-                # Save in vaidhya-vaani-suite-main/src/pages/samvaad/
-                save_dir = os.path.join(base_dir, 'vaidhya-vaani-suite-main', 'src', 'pages', 'samvaad')
-            else:
-                # Default: save in s2s directory
-                save_dir = current_dir
-            
-            # Create directory if it doesn't exist
-            os.makedirs(save_dir, exist_ok=True)
-            
-            # Create filename - keep it simple
-            filename = secure_filename(file.filename)
-            if not filename:
-                filename = f"{speaker}_audio_{uuid.uuid4().hex[:8]}.mp3"
-            
-            # Save file in the specified directory
-            file_path = os.path.join(save_dir, filename)
-            
-            # Save the file directly using werkzeug's save method
-            file.save(file_path)
+            filename = secure_filename(file.filename) or f"{speaker}_audio_{uuid.uuid4().hex[:8]}.wav"
             
-            # Verify the file was saved correctly
-            file_size = os.path.getsize(file_path)
+            # Stream the upload into the store
+            blob = store.put_stream(file.stream, file.mimetype or 'audio/wav')
             
             return jsonify({
                 'status': 'success',
-                'message': f'Audio saved as {filename} in {save_location} folder',
-                'file_path': file_path,
-                'file_size': file_size,
+                'message': f'Audio {filename} saved as {blob.digest}',
+                'file_path': blob.path,
+                'file_size': blob.size,
+                'digest': blob.digest,
+                'audio_url': audio_url(blob),
                 'save_location': save_location
             })
         
@@ -133,14 +126,11 @@ def speech_to_speech():
         dest_lang = request.form.get('dest_lang', 'hindi')
         
         if file and allowed_file(file.filename):
-            # Save uploaded file
-            filename = secure_filename(file.filename)
-            unique_id = str(uuid.uuid4())
-            input_filename = f"{unique_id}_{filename}"
-            input_path = os.path.join(app.config['UPLOAD_FOLDER'], input_filename)
-            file.save(input_path)
+            # Stream the upload into the store (identical uploads are stored once)
+            upload = store.put_stream(file.stream, file.mimetype or 'audio/wav')
+            input_path = upload.path
             
-            try:
+            with store.pinned(upload.digest):
                 # Initialize S2S pipeline
                 pipeline = S2SPipeline(
                     source_lang=source_lang,
@@ -153,30 +143,22 @@ def speech_to_speech():
                 result = pipeline.run(input_path)
                 
                 if result['status'] == 'success':
-                    # Move output file to public folder
-                    output_audio_path = result['data']['output_audio']
-                    public_filename = f"{unique_id}_output.wav"
-                    public_path = os.path.join(app.config['OUTPUT_FOLDER'], public_filename)
-                    shutil.move(output_audio_path, public_path)
-                    
-                    # Create URL for audio file
-                    audio_url = f"http://localhost:8001/audio/{public_filename}"
+                    # Write the translated audio straight into the store
+                    output_blob = store.put_bytes(result['data']['audio'], 'audio/wav')
                     
                     return jsonify({
                         'status': 'success',
                         'original_text': result['data']['original_text'],
                         'translated_text': result['data']['translated_text'],
-                        'audio_url': audio_url
+                        'audio_url': audio_url(output_blob),
+                        'metadata': {
+                            'profile': result['data']['profile']
+                        }
                     })
                 else:
                     return jsonify({
                         'error': result.get('message', 'S2S processing failed')
                     }), 500
-                    
-            finally:
-                # Clean up input file
-                if os.path.exists(input_path):
-                    os.remove(input_path)
         
         return jsonify({
             'error': 'Invalid file type'
@@ -187,15 +169,193 @@ def speech_to_speech():
             'error': f'Server error: {str(e)}'
         }), 500
 
+@app.route('/s2s/stream', methods=['POST'])
+def speech_to_speech_stream():
+    """
+    Pipelined S2S: translated audio is streamed back chunk by chunk
+    Expects: audio file, source_lang, dest_lang, optional chunk_duration/overlap (seconds)
+    Returns: chunked application/x-ndjson - one line per translated chunk
+             (texts + audio_base64), then a summary line with time_to_first_audio
+             and per-stage wall-clock
+    """
+    if 'audio' not in request.files:
+        return jsonify({
+            'error': 'No audio file provided'
+        }), 400
+    
+    file = request.files['audio']
+    if file.filename == '' or not allowed_file(file.filename):
+        return jsonify({
+            'error': 'Invalid file type'
+        }), 400
+    
+    source_lang = request.form.get('source_lang', 'english')
+    dest_lang = request.form.get('dest_lang', 'hindi')
+    try:
+        chunk_duration = int(request.form.get('chunk_duration', 6))
+        overlap = float(request.form.get('overlap', 1))
+    except ValueError:
+        return jsonify({
+            'error': 'chunk_duration must be an integer and overlap a number (seconds)'
+        }), 400
+    if chunk_duration <= 0 or not 0 <= overlap < chunk_duration:
+        return jsonify({
+            'error': 'chunk_duration must be positive and overlap must be at least 0 and less than chunk_duration'
+        }), 400
+    
+    upload = store.put_stream(file.stream, file.mimetype or 'audio/wav')
+    
+    try:
+        pipeline = S2SPipeline(
+            source_lang=source_lang,
+            dest_lang=dest_lang,
+            chunk_duration=chunk_duration,
+            overlap=overlap
+        )
+    except Exception as e:
+        return jsonify({
+            'error': f'Server error: {str(e)}'
+        }), 500
+    
+    def generate():
+        with store.pinned(upload.digest):
+            for event in pipeline.process_file_streaming(upload.path):
+                if event['type'] == 'chunk':
+                    event = dict(event)
+                    event['audio_base64'] = base64.b64encode(event.pop('audio')).decode('utf-8')
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """
+    Start a conversation session; the language pair is validated once
+    Expects: source_lang, dest_lang (JSON or form)
+    Returns: session_id, used for every turn of the conversation
+    """
+    try:
+        params = request.get_json(silent=True) or request.form
+        source_lang = params.get('source_lang', 'english')
+        dest_lang = params.get('dest_lang', 'hindi')
+        
+        try:
+            session = sessions.create(source_lang, dest_lang)
+        except RuntimeError as e:
+            return jsonify({
+                'error': str(e)
+            }), 503
+        
+        return jsonify({
+            'status': 'success',
+            'session_id': session.id,
+            'source_lang': source_lang,
+            'dest_lang': dest_lang,
+            'ttl_seconds': sessions.ttl_seconds
+        }), 201
+    
+    except Exception as e:
+        return jsonify({
+            'error': f'Server error: {str(e)}'
+        }), 500
+
+@app.route('/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """Session details and the rolling log of recent turns (display only)"""
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Session not found or expired'}), 404
+    return jsonify({
+        'status': 'success',
+        **session.snapshot()
+    })
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    """End a session and release its connections"""
+    if not sessions.close(session_id):
+        return jsonify({'error': 'Session not found or expired'}), 404
+    return jsonify({
+        'status': 'success',
+        'session_id': session_id
+    })
+
+@app.route('/sessions/<session_id>/turns', methods=['POST'])
+def session_turn(session_id):
+    """
+    Translate one turn of a conversation
+    Expects: audio file, optional direction ('forward' = source -> dest,
+             'reverse' = dest -> source, e.g. the patient answering)
+    Returns: original_text, translated_text, audio_url, turn number
+    """
+    try:
+        session = sessions.get(session_id)
+        if session is None:
+            return jsonify({'error': 'Session not found or expired'}), 404
+        
+        if 'audio' not in request.files:
+            return jsonify({
+                'error': 'No audio file provided'
+            }), 400
+        
+        file = request.files['audio']
+        if file.filename == '' or not allowed_file(file.filename):
+            return jsonify({
+                'error': 'Invalid file type'
+            }), 400
+        
+        direction = request.form.get('direction', 'forward')
+        if direction not in DIRECTIONS:
+            return jsonify({
+                'error': f"direction must be one of {', '.join(DIRECTIONS)}"
+            }), 400
+        
+        upload = store.put_stream(file.stream, file.mimetype or 'audio/wav')
+        with store.pinned(upload.digest):
+            result = session.translate_turn(upload.path, upload.digest, direction)
+        
+        if result is None:
+            return jsonify({
+                'error': 'S2S processing failed'
+            }), 500
+        
+        result['audio_url'] = audio_url(result.pop('audio_blob'))
+        if not result['cached']:
+            session.remember(result)
+        
+        return jsonify({
+            'status': 'success',
+            'session_id': session_id,
+            **result
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'error': f'Server error: {str(e)}'
+        }), 500
+
+@app.route('/metrics/sessions', methods=['GET'])
+def session_metrics():
+    """Active and reclaimed conversation sessions"""
+    return jsonify({
+        'status': 'success',
+        'data': sessions.snapshot()
+    })
+
 @app.route('/audio/<filename>')
 def serve_audio(filename):
-    """Serve audio files"""
+    """
+    Serve a stored blob by digest (optionally with an extension).
+    The digest is the ETag; conditional and Range requests are answered by
+    send_file, which hands the file to the WSGI server (sendfile where supported).
+    """
     try:
-        audio_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-        if os.path.exists(audio_path):
-            return send_file(audio_path, mimetype='audio/wav')
-        else:
+        digest = filename.split('.', 1)[0].lower()
+        blob = store.get(digest) if len(digest) == 64 else None
+        if blob is None:
             return jsonify({'error': 'Audio file not found'}), 404
+        return send_file(blob.path, mimetype=blob.mimetype, conditional=True,
+                         etag=blob.digest, max_age=store.ttl_seconds)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Sessions - Stateful S2S conversations for the S2S server
+
+A doctor-patient conversation is many short turns in two directions over the
+same language pair. A session is created once: both pipelines (source ->
+dest and dest -> source) are built and validated against the gateway, and
+each keeps its pooled HTTP connections for the life of the session. Turns
+then pay only for the translation itself. Each session keeps a rolling
+log of recent turns for clients to display (it is not sent to ASR or MT:
+every turn is translated on its own by the gateway's /s2s), caches results
+by input-audio digest so client retries are free, and is reclaimed after a
+period of inactivity. Cached results hold the digest of the translated audio
+in the blob store rather than the audio itself.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+from blobstore import AudioStore
+from s2s import S2SPipeline
+
+DIRECTIONS = ("forward", "reverse")
+
+
+class ConversationSession:
+    """A language pair, its warm pipelines and the recent turns"""
+
+    RESULT_CACHE_SIZE = 32
+
+    def __init__(self, store: AudioStore, source_lang: str, dest_lang: str, context_turns: int = 10):
+        self.store = store
+        self.id = uuid.uuid4().hex
+        self.source_lang = source_lang
+        self.dest_lang = dest_lang
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.turn_count = 0
+        self.context = deque(maxlen=context_turns)
+        self.lock = threading.Lock()
+        self._results: "OrderedDict[tuple, Dict]" = OrderedDict()
+
+        # Validate once; the reverse pipeline shares the same capabilities check
+        self.pipelines = {
+            "forward": S2SPipeline(source_lang, dest_lang, max_workers=2),
+            "reverse": S2SPipeline(dest_lang, source_lang, max_workers=2, validate=False),
+        }
+
+    def translate_turn(self, input_path: str, digest: str, direction: str = "forward") -> Optional[Dict]:
+        """
+        Translate one recorded turn.
+
+        Returns:
+            Optional[Dict]: Turn result with the stored 'audio_blob', or None
+                if the gateway returned no audio
+        """
+        key = (direction, digest)
+        with self.lock:
+            self.last_active = time.time()
+            cached = self._results.get(key)
+            if cached is not None:
+                blob = self.store.get(cached["audio_digest"])
+                if blob is not None:
+                    self._results.move_to_end(key)
+                    return dict(cached, audio_blob=blob, cached=True)
+                # The audio has been evicted from the store; translate again
+                del self._results[key]
+
+            pipeline = self.pipelines[direction]
+            started = time.monotonic()
+            audio = pipeline.translate_file_simple(input_path)
+            if audio is None:
+                return None
+
+            blob = self.store.put_bytes(audio, 'audio/wav')
+            self.turn_count += 1
+            result = {
+                "turn": self.turn_count,
+                "direction": direction,
+                "source_lang": pipeline.source_lang,
+                "dest_lang": pipeline.dest_lang,
+                "original_text": pipeline.original_text,
+                "translated_text": pipeline.translated_text,
+                "seconds": round(time.monotonic() - started, 3),
+                "profile": pipeline.profile_report(),
+                "audio_digest": blob.digest,
+            }
+            self._results[key] = result
+            if len(self._results) > self.RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            self.last_active = time.time()
+            return dict(result, audio_blob=blob, cached=False)
+
+    def remember(self, result: Dict):
+        """Add a finished turn (without the audio or timings) to the rolling log; translation does not read it"""
+        self.context.append({key: value for key, value in result.items()
+                             if key not in ("audio_blob", "cached", "profile")})
+
+    def close(self):
+        for pipeline in self.pipelines.values():
+            pipeline.session.close()
+
+    def snapshot(self) -> Dict:
+        return {
+            "session_id": self.id,
+            "source_lang": self.source_lang,
+            "dest_lang": self.dest_lang,
+            "created_at": self.created_at,
+            "last_active": self.last_active,
+            "turns": self.turn_count,
+            "context": list(self.context),
+        }
+
+
+class SessionManager:
+    """Create, look up and reclaim conversation sessions"""
+
+    def __init__(self, store: AudioStore, ttl_seconds: float = 1800, max_sessions: int = 200,
+                 context_turns: int = 10):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.context_turns = context_turns
+        self.sessions: Dict[str, ConversationSession] = {}
+        self.reclaimed = 0
+        self._opening = 0  # slots held by sessions still being validated
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, store: AudioStore) -> "SessionManager":
+        return cls(
+            store,
+            ttl_seconds=float(os.getenv('S2S_SESSION_TTL_SECONDS', '1800')),
+            max_sessions=int(os.getenv('S2S_MAX_SESSIONS', '200')),
+            context_turns=int(os.getenv('S2S_SESSION_CONTEXT_TURNS', '10')),
+        )
+
+    def create(self, source_lang: str, dest_lang: str) -> ConversationSession:
+        """
+        Start a session (validates the language pair once).
+
+        Raises:
+            RuntimeError: If max_sessions active sessions already exist
+        """
+        # Hold a slot first so a full server never calls the gateway
+        with self._lock:
+            self._sweep()
+            if len(self.sessions) + self._opening >= self.max_sessions:
+                raise RuntimeError("Too many active sessions")
+            self._opening += 1
+        try:
+            session = ConversationSession(self.store, source_lang, dest_lang, self.context_turns)
+        except Exception:
+            with self._lock:
+                self._opening -= 1
+            raise
+        with self._lock:
+            self._opening -= 1
+            self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ConversationSession]:
+        with self._lock:
+            self._sweep()
+            return self.sessions.get(session_id)
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def _sweep(self):
+        """Reclaim sessions idle for longer than the TTL (lock held)"""
+        now = time.time()
+        idle = [session_id for session_id, session in self.sessions.items()
+                if now - session.last_active > self.ttl_seconds and not session.lock.locked()]
+        for session_id in idle:
+            self.sessions.pop(session_id).close()
+            self.reclaimed += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._sweep()
+            return {
+                "active": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "reclaimed": self.reclaimed,
+            }
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# s2s modules are imported flat from the s2s directory (as s2s.py does),
+# and the shared text_segmenter package from the repository root
+S2S_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, S2S_DIR)
+sys.path.append(os.path.dirname(S2S_DIR))
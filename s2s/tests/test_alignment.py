@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from alignment import TokenVocabulary, TranscriptAligner, exact_overlap, fuzzy_overlap, normalize_token
+
+
+def ids(*sentences):
+    vocabulary = TokenVocabulary()
+    return [vocabulary.encode(sentence.split()) for sentence in sentences]
+
+
+def test_normalize_token_strips_case_and_punctuation():
+    assert normalize_token("Subah,") == "subah"
+    assert normalize_token("दवा।") == "दवा"
+
+
+def test_exact_overlap():
+    tail, head = ids("aap roz do baar dawa lijiye", "dawa lijiye aur paani")
+    assert exact_overlap(tail, head) == 2
+    tail, head = ids("ek do teen", "chaar paanch")
+    assert exact_overlap(tail, head) == 0
+
+
+def test_fuzzy_overlap_allows_one_edge_error_in_short_overlaps():
+    # The cut word at the chunk edge was heard differently
+    tail, head = ids("kal subah khaali pet", "kal subha khaali pet aana")
+    assert fuzzy_overlap(tail, head) == 4
+    tail, head = ids("subah khaali pet", "subah khaali pett aana hai")
+    assert fuzzy_overlap(tail, head) == 3
+
+
+def test_fuzzy_overlap_needs_two_matching_tokens():
+    # One matching word next to an edit is not enough evidence of an overlap
+    tail, head = ids("khaali pet", "khaali pett aana hai")
+    assert fuzzy_overlap(tail, head) == 0
+
+
+def test_fuzzy_overlap_rejects_unrelated_heads():
+    tail, head = ids("teen din se bukhaar", "sir mein dard hai")
+    assert fuzzy_overlap(tail, head) == 0
+
+
+def test_trim_drops_repeated_words_only():
+    aligner = TranscriptAligner()
+    assert aligner.trim("mujhe teen din se bukhaar", "din se bukhaar hai aur khaansi",
+                        previous_duration=6.0, overlap_seconds=1.0) == "hai aur khaansi"
+    assert aligner.trim("mujhe bukhaar", "khaansi bhi hai",
+                        previous_duration=6.0, overlap_seconds=1.0) == "khaansi bhi hai"
+
+
+def test_trim_with_an_edge_word_heard_differently():
+    aligner = TranscriptAligner()
+    assert aligner.trim("dawa subah aur shaam", "subah aur shyam khaana ke baad",
+                        previous_duration=6.0, overlap_seconds=1.0) == "khaana ke baad"
+
+
+def test_trim_keeps_the_word_after_a_repeated_edge_word():
+    # Only the repeated edge word goes; the next word is real speech, not an insertion
+    aligner = TranscriptAligner()
+    assert aligner.trim("the patient has fever since", "since two days no cough") == "two days no cough"
+    assert aligner.trim("pain in the chest", "chest pain started yesterday") == "pain started yesterday"
+
+
+def test_merge_keeps_the_word_after_a_repeated_edge_word():
+    chunks = [
+        SimpleNamespace(text="the patient has fever since", start_time=0.0, end_time=6.0),
+        SimpleNamespace(text="since two days no cough", start_time=5.0, end_time=11.0),
+        SimpleNamespace(text="pain in the chest", start_time=10.0, end_time=16.0),
+        SimpleNamespace(text="chest pain started yesterday", start_time=15.0, end_time=21.0),
+    ]
+    assert TranscriptAligner().merge(chunks) == (
+        "the patient has fever since two days no cough pain in the chest pain started yesterday"
+    )
+
+
+def test_merge_skips_empty_chunks_and_joins_in_order():
+    chunks = [
+        SimpleNamespace(text="patient ko teen din se", start_time=0.0, end_time=6.0),
+        SimpleNamespace(text="", start_time=5.9, end_time=11.9),
+        SimpleNamespace(text="din se bukhaar hai", start_time=5.0, end_time=11.0),
+    ]
+    # The empty chunk is skipped; the next is aligned against the last non-empty one
+    assert TranscriptAligner().merge(chunks) == "patient ko teen din se bukhaar hai"
+
+
+def test_window_follows_overlap_duration():
+    aligner = TranscriptAligner(max_window=48)
+    assert aligner.window(12, 6.0, 0) == 0
+    assert aligner.window(12, 6.0, 1.0) == 5
+    assert aligner.window(12, None, None) == 48
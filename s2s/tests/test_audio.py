@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from audio import concatenate_wav, decode_wav, encode_wav
+
+
+def constant(value, frames, rate=16000, channels=1):
+    samples = np.full((frames, channels) if channels > 1 else frames, value, dtype=np.int16)
+    return encode_wav(samples, rate)
+
+
+def test_encode_decode_round_trip():
+    samples = (np.arange(-800, 800, dtype=np.int16) * 20)
+    decoded, rate = decode_wav(encode_wav(samples, 22050))
+    assert rate == 22050
+    assert np.allclose(decoded[:, 0] * 32768.0, samples)
+
+
+def test_concatenate_crossfades_seams():
+    combined, rate = decode_wav(concatenate_wav([constant(1000, 1600), constant(3000, 1600)], crossfade_ms=10))
+    fade = 160
+    assert rate == 16000
+    assert len(combined) == 3200 - fade
+    values = np.round(combined[:, 0] * 32767.0)
+    assert values[0] == pytest.approx(1000, abs=1)
+    assert values[-1] == pytest.approx(3000, abs=1)
+    # The seam ramps monotonically instead of jumping
+    seam = values[1600 - fade:1600]
+    assert np.all(np.diff(seam) >= 0)
+
+
+def test_concatenate_matches_first_chunk_format():
+    stereo_8k = constant(2000, 800, rate=8000, channels=2)
+    mono_16k = constant(2000, 1600)
+    combined, rate = decode_wav(concatenate_wav([stereo_8k, mono_16k], crossfade_ms=0))
+    assert rate == 8000
+    assert combined.shape == (1600, 2)
+
+
+def test_concatenate_rejects_empty_input():
+    with pytest.raises(ValueError):
+        concatenate_wav([])
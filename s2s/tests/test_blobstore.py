@@ -0,0 +1,85 @@
+import io
+import os
+import time
+
+from blobstore import AudioStore
+
+
+def make_store(tmp_path, **kwargs):
+    return AudioStore(root=str(tmp_path / "store"), **kwargs)
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = make_store(tmp_path)
+    first = store.put_bytes(b"a" * 100)
+    second = store.put_stream(io.BytesIO(b"a" * 100))
+    assert first.digest == second.digest
+    assert store.bytes_stored == 100
+    assert store.counters["writes"] == 1
+    assert store.counters["dedup_hits"] == 1
+    assert os.listdir(store.temp_dir) == []
+
+
+def test_least_recently_used_blob_is_evicted_over_limit(tmp_path):
+    store = make_store(tmp_path, max_bytes=250)
+    old = store.put_bytes(b"a" * 100)
+    used = store.put_bytes(b"b" * 100)
+    # Touching the first blob makes the second one the eviction candidate
+    assert store.get(old.digest) is not None
+    newest = store.put_bytes(b"c" * 100)
+    assert store.get(used.digest) is None
+    assert store.get(old.digest) is not None
+    assert store.get(newest.digest) is not None
+    assert store.bytes_stored == 200
+    assert not os.path.exists(used.path)
+    assert store.counters["evicted"] == 1
+
+
+def test_pinned_blob_survives_eviction(tmp_path):
+    store = make_store(tmp_path, max_bytes=150)
+    held = store.put_bytes(b"a" * 100)
+    with store.pinned(held.digest):
+        other = store.put_bytes(b"b" * 100)
+        # Both are pinned while the second one is written; the next pass
+        # has to drop the unpinned one even though it is more recent
+        assert store.snapshot()["blobs"] == 1
+        assert store.get(held.digest) is not None
+        assert store.get(other.digest) is None
+    assert os.path.exists(held.path)
+
+
+def test_oversized_blob_is_returned_then_evicted(tmp_path):
+    store = make_store(tmp_path, max_bytes=50)
+    blob = store.put_bytes(b"a" * 100)
+    # The commit itself is pinned, so the new blob outlives its own write
+    assert blob.size == 100
+    assert store.snapshot()["blobs"] == 0
+    assert store.bytes_stored == 0
+
+
+def test_expired_blob_is_a_miss(tmp_path):
+    store = make_store(tmp_path, ttl_seconds=60)
+    blob = store.put_bytes(b"a" * 100)
+    store._index[blob.digest][1] = time.time() - 120
+    assert store.get(blob.digest) is None
+    assert store.counters["expired"] == 1
+    assert store.bytes_stored == 0
+    assert not os.path.exists(blob.path)
+
+
+def test_index_is_rebuilt_in_access_order_after_restart(tmp_path):
+    store = make_store(tmp_path)
+    old = store.put_bytes(b"a" * 100)
+    new = store.put_bytes(b"b" * 100)
+    now = time.time()
+    os.utime(old.path, (now - 30, now - 30))
+    os.utime(new.path, (now - 10, now - 10))
+    leftover = os.path.join(store.temp_dir, "partial")
+    with open(leftover, "wb") as out:
+        out.write(b"x")
+
+    restarted = make_store(tmp_path, max_bytes=150)
+    assert not os.path.exists(leftover)
+    assert restarted.get(old.digest) is None
+    assert restarted.get(new.digest) is not None
+    assert restarted.bytes_stored == 100
@@ -0,0 +1,148 @@
+import json
+import time
+
+import numpy as np
+import pytest
+import requests
+
+from audio import encode_wav
+from s2s import S2SPipeline
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, content=None, content_type="application/json"):
+        self.status_code = status_code
+        self.content = content if content is not None else json.dumps(body).encode("utf-8")
+        self.headers = {"Content-Type": content_type}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakeGateway:
+    """Answers /asr, /mt and /tts like the API server; asr_failures maps chunk id -> response or exception"""
+
+    def __init__(self, asr_failures=None, asr_text=None):
+        self.asr_failures = dict(asr_failures or {})
+        self.asr_text = asr_text or (lambda chunk_id: f"shabd{chunk_id}")
+        self.calls = {"asr": 0, "mt": 0, "tts": 0}
+
+    def post(self, url, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        if endpoint == "asr":
+            chunk_id = int(kwargs["files"]["audio_file"][0].split("_")[1].split(".")[0])
+            failure = self.asr_failures.get(chunk_id)
+            if isinstance(failure, Exception):
+                raise failure
+            if failure is not None:
+                return failure
+            return FakeResponse(body={"status": "success", "data": {"recognized_text": self.asr_text(chunk_id)}})
+        if endpoint == "mt":
+            text = kwargs["json"]["text"]
+            return FakeResponse(body={"status": "success", "data": {"output_text": text.upper()}})
+        return FakeResponse(content=encode_wav(np.zeros(1600, dtype=np.int16)), content_type="audio/wav")
+
+
+@pytest.fixture
+def input_wav(tmp_path):
+    path = tmp_path / "input.wav"
+    path.write_bytes(encode_wav(np.zeros(16000 * 14, dtype=np.int16)))
+    return str(path)
+
+
+def make_pipeline(gateway):
+    pipeline = S2SPipeline("hi", "en", max_workers=2, validate=False)
+    pipeline.session = gateway
+    return pipeline
+
+
+def test_failures_are_reset_between_runs(input_wav, tmp_path):
+    pipeline = make_pipeline(FakeGateway({1: requests.exceptions.ConnectionError("gateway down")}))
+    assert pipeline.process_file(input_wav, str(tmp_path / "out1.wav"), checkpoint_root=str(tmp_path / "ckpt"))
+    assert [failure["stage"] for failure in pipeline.failures] == ["asr"]
+
+    pipeline.session = FakeGateway()
+    assert pipeline.process_file(input_wav, str(tmp_path / "out2.wav"), checkpoint_root=str(tmp_path / "ckpt"))
+    assert pipeline.failures == []
+
+
+def test_gateway_errors_are_retried_and_never_checkpointed(input_wav, tmp_path):
+    busy = FakeResponse(503, {"status": "error", "message": "Server busy, retry later"})
+    gateway = FakeGateway({1: busy})
+    pipeline = make_pipeline(gateway)
+    checkpoint_root = str(tmp_path / "ckpt")
+
+    assert pipeline.process_file(input_wav, str(tmp_path / "out.wav"), checkpoint_root=checkpoint_root)
+    assert [(failure["stage"], failure["index"]) for failure in pipeline.failures] == [("asr", 1)]
+    assert gateway.calls["asr"] == 3 + 1  # three chunks, one retry of the failed one
+    assert pipeline.checkpoint.load_text("asr", 1) is None
+
+    # Resuming only asks ASR for the chunk that failed
+    gateway = FakeGateway()
+    pipeline = make_pipeline(gateway)
+    assert pipeline.process_file(input_wav, str(tmp_path / "out.wav"), resume=True, checkpoint_root=checkpoint_root)
+    assert gateway.calls["asr"] == 1
+    assert pipeline.failures == []
+
+
+def test_missing_asr_text_is_an_error(input_wav, tmp_path):
+    gateway = FakeGateway({0: FakeResponse(body={"status": "success", "data": {}})})
+    pipeline = make_pipeline(gateway)
+    pipeline.process_file(input_wav, str(tmp_path / "out.wav"), checkpoint_root=str(tmp_path / "ckpt"))
+    assert [(failure["stage"], failure["index"]) for failure in pipeline.failures] == [("asr", 0)]
+
+
+def test_profile_wall_time_ends_with_the_run(input_wav, tmp_path):
+    pipeline = make_pipeline(FakeGateway())
+    assert pipeline.process_file(input_wav, str(tmp_path / "out.wav"), checkpoint_root=str(tmp_path / "ckpt"))
+    first = pipeline.profile_report()
+    time.sleep(0.2)  # e.g. the CLI or batch report is built after the run
+    later = pipeline.profile_report()
+    assert later["wall_seconds"] == first["wall_seconds"]
+    assert later["rtf"] == first["rtf"]
+    assert set(first["stages"]) >= {"decode", "asr", "merge", "mt", "tts", "concat", "write"}
+
+
+def test_translation_pieces_end_on_sentence_boundaries():
+    gateway = FakeGateway()
+    pipeline = make_pipeline(gateway)
+    sentence = "Dr. Sharma ne kaha ki mareez ko teen din se tez bukhaar aur sookhi khaansi hai।"
+    text = " ".join([sentence] * 12)
+    pieces = pipeline.translate_text_chunks([text.split()])
+    assert len(pieces) == gateway.calls["mt"] > 1
+    # Every piece is whole sentences, so the translations rejoin to the whole text
+    assert all(piece.endswith("।") for piece in pieces)
+    assert " ".join(pieces) == text.upper()
+
+
+def consultation_text(chunk_id):
+    # Two sentences per chunk, the second one running on into the next chunk
+    return (f"vaakya{chunk_id} ek do teen chaar paanch chhah saat aath nau das। "
+            f"aage{chunk_id} gyaarah baarah terah chaudah pandrah solah satrah")
+
+
+def test_resume_redoes_only_the_pieces_of_a_filled_in_chunk(tmp_path):
+    input_wav = tmp_path / "long.wav"
+    input_wav.write_bytes(encode_wav(np.zeros(16000 * 40, dtype=np.int16)))
+    checkpoint_root = str(tmp_path / "ckpt")
+
+    gateway = FakeGateway({3: requests.exceptions.ConnectionError("gateway down")}, asr_text=consultation_text)
+    pipeline = make_pipeline(gateway)
+    assert pipeline.process_file(str(input_wav), str(tmp_path / "out.wav"), checkpoint_root=checkpoint_root)
+    assert [(failure["stage"], failure["index"]) for failure in pipeline.failures] == [("asr", 3)]
+    assert gateway.calls["mt"] == gateway.calls["tts"] == 7
+
+    # Chunk 3 now joins the pieces on either side of it; every other piece is reused
+    gateway = FakeGateway(asr_text=consultation_text)
+    pipeline = make_pipeline(gateway)
+    assert pipeline.process_file(str(input_wav), str(tmp_path / "out.wav"), resume=True,
+                                 checkpoint_root=checkpoint_root)
+    assert pipeline.failures == []
+    assert gateway.calls["asr"] == 1
+    assert gateway.calls["mt"] == gateway.calls["tts"] == 2
+    assert pipeline.checkpoint.stats["mt"] == {"reused": 5, "computed": 2}
@@ -0,0 +1,36 @@
+import io
+import os
+import tempfile
+
+import pytest
+
+# The server opens its blob store on import
+os.environ.setdefault("S2S_STORE_DIR", tempfile.mkdtemp(prefix="s2s_store_test_"))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return server.app.test_client()
+
+
+def post_stream(client, **form):
+    data = {"audio": (io.BytesIO(b"RIFF"), "clip.wav"), "source_lang": "hi", "dest_lang": "en", **form}
+    return client.post("/s2s/stream", data=data, content_type="multipart/form-data")
+
+
+@pytest.mark.parametrize("form", [
+    {"chunk_duration": "six"},
+    {"overlap": "a bit"},
+    {"chunk_duration": "0"},
+    {"chunk_duration": "-6"},
+    {"overlap": "-1"},
+    {"chunk_duration": "6", "overlap": "6"},
+    {"overlap": "nan"},
+])
+def test_stream_rejects_bad_chunking_options(client, form):
+    response = post_stream(client, **form)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert server.store.snapshot()["writes"] == 0
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+import sessions
+from blobstore import AudioStore
+
+
+class FakePipeline:
+    built = 0
+
+    def __init__(self, source_lang, dest_lang, max_workers=2, validate=True):
+        FakePipeline.built += 1
+        self.source_lang = source_lang
+        self.dest_lang = dest_lang
+        self.original_text = "bukhaar hai"
+        self.translated_text = "I have a fever"
+        self.calls = 0
+        self.session = self
+
+    def translate_file_simple(self, input_path):
+        self.calls += 1
+        return b"RIFF" + bytes([self.calls]) * 100
+
+    def profile_report(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AudioStore(root=str(tmp_path / "store"))
+
+
+@pytest.fixture(autouse=True)
+def fake_pipeline(monkeypatch):
+    FakePipeline.built = 0
+    monkeypatch.setattr(sessions, "S2SPipeline", FakePipeline)
+
+
+def test_full_manager_rejects_before_validating(store):
+    manager = sessions.SessionManager(store, max_sessions=1)
+    manager.create("hi", "en")
+    assert FakePipeline.built == 2
+    with pytest.raises(RuntimeError):
+        manager.create("hi", "en")
+    assert FakePipeline.built == 2
+
+
+def test_failed_validation_releases_its_slot(store, monkeypatch):
+    manager = sessions.SessionManager(store, max_sessions=1)
+
+    def unreachable(*args, **kwargs):
+        raise RuntimeError("gateway down")
+    monkeypatch.setattr(sessions, "S2SPipeline", unreachable)
+    with pytest.raises(RuntimeError):
+        manager.create("hi", "en")
+    monkeypatch.setattr(sessions, "S2SPipeline", FakePipeline)
+    assert manager.create("hi", "en").id in manager.sessions
+
+
+def test_cached_turn_keeps_a_digest_not_audio(store):
+    session = sessions.ConversationSession(store, "hi", "en")
+    first = session.translate_turn("turn.wav", "abc")
+    assert first["cached"] is False
+    cached = session._results[("forward", "abc")]
+    assert "audio" not in cached and "audio_blob" not in cached
+    assert cached["audio_digest"] == first["audio_blob"].digest
+
+    retry = session.translate_turn("turn.wav", "abc")
+    assert retry["cached"] is True
+    assert retry["audio_blob"].digest == first["audio_blob"].digest
+    assert session.pipelines["forward"].calls == 1
+
+
+def test_expired_audio_is_translated_again(tmp_path):
+    store = AudioStore(root=str(tmp_path / "store"), ttl_seconds=60)
+    session = sessions.ConversationSession(store, "hi", "en")
+    first = session.translate_turn("turn.wav", "abc")
+    store._index[first["audio_blob"].digest][1] = time.time() - 120
+
+    retry = session.translate_turn("turn.wav", "abc")
+    assert retry["cached"] is False
+    assert session.pipelines["forward"].calls == 2
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import numpy as np
+
+from s2s import AudioChunk, S2SPipeline
+
+
+def make_pipeline(chunks=50, fail_asr_at=None):
+    pipeline = S2SPipeline("hi", "en", validate=False)
+
+    def iter_audio_chunks(path):
+        for i in range(chunks):
+            yield AudioChunk(np.zeros(160, dtype=np.int16), i * 1.0, (i + 1) * 1.0, i)
+
+    def process_asr(chunk):
+        if chunk.chunk_id == fail_asr_at:
+            raise RuntimeError("ASR failed")
+        chunk.text = f"vaakya {chunk.chunk_id}"
+        return chunk.text
+
+    pipeline.iter_audio_chunks = iter_audio_chunks
+    pipeline.process_asr = process_asr
+    pipeline.translate_text = lambda text, chunk_id=None: f"sentence {chunk_id}"
+    pipeline.synthesize_speech = lambda text, chunk_id=None: b"RIFF"
+    return pipeline
+
+
+def wait_for_threads(baseline, timeout=5.0):
+    deadline = time.time() + timeout
+    while threading.active_count() > baseline and time.time() < deadline:
+        time.sleep(0.05)
+    return threading.active_count()
+
+
+def test_streaming_yields_every_chunk_then_summary():
+    items = list(make_pipeline(chunks=5).process_file_streaming("input.wav"))
+    assert [item["type"] for item in items] == ["chunk"] * 5 + ["summary"]
+    assert items[-1]["translated_text"] == " ".join(f"sentence {i}" for i in range(5))
+
+
+def test_closing_the_stream_early_stops_every_stage():
+    baseline = threading.active_count()
+    stream = make_pipeline(chunks=200).process_file_streaming("input.wav")
+    assert next(stream)["type"] == "chunk"
+    stream.close()  # client disconnected
+    assert wait_for_threads(baseline) == baseline
+
+
+def test_stage_failure_is_reported_and_threads_exit():
+    baseline = threading.active_count()
+    items = list(make_pipeline(chunks=20, fail_asr_at=3).process_file_streaming("input.wav"))
+    assert items[-1] == {"type": "error", "stage": "asr", "error": "ASR failed"}
+    assert wait_for_threads(baseline) == baseline
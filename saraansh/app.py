@@ -2,15 +2,27 @@
 Saraansh API - Clinical Transcript Processing Service
 Endpoints:
   - /soap_notes - Generate SOAP notes from clinical transcripts
+  - /soap_notes/stream - Same, streamed section by section over Server-Sent Events
+  - /soap_notes/update - Update running SOAP notes with the turns since a message order
   - /action_items - Generate patient action items from consultations
+  - /consultation_bundle - SOAP notes and action items in one pass
+  - /batch - Many transcripts at once, results streamed as they finish
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+import json
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from transcript_processor import TranscriptProcessor
+# gemini_schema is shared with Lipigyan and lives at the repository root
+# (the Docker image copies it next to this file)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_processor import TranscriptProcessor, PROMPT_CACHE
+from transcript_processor.config import BATCH_CONCURRENCY, BATCH_MAX_ITEMS
+from transcript_processor.limits import GEMINI_LIMIT, MT_LIMIT
 
 app = Flask(__name__)
 
@@ -26,7 +38,12 @@ def home():
         "message": "Saraansh - Clinical Transcript Processing API",
         "endpoints": {
             "POST /soap_notes": "Generate SOAP notes from clinical transcript",
+            "POST /soap_notes/stream": "Stream SOAP notes section by section (Server-Sent Events)",
+            "POST /soap_notes/update": "Update running SOAP notes with new transcript turns",
             "POST /action_items": "Generate patient action items from consultation",
+            "POST /consultation_bundle": "Generate SOAP notes and action items in one pass",
+            "POST /batch": "Process many transcripts, streaming results as NDJSON",
+            "GET /metrics/prompt_cache": "Gemini prompt-result cache statistics",
             "GET /": "Health check"
         },
         "supported_languages": [
@@ -135,6 +152,155 @@ def generate_soap_notes():
         }), 500
 
 
+@app.route('/soap_notes/stream', methods=['POST'])
+def stream_soap_notes():
+    """
+    Stream SOAP notes as Server-Sent Events, one section at a time
+    
+    Request Body (JSON): same as /soap_notes
+    
+    Events:
+        english_transcript  {"english_transcript": "..."}
+        section             {"section": "subjective", "english": "..."}
+        section_native      {"section": "subjective", "native": "...", "success": true}
+        done                same fields as the /soap_notes data, plus warnings
+        error               {"error": "..."}
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({
+            "status": "error",
+            "error": "No JSON data provided"
+        }), 400
+    
+    transcript = data.get('transcript')
+    source_language = data.get('source_language')
+    
+    if not transcript:
+        return jsonify({
+            "status": "error",
+            "error": "transcript field is required"
+        }), 400
+    
+    if not source_language:
+        return jsonify({
+            "status": "error",
+            "error": "source_language field is required"
+        }), 400
+    
+    target_language = data.get('target_language', source_language)
+    processor = TranscriptProcessor(api_base_url=API_SERVER_URL)
+    
+    def generate():
+        try:
+            for event in processor.stream_clinical_transcript(transcript, source_language, target_language):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/soap_notes/update', methods=['POST'])
+def update_soap_notes():
+    """
+    Update running SOAP notes with the transcript turns added since the last update
+    
+    Request Body (JSON):
+    {
+        "previous_soap_notes": {"subjective": "...", ...},   // English; {} for the first update
+        "previous_soap_notes_native": {...},                 // optional, reused for unchanged sections
+        "transcript": [{"order": 0, "speaker": "user", "originalText": "...", ...}, ...],
+        "since_order": 11,          // only turns with a greater order are used
+        "source_language": "Hindi",
+        "target_language": "Hindi"  // optional, defaults to source_language
+    }
+    "new_turns" may be sent instead of transcript + since_order.
+    
+    Response:
+    {
+        "status": "success",
+        "data": {
+            "soap_notes_english": {...},
+            "soap_notes_native": {...},
+            "changed_sections": ["subjective", "plan"],
+            "last_order": 14,       // send as since_order next time
+            ...
+        }
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "status": "error",
+                "error": "No JSON data provided"
+            }), 400
+        
+        source_language = data.get('source_language')
+        if not source_language:
+            return jsonify({
+                "status": "error",
+                "error": "source_language field is required"
+            }), 400
+        
+        if 'new_turns' in data:
+            new_turns = data.get('new_turns') or []
+        elif isinstance(data.get('transcript'), list):
+            since_order = data.get('since_order')
+            new_turns = [turn for turn in data['transcript']
+                         if since_order is None or turn.get('order', 0) > since_order]
+        else:
+            return jsonify({
+                "status": "error",
+                "error": "new_turns or transcript (list of messages) is required"
+            }), 400
+        
+        target_language = data.get('target_language', source_language)
+        
+        processor = TranscriptProcessor(api_base_url=API_SERVER_URL)
+        result = processor.update_clinical_notes(
+            previous_notes=data.get('previous_soap_notes') or {},
+            new_turns=new_turns,
+            source_language=source_language,
+            target_language=target_language,
+            previous_notes_native=data.get('previous_soap_notes_native')
+        )
+        
+        if result["success"]:
+            return jsonify({
+                "status": "success",
+                "data": {
+                    "soap_notes_english": result["soap_notes_english"],
+                    "soap_notes_native": result["soap_notes_native"],
+                    "changed_sections": result["changed_sections"],
+                    "last_order": result["last_order"] if result["last_order"] is not None else data.get('since_order'),
+                    "english_delta": result["english_delta"],
+                    "source_language": result["source_language"],
+                    "target_language": result["target_language"],
+                    "processing_type": result["processing_type"]
+                }
+            }), 200
+        else:
+            return jsonify({
+                "status": "error",
+                "error": result.get("error", "SOAP notes update failed"),
+                "steps": result.get("steps", {})
+            }), 500
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "error": str(e)
+        }), 500
+
+
 @app.route('/action_items', methods=['POST'])
 def generate_action_items():
     """
@@ -230,6 +396,164 @@ def generate_action_items():
         }), 500
 
 
+@app.route('/consultation_bundle', methods=['POST'])
+def generate_consultation_bundle():
+    """
+    Generate SOAP notes and action items for the same consultation in one pass
+    (one translation to English, concurrent Gemini calls, one back-translation batch)
+    
+    Request Body (JSON):
+    {
+        "transcript": "Consultation transcript text",
+        "source_language": "Hindi",
+        "target_language": "Hindi"  // optional, defaults to source_language
+    }
+    
+    Response:
+    {
+        "status": "success",
+        "data": {
+            "soap_notes_english": {...},
+            "soap_notes_native": {...},
+            "action_items_english": {...},
+            "action_items_native": "Formatted text in native language",
+            "original_transcript": "...",
+            "english_transcript": "...",
+            "source_language": "Hindi",
+            "target_language": "Hindi"
+        }
+    }
+    """
+    try:
+        # Get JSON data
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                "status": "error",
+                "error": "No JSON data provided"
+            }), 400
+        
+        # Validate required fields
+        transcript = data.get('transcript')
+        source_language = data.get('source_language')
+        
+        if not transcript:
+            return jsonify({
+                "status": "error",
+                "error": "transcript field is required"
+            }), 400
+        
+        if not source_language:
+            return jsonify({
+                "status": "error",
+                "error": "source_language field is required"
+            }), 400
+        
+        target_language = data.get('target_language', source_language)
+        
+        # Process transcript
+        processor = TranscriptProcessor(api_base_url=API_SERVER_URL)
+        result = processor.process_consultation_bundle(
+            transcript=transcript,
+            source_language=source_language,
+            target_language=target_language
+        )
+        
+        if result["success"]:
+            return jsonify({
+                "status": "success",
+                "data": {
+                    "soap_notes_english": result["soap_notes_english"],
+                    "soap_notes_native": result["soap_notes_native"],
+                    "action_items_english": result["action_items_english"],
+                    "action_items_native": result["action_items_native"],
+                    "original_transcript": result["original_transcript"],
+                    "english_transcript": result["english_transcript"],
+                    "source_language": result["source_language"],
+                    "target_language": result["target_language"],
+                    "processing_type": result["processing_type"]
+                }
+            }), 200
+        else:
+            return jsonify({
+                "status": "error",
+                "error": result.get("error", "Consultation bundle generation failed"),
+                "steps": result.get("steps", {})
+            }), 500
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "error": str(e)
+        }), 500
+
+
+@app.route('/batch', methods=['POST'])
+def process_batch():
+    """
+    Process many transcripts (e.g. a clinic's whole day) in one request
+    
+    Request Body (JSON):
+    {
+        "items": [
+            {"id": "visit-1", "type": "soap_notes", "transcript": "...",
+             "source_language": "Hindi", "target_language": "Hindi"},
+            ...
+        ],
+        "concurrency": 8   // optional positive integer, capped at BATCH_CONCURRENCY
+                           // and at the Gemini + MT concurrency limits
+    }
+    type is "soap_notes" (default), "action_items" or "consultation_bundle".
+    
+    Response: application/x-ndjson - one line per item as it finishes (the
+    same fields as the single-item endpoints plus id, index, seconds), then a
+    summary line with throughput and Gemini/MT call counts.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return jsonify({
+            "status": "error",
+            "error": "items field (non-empty list) is required"
+        }), 400
+    
+    items = data['items']
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({
+            "status": "error",
+            "error": f"At most {BATCH_MAX_ITEMS} items per batch"
+        }), 400
+    
+    # More items in flight than both upstream limits admit would only queue
+    max_concurrency = max(1, min(BATCH_CONCURRENCY, GEMINI_LIMIT.max_concurrent + MT_LIMIT.max_concurrent))
+    concurrency = data.get('concurrency', max_concurrency)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return jsonify({
+            "status": "error",
+            "error": "concurrency must be a positive integer"
+        }), 400
+    concurrency = min(concurrency, max_concurrency)
+    
+    # One processor for the batch: identical translations across items are made once
+    processor = TranscriptProcessor(api_base_url=API_SERVER_URL, dedupe_translations=True)
+    
+    def generate():
+        for result in processor.process_batch(items, concurrency=concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+
+@app.route('/metrics/prompt_cache', methods=['GET'])
+def prompt_cache_metrics():
+    """Gemini prompt-result cache size and hit/miss counters"""
+    return jsonify({
+        "status": "success",
+        "data": PROMPT_CACHE.snapshot()
+    })
+
+
 if __name__ == '__main__':
     print("\n" + "="*70)
     print("Saraansh - Clinical Transcript Processing API")
@@ -237,7 +561,11 @@ if __name__ == '__main__':
     print(f"Using MT API Server: {API_SERVER_URL}")
     print("\nEndpoints:")
     print("  POST /soap_notes    - Generate SOAP notes from clinical transcript")
+    print("  POST /soap_notes/stream - Stream SOAP notes section by section (SSE)")
+    print("  POST /soap_notes/update - Update running SOAP notes with new turns")
     print("  POST /action_items  - Generate patient action items")
+    print("  POST /batch         - Process many transcripts (NDJSON results)")
+    print("  POST /consultation_bundle - SOAP notes and action items in one pass")
     print("  GET  /              - Health check")
     print("\nStarting server on http://0.0.0.0:5003")
     print("="*70 + "\n")
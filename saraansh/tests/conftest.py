@@ -0,0 +1,11 @@
+import os
+import sys
+
+# transcript_processor is imported as a package from the saraansh directory (as app.py does),
+# and the shared gemini_schema package from the repository root
+SARAANSH_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SARAANSH_DIR)
+sys.path.append(os.path.dirname(SARAANSH_DIR))
+
+# The package reads its config on import; no request here reaches Gemini
+os.environ.setdefault('GEMINI_API_KEY', 'test')
@@ -0,0 +1,29 @@
+from unittest import mock
+
+import pytest
+
+import app as saraansh_app
+
+
+@pytest.fixture
+def client():
+    return saraansh_app.app.test_client()
+
+
+ITEMS = [{"id": "visit-1", "transcript": "Doctor: How are you?", "source_language": "English"}]
+
+
+@pytest.mark.parametrize("concurrency", ["8", 0, -2, 1.5, True, None])
+def test_batch_rejects_bad_concurrency(client, concurrency):
+    response = client.post("/batch", json={"items": ITEMS, "concurrency": concurrency})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_batch_concurrency_is_capped(client):
+    with mock.patch.object(saraansh_app.TranscriptProcessor, "process_batch", return_value=iter([])) as process:
+        response = client.post("/batch", json={"items": ITEMS, "concurrency": 10 ** 6})
+        response.get_data()
+    assert response.status_code == 200
+    capacity = saraansh_app.GEMINI_LIMIT.max_concurrent + saraansh_app.MT_LIMIT.max_concurrent
+    assert process.call_args.kwargs["concurrency"] == min(saraansh_app.BATCH_CONCURRENCY, capacity)
@@ -0,0 +1,32 @@
+from transcript_processor.longform import estimate_tokens, segment_transcript, split_turns
+
+
+def test_continuation_lines_stay_with_their_turn():
+    transcript = "Doctor: How long?\nabout three days\n\nPatient 2: Since Monday.\nडॉक्टर: ठीक है।"
+    assert split_turns(transcript) == [
+        "Doctor: How long?\nabout three days",
+        "Patient 2: Since Monday.",
+        "डॉक्टर: ठीक है।",
+    ]
+
+
+def test_indic_text_is_estimated_higher_per_character():
+    assert estimate_tokens("क" * 40) > estimate_tokens("a" * 40)
+
+
+def test_turns_are_packed_within_budget_in_order():
+    turns = [f"Doctor: question number {i} about the cough." if i % 2 == 0
+             else f"Patient: answer number {i}, it started last week." for i in range(40)]
+    segments = segment_transcript("\n".join(turns), max_tokens=60)
+    assert len(segments) > 1
+    assert all(estimate_tokens(segment) <= 60 + len(segment.splitlines()) for segment in segments)
+    # Whole turns, nothing lost or reordered
+    assert "\n".join(segments).splitlines() == turns
+
+
+def test_oversized_turn_is_cut_on_sentences():
+    turn = "Patient: " + " ".join(f"Sentence {i} is about my symptoms." for i in range(30))
+    segments = segment_transcript(turn, max_tokens=40)
+    assert len(segments) > 1
+    assert all(estimate_tokens(segment) <= 40 for segment in segments)
+    assert " ".join(segments).split() == turn.split()
@@ -0,0 +1,55 @@
+import json
+
+from transcript_processor import PromptCache, TranscriptProcessor
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": self.text}]}}]}
+
+
+class FakeGemini:
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.text)
+
+
+def make_processor(answer):
+    gemini = FakeGemini(answer)
+    return TranscriptProcessor(api_base_url="http://mt.invalid", cache=PromptCache(), session=gemini), gemini
+
+
+COMPLETE = json.dumps({"subjective": "Cough", "objective": "Clear chest", "assessment": "URTI", "plan": "Rest"})
+
+
+def test_complete_answer_is_cached_without_warnings():
+    processor, gemini = make_processor(COMPLETE)
+    result = processor.process_clinical_transcript("Doctor: How are you?", "English")
+    assert result["success"] is True
+    assert result["truncated"] is False
+    assert "warnings" not in result
+    processor.process_clinical_transcript("Doctor: How are you?", "English")
+    assert gemini.calls == 1
+
+
+def test_truncated_answer_is_flagged_and_not_cached():
+    processor, gemini = make_processor(COMPLETE[:-3])
+    result = processor.process_clinical_transcript("Doctor: How are you?", "English")
+    assert result["success"] is True
+    assert result["truncated"] is True
+    assert result["warnings"] == ["SOAP notes were cut off at the output limit and may be incomplete"]
+    assert result["soap_notes_english"]["plan"] == "Res"
+    assert processor.counters["json_truncated"] == 1
+    # A retry asks Gemini again instead of serving the cut-off notes from the cache
+    processor.process_clinical_transcript("Doctor: How are you?", "English")
+    assert gemini.calls == 2
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from gemini_schema import CompiledSchema, SchemaError, repair_json
+from transcript_processor.schemas import ACTION_ITEMS, SOAP_NOTES
+
+SOAP = {"subjective": "Cough", "objective": "Clear chest", "assessment": "URTI", "plan": "Rest"}
+
+
+def test_valid_json_takes_the_fast_path():
+    parsed = SOAP_NOTES.parse(json.dumps(SOAP))
+    assert parsed.value == SOAP
+    assert parsed.repaired is False
+    assert parsed.truncated is False
+
+
+@pytest.mark.parametrize("text", [
+    "```json\n" + json.dumps(SOAP) + "\n```",
+    "Here are the notes: " + json.dumps(SOAP) + " Let me know if you need more.",
+    '{"subjective": "Cough", "objective": "Clear chest", "assessment": "URTI", "plan": "Rest",}',
+])
+def test_near_misses_are_repaired(text):
+    parsed = SOAP_NOTES.parse(text)
+    assert parsed.value == SOAP
+    assert parsed.repaired is True
+    assert parsed.truncated is False
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "cut off mid', {"a": "cut off mid"}),
+    ('{"a": "x\\', {"a": "x"}),
+    ('{"a": ["x", "y",', {"a": ["x", "y"]}),
+    ('{"a": {"b": 1}, "c"', {"a": {"b": 1}}),
+    ('{"a": 1, "c":', {"a": 1}),
+    ('{"a": "has } and ] inside", "b": [1, 2', {"a": "has } and ] inside", "b": [1, 2]}),
+])
+def test_truncated_answers_are_closed(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_cut_off_answer_is_reported_as_truncated():
+    parsed = SOAP_NOTES.parse('{"subjective": "Cough", "objective": "Clear", "assessment": "URTI", "plan": "Rest and')
+    assert parsed.value["plan"] == "Rest and"
+    assert parsed.repaired is True
+    assert parsed.truncated is True
+
+
+def test_text_after_the_object_is_dropped():
+    assert json.loads(repair_json('{"a": [1, 2]} {"b": 3}')) == {"a": [1, 2]}
+
+
+def test_no_object_is_a_schema_error():
+    with pytest.raises(SchemaError):
+        SOAP_NOTES.parse("I could not produce notes for this transcript.")
+
+
+def test_missing_required_key_is_a_schema_error():
+    with pytest.raises(SchemaError, match="plan"):
+        SOAP_NOTES.parse(json.dumps({key: SOAP[key] for key in ("subjective", "objective", "assessment")}))
+
+
+def test_type_slips_are_coerced():
+    answer = {
+        "medications": {"name": "Paracetamol", "dosage": 500},
+        "lifestyle_changes": "Drink water",
+        "summary": "Take medicine",
+    }
+    value = ACTION_ITEMS.parse(json.dumps(answer)).value
+    assert value["medications"] == [{"name": "Paracetamol", "dosage": "500"}]
+    assert value["lifestyle_changes"] == ["Drink water"]
+
+
+def test_nested_required_and_wrong_types_fail():
+    with pytest.raises(SchemaError, match="name"):
+        ACTION_ITEMS.parse(json.dumps({"medications": [{"dosage": "1"}], "summary": "x"}))
+    with pytest.raises(SchemaError, match="expected a string"):
+        SOAP_NOTES.parse(json.dumps(dict(SOAP, plan={"steps": []})))
+
+
+def test_boolean_strings_are_coerced():
+    schema = CompiledSchema({"type": "OBJECT", "properties": {"urgent": {"type": "BOOLEAN"}}, "required": []})
+    assert schema.parse('{"urgent": "Yes"}').value == {"urgent": True}
+    assert schema.parse('{"urgent": false}').value == {"urgent": False}
+    with pytest.raises(SchemaError):
+        schema.parse('{"urgent": "maybe"}')
+
+
+def test_enum_values_are_matched_case_insensitively():
+    schema = CompiledSchema({"type": "STRING", "enum": ["normal", "abnormal"]})
+    assert schema.parse('" Abnormal"').value == "abnormal"
+    assert schema.parse('"unclear"').value == "unclear"
@@ -0,0 +1,67 @@
+import json
+
+from transcript_processor.streaming import ObjectMemberParser, iter_stream_text
+
+SOAP = {
+    "subjective": "Fever for 3 days, \"worse\" at night",
+    "objective": "Temp 101F",
+    "assessment": "Viral fever",
+    "plan": "Paracetamol {500 mg}, review in 3 days",
+}
+
+
+def feed_in_pieces(text, size):
+    parser = ObjectMemberParser()
+    members = []
+    for i in range(0, len(text), size):
+        members.extend(parser.feed(text[i:i + size]))
+    return parser, members
+
+
+def test_members_are_emitted_in_order_for_any_split():
+    text = "```json\n" + json.dumps(SOAP, indent=2) + "\n```"
+    for size in (1, 2, 3, 7, len(text)):
+        parser, members = feed_in_pieces(text, size)
+        assert members == list(SOAP.items())
+        assert parser.state == "done"
+
+
+def test_member_is_emitted_as_soon_as_it_is_complete():
+    parser = ObjectMemberParser()
+    assert parser.feed('{"subjective": "Fever') == []
+    assert parser.feed('", "objective": "Te') == [("subjective", "Fever")]
+    assert parser.feed('mp"}') == [("objective", "Temp")]
+
+
+def test_nested_and_bare_values():
+    value = {"medications": [{"name": "A", "note": "x]}"}], "count": 2, "urgent": True, "summary": None}
+    _, members = feed_in_pieces(json.dumps(value), 1)
+    assert members == list(value.items())
+
+
+def test_escaped_quotes_in_keys_and_values():
+    value = {"a \"quoted\" key": "back\\slash \"end\""}
+    _, members = feed_in_pieces(json.dumps(value), 1)
+    assert members == list(value.items())
+
+
+def test_unparseable_value_is_skipped():
+    parser = ObjectMemberParser()
+    assert parser.feed('{"a": tru, "b": "ok"}') == [("b", "ok")]
+
+
+class FakeStream:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def sse(*texts):
+    return "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": t} for t in texts]}}]})
+
+
+def test_iter_stream_text_yields_text_parts():
+    response = FakeStream([sse('{"subj'), "", ": keep-alive", sse("ective", '": "x"}'), 'data: {"candidates": []}'])
+    assert list(iter_stream_text(response)) == ['{"subj', "ective", '": "x"}']
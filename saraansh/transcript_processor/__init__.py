@@ -1,4 +1,5 @@
 from .processor import TranscriptProcessor
 from .config import GEMINI_API_KEY, API_SERVER_URL
+from .cache import PROMPT_CACHE, PromptCache
 
-__all__ = ['TranscriptProcessor', 'GEMINI_API_KEY', 'API_SERVER_URL']
+__all__ = ['TranscriptProcessor', 'PromptCache', 'PROMPT_CACHE', 'GEMINI_API_KEY', 'API_SERVER_URL']
@@ -0,0 +1,89 @@
+"""
+Prompt-result cache for Gemini generations
+
+Results are keyed on the hash of the normalized English transcript, the
+prompt template, the model and the generation config. The template enters
+the key through its own hash, so editing a prompt invalidates every result
+it produced without a manual version bump. Entries expire after a TTL and
+the least recently used ones are dropped beyond a size limit. Only parsed,
+successful results are stored.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .config import PROMPT_CACHE_SIZE, PROMPT_CACHE_TTL_SECONDS
+
+
+def template_version(template: str) -> str:
+    """Short hash of a prompt template"""
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Collapse whitespace so reformatted copies of a transcript share a key"""
+    return " ".join(transcript.split())
+
+
+class PromptCache:
+    """Thread-safe TTL + LRU cache of parsed Gemini results"""
+
+    def __init__(self, max_entries: int = PROMPT_CACHE_SIZE, ttl_seconds: float = PROMPT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def key(self, kind: str, template: str, transcript: str, model: str, generation_config: Dict) -> str:
+        transcript_hash = hashlib.sha256(normalize_transcript(transcript).encode('utf-8')).hexdigest()
+        parts = [kind, template_version(template), model, generation_config, transcript_hash]
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """A copy of the cached result, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evicted"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                **self.counters,
+            }
+
+
+# Shared by every TranscriptProcessor in the process (the app builds one per request)
+PROMPT_CACHE = PromptCache()
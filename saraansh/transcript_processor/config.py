@@ -13,8 +13,33 @@ if not GEMINI_API_KEY:
 
 GEMINI_MODEL = "gemini-2.0-flash"
 GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent"
 GEMINI_TIMEOUT = 60
 
+# Long transcripts (estimated tokens) are summarized map-reduce style in segments
+LONG_TRANSCRIPT_TOKENS = int(os.getenv('LONG_TRANSCRIPT_TOKENS', '3000'))
+SEGMENT_TOKENS = int(os.getenv('SEGMENT_TOKENS', '1500'))
+GEMINI_MAX_WORKERS = int(os.getenv('GEMINI_MAX_WORKERS', '4'))
+
+# Upstream quotas shared by every request in the process (0 = no per-minute cap)
+GEMINI_MAX_CONCURRENT = int(os.getenv('GEMINI_MAX_CONCURRENT', '8'))
+GEMINI_RPM = int(os.getenv('GEMINI_RPM', '0'))
+MT_MAX_CONCURRENT = int(os.getenv('MT_MAX_CONCURRENT', '8'))
+MT_RPM = int(os.getenv('MT_RPM', '0'))
+
+# Batch processing: transcripts in flight at once
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+
+# Prompt-result cache (parsed Gemini output, reused across requests)
+PROMPT_CACHE_SIZE = int(os.getenv('PROMPT_CACHE_SIZE', '512'))
+PROMPT_CACHE_TTL_SECONDS = float(os.getenv('PROMPT_CACHE_TTL_SECONDS', '86400'))
+
 # MT API Configuration
 API_SERVER_URL = os.getenv('API_SERVER_URL', 'http://localhost:8000')
 MT_ENDPOINT = f"{API_SERVER_URL}/mt"
+# Concurrent MT calls when translating several sections at once
+MT_MAX_WORKERS = int(os.getenv('MT_MAX_WORKERS', '4'))
+
+# Gateway admission lane for summary work (interactive traffic goes first)
+GATEWAY_HEADERS = {"X-Priority": "background"}
@@ -0,0 +1,75 @@
+"""
+Upstream limits and pooled connections for Saraansh
+
+Gemini and the MT gateway have separate quotas, so each gets its own limit:
+a cap on calls in flight and, optionally, a calls-per-minute rate (calls are
+spaced evenly rather than allowed to burst). Every TranscriptProcessor in
+the process shares these limits and one pooled HTTP session, so a batch of
+hundreds of transcripts cannot exceed either quota or open a connection per
+request.
+"""
+import threading
+import time
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import GEMINI_MAX_CONCURRENT, GEMINI_RPM, MT_MAX_CONCURRENT, MT_RPM
+
+
+class UpstreamLimit:
+    """Concurrency cap plus optional even spacing of calls to one upstream"""
+
+    def __init__(self, name: str, max_concurrent: int, per_minute: int = 0):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_minute = per_minute
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self.calls = 0
+        self.waited_seconds = 0.0
+
+    def __enter__(self):
+        started = time.monotonic()
+        self._slots.acquire()
+        if self.interval:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self.interval
+            if start > now:
+                time.sleep(start - now)
+        with self._lock:
+            self.calls += 1
+            self.waited_seconds += time.monotonic() - started
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "per_minute": self.per_minute or None,
+                "calls": self.calls,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """A requests session with a connection pool of the given size"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+GEMINI_LIMIT = UpstreamLimit("gemini", GEMINI_MAX_CONCURRENT, GEMINI_RPM)
+MT_LIMIT = UpstreamLimit("mt", MT_MAX_CONCURRENT, MT_RPM)
+HTTP_SESSION = create_session(GEMINI_LIMIT.max_concurrent + MT_LIMIT.max_concurrent)
@@ -0,0 +1,75 @@
+"""
+Long-transcript support: local token estimates and speaker-turn segmentation
+
+Long consultations are summarized map-reduce style: the transcript is cut on
+speaker turns into segments of bounded size, each segment is translated and
+reduced to findings in parallel, and the findings are then combined into the
+final notes. Token counts are estimated locally (no tokenizer round trip);
+the estimate only decides whether and where to cut, so it errs on the high
+side for Indic scripts, which tokenize into more pieces per character.
+"""
+import re
+from typing import List
+
+# "Doctor: ...", "Patient 2: ...", "डॉक्टर: ..." at the start of a line; \w alone
+# misses Indic vowel signs and viramas, so the Indic blocks are listed too
+_TURN_START = re.compile(r'^\s*[^\W\d_][\w\u0900-\u0DFF .\-]{0,30}:\s', re.UNICODE)
+_SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 characters per token for ASCII, ~2 for other scripts"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return int(ascii_chars / 4 + other_chars / 2) + 1
+
+
+def split_turns(transcript: str) -> List[str]:
+    """Split a transcript into speaker turns (lines starting with "Speaker:"), else into lines"""
+    turns: List[str] = []
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        if turns and not _TURN_START.match(line):
+            turns[-1] += "\n" + line  # continuation of the previous turn
+        else:
+            turns.append(line)
+    return turns
+
+
+def _split_oversized(turn: str, max_tokens: int) -> List[str]:
+    """Cut one very long turn on sentence boundaries (on words if a sentence is still too long)"""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(turn):
+        units = [sentence] if estimate_tokens(sentence) <= max_tokens else sentence.split()
+        for unit in units:
+            candidate = f"{current} {unit}".strip()
+            if current and estimate_tokens(candidate) > max_tokens:
+                pieces.append(current)
+                current = unit
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def segment_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """Pack consecutive speaker turns into segments of at most ~max_tokens each"""
+    segments: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for turn in split_turns(transcript):
+        turn_tokens = estimate_tokens(turn)
+        parts = [turn] if turn_tokens <= max_tokens else _split_oversized(turn, max_tokens)
+        for part in parts:
+            part_tokens = estimate_tokens(part)
+            if current and current_tokens + part_tokens > max_tokens:
+                segments.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        segments.append("\n".join(current))
+    return segments
@@ -3,29 +3,212 @@ Clinical Transcript Processor
 Handles: Clinical transcripts → SOAP notes
          Patient consultations → Action items
 """
+import json
+import queue
+import threading
+import time
 import requests
-from typing import Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
 from .config import (
     GEMINI_API_KEY, 
     GEMINI_API_URL, 
+    GEMINI_STREAM_URL,
+    GEMINI_MODEL,
     GEMINI_TIMEOUT,
-    MT_ENDPOINT
+    MT_ENDPOINT,
+    MT_MAX_WORKERS,
+    BATCH_CONCURRENCY,
+    GEMINI_MAX_WORKERS,
+    LONG_TRANSCRIPT_TOKENS,
+    SEGMENT_TOKENS,
+    GATEWAY_HEADERS
 )
+from .cache import PROMPT_CACHE, PromptCache
+from .streaming import ObjectMemberParser, iter_stream_text
+from .longform import estimate_tokens, segment_transcript
+from .limits import GEMINI_LIMIT, HTTP_SESSION, MT_LIMIT
+from .schemas import (
+    ACTION_ITEMS,
+    ACTION_ITEMS_SCHEMA,
+    FINDINGS,
+    FINDINGS_SCHEMA,
+    SOAP_NOTES,
+    SOAP_NOTES_SCHEMA,
+    CompiledSchema,
+    ParsedAnswer,
+    SchemaError,
+    structured_config
+)
+
+
+SOAP_SECTIONS = ["subjective", "objective", "assessment", "plan"]
+
+GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 2048,
+}
+
+# Structured output: Gemini answers with bare JSON of the requested shape
+SOAP_GENERATION_CONFIG = structured_config(GENERATION_CONFIG, SOAP_NOTES_SCHEMA)
+ACTION_ITEMS_GENERATION_CONFIG = structured_config(GENERATION_CONFIG, ACTION_ITEMS_SCHEMA)
+FINDINGS_GENERATION_CONFIG = structured_config(GENERATION_CONFIG, FINDINGS_SCHEMA)
+
+SOAP_PROMPT_TEMPLATE = """You are a medical AI assistant. Based on the clinical transcript provided, generate detailed SOAP (Subjective, Objective, Assessment, and Plan) notes.
+
+**Clinical Transcript:**
+{transcript}
+
+**Instructions:**
+1. Extract and organize information into SOAP format
+2. Be thorough and professional
+3. Use medical terminology appropriately
+4. If information is missing for any section, note it as "Not documented"
+
+**Return the response in JSON format with these exact keys:**
+{{
+  "subjective": "Patient's reported symptoms, complaints, and history",
+  "objective": "Observable findings, vital signs, physical examination results",
+  "assessment": "Clinical diagnosis or impression based on S and O",
+  "plan": "Treatment plan, medications, follow-up, and patient instructions"
+}}
+
+Return ONLY the JSON, no additional text."""
+
+ACTION_ITEMS_PROMPT_TEMPLATE = """You are a medical AI assistant. Based on the patient consultation transcript provided, extract and generate clear, actionable items for the patient.
+
+**Consultation Transcript:**
+{transcript}
+
+**Instructions:**
+1. Identify all medications, dosages, and schedules
+2. Extract follow-up appointments and timings
+3. List lifestyle modifications or recommendations
+4. Include any tests or procedures to be done
+5. Highlight important precautions or warnings
+6. Make it patient-friendly and easy to understand
+
+**Return the response in JSON format with these exact keys:**
+{{
+  "medications": [
+    {{
+      "name": "medication name",
+      "dosage": "dosage amount",
+      "frequency": "how often",
+      "duration": "how long",
+      "instructions": "special instructions"
+    }}
+  ],
+  "follow_up": {{
+    "when": "time/date for next visit",
+    "purpose": "reason for follow-up"
+  }},
+  "lifestyle_changes": [
+    "recommendation 1",
+    "recommendation 2"
+  ],
+  "tests_procedures": [
+    "test or procedure to be done"
+  ],
+  "precautions": [
+    "important warning or precaution"
+  ],
+  "summary": "Brief 2-3 sentence summary of what patient needs to do"
+}}
+
+Return ONLY the JSON, no additional text."""
+
+
+# Map step of long-transcript summarization: findings of one segment
+FINDINGS_PROMPT_TEMPLATE = """You are a medical AI assistant. The text below is one part of a longer clinical consultation transcript. Extract the clinically relevant findings from this part only.
+
+**Transcript Part:**
+{transcript}
+
+**Instructions:**
+1. Be concise; one short phrase per item
+2. Keep medication names, dosages, schedules, timings and numbers exactly
+3. Use an empty list when this part mentions nothing for a key
+
+**Return the response in JSON format with these exact keys (each a list of strings):**
+{{
+  "symptoms_history": [],
+  "examination_findings": [],
+  "assessment": [],
+  "plan": [],
+  "medications": [],
+  "follow_up": [],
+  "tests_procedures": [],
+  "lifestyle_changes": [],
+  "precautions": []
+}}
+
+Return ONLY the JSON, no additional text."""
+
+# Incremental update of running notes from the turns added since the last update
+SOAP_UPDATE_PROMPT_TEMPLATE = """You are a medical AI assistant maintaining running SOAP (Subjective, Objective, Assessment, and Plan) notes during a live consultation.
+
+**Current SOAP Notes (JSON):**
+{previous_notes}
+
+**New Transcript Turns (since the notes were last updated):**
+{new_turns}
+
+**Instructions:**
+1. Update the notes with the information in the new turns only
+2. Keep everything in the current notes that the new turns do not change or contradict
+3. Use medical terminology appropriately
+4. If information is still missing for any section, note it as "Not documented"
+
+**Return the complete updated notes in JSON format with these exact keys:**
+{{
+  "subjective": "Patient's reported symptoms, complaints, and history",
+  "objective": "Observable findings, vital signs, physical examination results",
+  "assessment": "Clinical diagnosis or impression based on S and O",
+  "plan": "Treatment plan, medications, follow-up, and patient instructions"
+}}
+
+Return ONLY the JSON, no additional text."""
+
+FINDINGS_LABELS = {
+    "symptoms_history": "Symptoms/history",
+    "examination_findings": "Examination",
+    "assessment": "Assessment",
+    "plan": "Plan",
+    "medications": "Medications",
+    "follow_up": "Follow-up",
+    "tests_procedures": "Tests/procedures",
+    "lifestyle_changes": "Lifestyle",
+    "precautions": "Precautions",
+}
 
 
 class TranscriptProcessor:
     """Process clinical transcripts with MT and Gemini"""
     
-    def __init__(self, api_base_url: str = None):
+    def __init__(self, api_base_url: str = None, cache: PromptCache = None,
+                 session: requests.Session = None, dedupe_translations: bool = False):
         """
         Initialize processor
         
         Args:
             api_base_url: Base URL for MT API (default from config)
+            cache: Prompt-result cache (default: the process-wide cache)
+            session: HTTP session (default: the process-wide pooled session)
+            dedupe_translations: Make identical MT calls once for the life of
+                this processor (used by batch runs)
         """
         self.mt_endpoint = MT_ENDPOINT if api_base_url is None else f"{api_base_url}/mt"
         self.gemini_api_key = GEMINI_API_KEY
         self.gemini_url = GEMINI_API_URL
+        self.cache = PROMPT_CACHE if cache is None else cache
+        self.session = HTTP_SESSION if session is None else session
+        self._mt_memo = {} if dedupe_translations else None
+        self._lock = threading.Lock()
+        self.counters = {"gemini_calls": 0, "mt_calls": 0, "mt_deduplicated": 0, "json_repaired": 0,
+                         "json_truncated": 0}
     
     def process_clinical_transcript(
         self,
@@ -55,23 +238,10 @@ class TranscriptProcessor:
             "steps": {}
         }
         
-        # Step 1: Translate to English (if needed)
-        print(f"[Step 1/3] Translating to English...")
-        if source_language != "English":
-            mt_result = self._call_mt(transcript, source_language, "English")
-            result["steps"]["translation_to_english"] = mt_result
-            
-            if not mt_result["success"]:
-                result["error"] = f"Translation failed: {mt_result['error']}"
-                return result
-            
-            english_text = mt_result["translated_text"]
-        else:
-            english_text = transcript
-            print(f"[Step 1/3] Skipped (already English)")
-        
-        result["original_transcript"] = transcript
-        result["english_transcript"] = english_text
+        # Step 1: Translate to English (long transcripts: per segment, in parallel)
+        english_text = self._prepare_transcript(transcript, source_language, result)
+        if english_text is None:
+            return result
         
         # Step 2: Generate SOAP notes with Gemini
         print(f"[Step 2/3] Generating SOAP notes with Gemini...")
@@ -83,15 +253,17 @@ class TranscriptProcessor:
             return result
         
         result["soap_notes_english"] = soap_result["soap_notes"]
+        self._flag_truncated(result, soap_result, "SOAP notes")
         
         # Step 3: Translate back to native language (if needed)
         if target_language != "English":
             print(f"[Step 3/3] Translating SOAP notes to {target_language}...")
             
-            # Translate each section
+            # Translate all sections concurrently (one MT round trip of wall time)
             soap_native = {}
+            mt_back_results = self._call_mt_many(soap_result["soap_notes"], "English", target_language)
             for section, content in soap_result["soap_notes"].items():
-                mt_back_result = self._call_mt(content, "English", target_language)
+                mt_back_result = mt_back_results[section]
                 result["steps"][f"translation_{section}_to_native"] = mt_back_result
                 
                 if mt_back_result["success"]:
@@ -109,6 +281,153 @@ class TranscriptProcessor:
         print("✓ Clinical transcript processing completed!")
         return result
     
+    def stream_clinical_transcript(
+        self,
+        transcript: str,
+        source_language: str,
+        target_language: str = None
+    ) -> Iterator[Dict]:
+        """
+        Generate SOAP notes with Gemini's streaming API, section by section
+        
+        Each section is yielded as soon as its JSON value is complete, and its
+        back-translation starts immediately on the MT pool.
+        
+        Yields:
+            Dict events {"event": ..., "data": {...}}: english_transcript,
+            section (English text), section_native (translated text, or the
+            English fallback), then done with the full notes - or error
+        """
+        if target_language is None:
+            target_language = source_language
+        
+        # Step 1: Translate to English (long transcripts: per segment, in parallel)
+        prepared = {"steps": {}}
+        english_text = self._prepare_transcript(transcript, source_language, prepared)
+        if english_text is None:
+            yield {"event": "error", "data": {"error": prepared["error"]}}
+            return
+        
+        yield {"event": "english_transcript", "data": {"english_transcript": prepared["english_transcript"]}}
+        
+        # Step 2 + 3: stream sections from Gemini; translate each one as it arrives
+        events = queue.Queue()
+        translate = target_language != "English"
+        executor = ThreadPoolExecutor(max_workers=MT_MAX_WORKERS)
+        
+        def on_translated(section, content, future):
+            mt_back_result = future.result()
+            events.put({"event": "section_native", "data": {
+                "section": section,
+                "native": mt_back_result["translated_text"] if mt_back_result["success"] else content,
+                "success": mt_back_result["success"],
+                "error": mt_back_result.get("error")
+            }})
+        
+        status = {"truncated": False}
+        
+        def generate():
+            try:
+                for section, content in self._stream_soap_sections(english_text, status):
+                    events.put({"event": "section", "data": {"section": section, "english": content}})
+                    if translate:
+                        future = executor.submit(self._call_mt, content, "English", target_language)
+                        future.add_done_callback(lambda f, s=section, c=content: on_translated(s, c, f))
+                events.put({"event": "generated"})
+            except Exception as e:
+                events.put({"event": "error", "data": {"error": f"SOAP generation failed: {str(e)}"}})
+        
+        threading.Thread(target=generate, daemon=True).start()
+        
+        soap_english = {}
+        soap_native = {}
+        warnings = []
+        pending = 0
+        generated = False
+        try:
+            while not generated or pending:
+                event = events.get()
+                if event["event"] == "generated":
+                    generated = True
+                    if status["truncated"]:
+                        warnings.append("SOAP notes were cut off at the output limit and may be incomplete")
+                    continue
+                if event["event"] == "error":
+                    yield event
+                    return
+                if event["event"] == "section":
+                    soap_english[event["data"]["section"]] = event["data"]["english"]
+                    if translate:
+                        pending += 1
+                    else:
+                        soap_native[event["data"]["section"]] = event["data"]["english"]
+                elif event["event"] == "section_native":
+                    pending -= 1
+                    section = event["data"]["section"]
+                    soap_native[section] = event["data"]["native"]
+                    if not event["data"]["success"]:
+                        warnings.append(f"Translation of {section} failed, using English")
+                yield event
+        finally:
+            executor.shutdown(wait=False)
+        
+        yield {"event": "done", "data": {
+            "soap_notes_english": soap_english,
+            "soap_notes_native": soap_native,
+            "original_transcript": transcript,
+            "english_transcript": prepared["english_transcript"],
+            "source_language": source_language,
+            "target_language": target_language,
+            "processing_type": "soap_notes",
+            "truncated": status["truncated"],
+            "warnings": warnings
+        }}
+    
+    def _stream_soap_sections(self, transcript: str, status: Dict) -> Iterator[tuple]:
+        """
+        Yield (section, content) from a streamed Gemini SOAP completion as each
+        section completes; the whole answer is then validated and cached.
+        status["truncated"] is set if the answer was cut off (and not cached).
+        """
+        cache_key = self.cache.key("soap_notes", SOAP_PROMPT_TEMPLATE, transcript, GEMINI_MODEL, SOAP_GENERATION_CONFIG)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            yield from cached["soap_notes"].items()
+            return
+        
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": SOAP_PROMPT_TEMPLATE.format(transcript=transcript)
+                }]
+            }],
+            "generationConfig": SOAP_GENERATION_CONFIG
+        }
+        
+        url = f"{GEMINI_STREAM_URL}?alt=sse&key={self.gemini_api_key}"
+        parser = ObjectMemberParser()
+        emitted = {}
+        pieces = []
+        self._count("gemini_calls")
+        with GEMINI_LIMIT, self.session.post(url, json=payload, timeout=GEMINI_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            for text in iter_stream_text(response):
+                pieces.append(text)
+                for section, content in parser.feed(text):
+                    if section in SOAP_SECTIONS and section not in emitted:
+                        emitted[section] = content
+                        yield section, content
+        
+        # Anything the incremental parser could not place comes from the full answer
+        parsed = self._parse_structured("".join(pieces), SOAP_NOTES)
+        status["truncated"] = parsed.truncated
+        for section in SOAP_SECTIONS:
+            if section not in emitted:
+                yield section, parsed.value[section]
+        
+        if not parsed.truncated:
+            self.cache.put(cache_key, {"success": True, "soap_notes": parsed.value})
+    
     def process_patient_consultation(
         self,
         transcript: str,
@@ -137,23 +456,10 @@ class TranscriptProcessor:
             "steps": {}
         }
         
-        # Step 1: Translate to English (if needed)
-        print(f"[Step 1/3] Translating to English...")
-        if source_language != "English":
-            mt_result = self._call_mt(transcript, source_language, "English")
-            result["steps"]["translation_to_english"] = mt_result
-            
-            if not mt_result["success"]:
-                result["error"] = f"Translation failed: {mt_result['error']}"
-                return result
-            
-            english_text = mt_result["translated_text"]
-        else:
-            english_text = transcript
-            print(f"[Step 1/3] Skipped (already English)")
-        
-        result["original_transcript"] = transcript
-        result["english_transcript"] = english_text
+        # Step 1: Translate to English (long transcripts: per segment, in parallel)
+        english_text = self._prepare_transcript(transcript, source_language, result)
+        if english_text is None:
+            return result
         
         # Step 2: Generate action items with Gemini
         print(f"[Step 2/3] Generating action items with Gemini...")
@@ -165,6 +471,7 @@ class TranscriptProcessor:
             return result
         
         result["action_items_english"] = action_result["action_items"]
+        self._flag_truncated(result, action_result, "Action items")
         
         # Step 3: Translate back to native language (if needed)
         if target_language != "English":
@@ -191,7 +498,376 @@ class TranscriptProcessor:
         print("✓ Patient consultation processing completed!")
         return result
     
+    def process_consultation_bundle(
+        self,
+        transcript: str,
+        source_language: str,
+        target_language: str = None
+    ) -> Dict:
+        """
+        Generate SOAP notes and action items for one consultation in a single pass
+        
+        The transcript is translated to English once, both Gemini calls run
+        concurrently, and all outputs are back-translated in one concurrent batch.
+        
+        Args:
+            transcript: Consultation transcript text
+            source_language: Language of input transcript
+            target_language: Language for output (default: same as source)
+            
+        Returns:
+            Dict with SOAP notes and action items in both English and native language
+        """
+        if target_language is None:
+            target_language = source_language
+        
+        result = {
+            "success": False,
+            "source_language": source_language,
+            "target_language": target_language,
+            "processing_type": "consultation_bundle",
+            "steps": {}
+        }
+        
+        # Step 1: Translate to English once (long transcripts: per segment, in parallel)
+        english_text = self._prepare_transcript(transcript, source_language, result)
+        if english_text is None:
+            return result
+        
+        # Step 2: Generate SOAP notes and action items concurrently
+        print(f"[Step 2/3] Generating SOAP notes and action items with Gemini...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            soap_future = executor.submit(self._generate_soap_notes, english_text)
+            action_future = executor.submit(self._generate_action_items, english_text)
+            soap_result = soap_future.result()
+            action_result = action_future.result()
+        result["steps"]["soap_generation"] = soap_result
+        result["steps"]["action_items_generation"] = action_result
+        
+        if not soap_result["success"]:
+            result["error"] = f"SOAP generation failed: {soap_result['error']}"
+            return result
+        if not action_result["success"]:
+            result["error"] = f"Action items generation failed: {action_result['error']}"
+            return result
+        
+        result["soap_notes_english"] = soap_result["soap_notes"]
+        result["action_items_english"] = action_result["action_items"]
+        self._flag_truncated(result, soap_result, "SOAP notes")
+        self._flag_truncated(result, action_result, "Action items")
+        
+        # Step 3: Translate both outputs back in one batch (if needed)
+        if target_language != "English":
+            print(f"[Step 3/3] Translating SOAP notes and action items to {target_language}...")
+            
+            texts = dict(soap_result["soap_notes"])
+            texts["action_items"] = action_result["action_items_text"]
+            mt_back_results = self._call_mt_many(texts, "English", target_language)
+            
+            native = {}
+            for key, content in texts.items():
+                mt_back_result = mt_back_results[key]
+                result["steps"][f"translation_{key}_to_native"] = mt_back_result
+                
+                if mt_back_result["success"]:
+                    native[key] = mt_back_result["translated_text"]
+                else:
+                    native[key] = content  # Fallback to English
+                    result["warning"] = f"Translation of {key} failed, using English"
+            
+            result["action_items_native"] = native.pop("action_items")
+            result["soap_notes_native"] = native
+        else:
+            print(f"[Step 3/3] Skipped (target is English)")
+            result["soap_notes_native"] = soap_result["soap_notes"]
+            result["action_items_native"] = action_result["action_items_text"]
+        
+        result["success"] = True
+        print("✓ Consultation bundle processing completed!")
+        return result
+    
+    def update_clinical_notes(
+        self,
+        previous_notes: Dict,
+        new_turns: List[Dict],
+        source_language: str,
+        target_language: str = None,
+        previous_notes_native: Dict = None
+    ) -> Dict:
+        """
+        Update running SOAP notes from the transcript turns added since the last update
+        
+        Only the new turns are translated (turns that already carry
+        translatedText_EN are not translated again), the model edits the
+        previous notes instead of re-reading the whole conversation, and only
+        the sections that changed are translated back.
+        
+        Args:
+            previous_notes: Previous English SOAP notes ({} for the first update)
+            new_turns: Messages with order, speaker, originalText and optionally
+                originalLanguage / translatedText_EN (as stored by the database)
+            source_language: Default language of turns without originalLanguage
+            target_language: Language for output (default: same as source)
+            previous_notes_native: Previous translated notes, reused for unchanged sections
+            
+        Returns:
+            Dict with updated SOAP notes in both English and native language
+        """
+        if target_language is None:
+            target_language = source_language
+        
+        result = {
+            "success": False,
+            "source_language": source_language,
+            "target_language": target_language,
+            "processing_type": "soap_notes_update",
+            "steps": {}
+        }
+        
+        turns = sorted(new_turns, key=lambda turn: turn.get("order", 0))
+        result["last_order"] = turns[-1].get("order") if turns else None
+        
+        # Step 1: Translate only the new turns to English
+        print(f"[Step 1/3] Translating {len(turns)} new turns to English...")
+        to_translate = {}
+        english_turns = {}
+        for i, turn in enumerate(turns):
+            language = turn.get("originalLanguage") or source_language
+            if turn.get("translatedText_EN"):
+                english_turns[i] = turn["translatedText_EN"]
+            elif language == "English":
+                english_turns[i] = turn.get("originalText", "")
+            else:
+                to_translate[i] = turn
+        
+        for language in {turn.get("originalLanguage") or source_language for turn in to_translate.values()}:
+            texts = {i: turn.get("originalText", "") for i, turn in to_translate.items()
+                     if (turn.get("originalLanguage") or source_language) == language}
+            for i, mt_result in self._call_mt_many(texts, language, "English").items():
+                result["steps"][f"translation_turn_{turns[i].get('order', i)}_to_english"] = mt_result
+                if not mt_result["success"]:
+                    result["error"] = f"Translation failed: {mt_result['error']}"
+                    return result
+                english_turns[i] = mt_result["translated_text"]
+        
+        delta = "\n".join(f"{turn.get('speaker', 'speaker')}: {english_turns[i]}" for i, turn in enumerate(turns))
+        result["english_delta"] = delta
+        
+        # Step 2: Ask Gemini to update the existing notes
+        print(f"[Step 2/3] Updating SOAP notes with Gemini...")
+        previous = {section: (previous_notes or {}).get(section, "Not documented") for section in SOAP_SECTIONS}
+        if turns:
+            update_result = self._update_soap_notes(previous, delta)
+        else:
+            update_result = {"success": True, "soap_notes": previous}
+        result["steps"]["soap_update"] = update_result
+        
+        if not update_result["success"]:
+            result["error"] = f"SOAP update failed: {update_result['error']}"
+            return result
+        
+        soap_notes = update_result["soap_notes"]
+        changed = [section for section in SOAP_SECTIONS if soap_notes[section] != previous[section]]
+        result["soap_notes_english"] = soap_notes
+        result["changed_sections"] = changed
+        self._flag_truncated(result, update_result, "Updated SOAP notes")
+        
+        # Step 3: Translate back only the sections that changed
+        if target_language != "English":
+            print(f"[Step 3/3] Translating {len(changed)} changed sections to {target_language}...")
+            previous_native = previous_notes_native or {}
+            stale = {section: soap_notes[section] for section in SOAP_SECTIONS
+                     if section in changed or section not in previous_native}
+            mt_back_results = self._call_mt_many(stale, "English", target_language)
+            
+            soap_native = {}
+            for section in SOAP_SECTIONS:
+                if section not in stale:
+                    soap_native[section] = previous_native[section]
+                    continue
+                mt_back_result = mt_back_results[section]
+                result["steps"][f"translation_{section}_to_native"] = mt_back_result
+                
+                if mt_back_result["success"]:
+                    soap_native[section] = mt_back_result["translated_text"]
+                else:
+                    soap_native[section] = soap_notes[section]  # Fallback to English
+                    result["warning"] = f"Translation of {section} failed, using English"
+            
+            result["soap_notes_native"] = soap_native
+        else:
+            print(f"[Step 3/3] Skipped (target is English)")
+            result["soap_notes_native"] = soap_notes
+        
+        result["success"] = True
+        print("✓ SOAP notes update completed!")
+        return result
+    
+    def process_batch(self, items: List[Dict], concurrency: int = BATCH_CONCURRENCY) -> Iterator[Dict]:
+        """
+        Process many transcripts with bounded concurrency
+        
+        Items run `concurrency` at a time under the shared Gemini and MT
+        limits. Use a processor created with dedupe_translations=True so that
+        identical translations across items are made once.
+        
+        Args:
+            items: Dicts with transcript, source_language, optional
+                target_language, type ("soap_notes", "action_items" or
+                "consultation_bundle") and id
+            concurrency: Items processed at once
+            
+        Yields:
+            One result dict per item as it finishes (in completion order),
+            then a summary dict with throughput and upstream call counts
+        """
+        handlers = {
+            "soap_notes": self.process_clinical_transcript,
+            "action_items": self.process_patient_consultation,
+            "consultation_bundle": self.process_consultation_bundle,
+        }
+        
+        def run(index, item):
+            started = time.monotonic()
+            kind = item.get("type", "soap_notes")
+            try:
+                if kind not in handlers:
+                    raise ValueError(f"type must be one of {', '.join(handlers)}")
+                if not item.get("transcript") or not item.get("source_language"):
+                    raise ValueError("transcript and source_language are required")
+                result = handlers[kind](
+                    transcript=item["transcript"],
+                    source_language=item["source_language"],
+                    target_language=item.get("target_language")
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            result.pop("steps", None)
+            result.update({
+                "index": index,
+                "id": item.get("id", index),
+                "type": kind,
+                "seconds": round(time.monotonic() - started, 3)
+            })
+            return result
+        
+        started = time.monotonic()
+        succeeded = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items) or 1))) as executor:
+            futures = [executor.submit(run, index, item) for index, item in enumerate(items)]
+            for future in as_completed(futures):
+                result = future.result()
+                succeeded += bool(result["success"])
+                yield result
+        
+        wall_seconds = time.monotonic() - started
+        yield {
+            "summary": True,
+            "items": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "wall_seconds": round(wall_seconds, 3),
+            "items_per_minute": round(len(items) * 60 / wall_seconds, 1) if wall_seconds else None,
+            **self.counters,
+            "limits": {"gemini": GEMINI_LIMIT.snapshot(), "mt": MT_LIMIT.snapshot()}
+        }
+    
+    def _prepare_transcript(self, transcript: str, source_language: str, result: Dict) -> Optional[str]:
+        """
+        Bring a transcript to English and return the text to generate from
+        
+        Short transcripts are translated whole. Above LONG_TRANSCRIPT_TOKENS
+        (estimated locally) the transcript is cut on speaker turns, and every
+        segment is translated and reduced to findings in parallel (map); the
+        combined findings are returned for the final generation (reduce).
+        Sets original/english transcript on result; on failure sets
+        result["error"] and returns None.
+        """
+        result["original_transcript"] = transcript
+        estimated_tokens = estimate_tokens(transcript)
+        if estimated_tokens > LONG_TRANSCRIPT_TOKENS:
+            return self._map_long_transcript(transcript, source_language, result, estimated_tokens)
+        
+        print(f"[Step 1/3] Translating to English...")
+        if source_language != "English":
+            mt_result = self._call_mt(transcript, source_language, "English")
+            result["steps"]["translation_to_english"] = mt_result
+            
+            if not mt_result["success"]:
+                result["error"] = f"Translation failed: {mt_result['error']}"
+                return None
+            
+            english_text = mt_result["translated_text"]
+        else:
+            english_text = transcript
+            print(f"[Step 1/3] Skipped (already English)")
+        
+        result["english_transcript"] = english_text
+        return english_text
+    
+    def _map_long_transcript(self, transcript: str, source_language: str, result: Dict,
+                             estimated_tokens: int) -> Optional[str]:
+        """Translate and extract findings per segment in parallel; return the combined findings"""
+        segments = segment_transcript(transcript, SEGMENT_TOKENS)
+        print(f"[Step 1/3] Long transcript (~{estimated_tokens} tokens): "
+              f"translating and extracting {len(segments)} segments in parallel...")
+        
+        def map_segment(segment):
+            if source_language != "English":
+                mt_result = self._call_mt(segment, source_language, "English")
+                if not mt_result["success"]:
+                    return mt_result, None
+            else:
+                mt_result = {"success": True, "translated_text": segment}
+            return mt_result, self._extract_findings(mt_result["translated_text"])
+        
+        with ThreadPoolExecutor(max_workers=min(GEMINI_MAX_WORKERS, len(segments))) as executor:
+            mapped = list(executor.map(map_segment, segments))
+        
+        english_segments = []
+        parts = []
+        for i, (mt_result, findings_result) in enumerate(mapped):
+            result["steps"][f"segment_{i + 1}_translation_to_english"] = mt_result
+            if not mt_result["success"]:
+                result["error"] = f"Translation of segment {i + 1} failed: {mt_result['error']}"
+                return None
+            result["steps"][f"segment_{i + 1}_findings"] = findings_result
+            english_segments.append(mt_result["translated_text"])
+            
+            heading = f"Part {i + 1} of {len(segments)}"
+            if findings_result["success"]:
+                parts.append(f"{heading}:\n{self._format_findings(findings_result['findings'])}")
+            else:
+                # Keep the segment itself rather than losing it from the notes
+                parts.append(f"{heading} (transcript):\n{mt_result['translated_text']}")
+        
+        result["english_transcript"] = "\n".join(english_segments)
+        result["long_transcript"] = {"estimated_tokens": estimated_tokens, "segments": len(segments)}
+        return ("Findings extracted, in order, from consecutive parts of a long consultation:\n\n"
+                + "\n\n".join(parts))
+    
     def _call_mt(self, text: str, source: str, target: str) -> Dict:
+        """Call MT API for translation (identical calls are made once when deduplicating)"""
+        if self._mt_memo is None:
+            return self._request_mt(text, source, target)
+        
+        key = (text, source, target)
+        with self._lock:
+            future = self._mt_memo.get(key)
+            owner = future is None
+            if owner:
+                future = self._mt_memo[key] = Future()
+            else:
+                self.counters["mt_deduplicated"] += 1
+        if owner:
+            mt_result = self._request_mt(text, source, target)
+            if not mt_result["success"]:
+                with self._lock:
+                    del self._mt_memo[key]  # let a later caller retry
+            future.set_result(mt_result)
+        return future.result()
+    
+    def _request_mt(self, text: str, source: str, target: str) -> Dict:
         """Call MT API for translation"""
         try:
             payload = {
@@ -200,7 +876,9 @@ class TranscriptProcessor:
                 "dest": target
             }
             
-            response = requests.post(self.mt_endpoint, json=payload, timeout=30)
+            with MT_LIMIT:
+                self._count("mt_calls")
+                response = self.session.post(self.mt_endpoint, json=payload, headers=GATEWAY_HEADERS, timeout=30)
             response.raise_for_status()
             result = response.json()
             
@@ -213,29 +891,33 @@ class TranscriptProcessor:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _post_gemini(self, url: str, **kwargs) -> requests.Response:
+        """POST to Gemini within the shared Gemini limit"""
+        with GEMINI_LIMIT:
+            self._count("gemini_calls")
+            return self.session.post(url, **kwargs)
+    
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+    
+    def _call_mt_many(self, texts: Dict[str, str], source: str, target: str) -> Dict[str, Dict]:
+        """Call MT for several keyed texts concurrently; results keep the same keys"""
+        if not texts:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(MT_MAX_WORKERS, len(texts))) as executor:
+            futures = {key: executor.submit(self._call_mt, text, source, target) for key, text in texts.items()}
+            return {key: future.result() for key, future in futures.items()}
+    
     def _generate_soap_notes(self, transcript: str) -> Dict:
-        """Generate SOAP notes from clinical transcript using Gemini"""
+        """Generate SOAP notes from clinical transcript using Gemini (cached per transcript)"""
+        cache_key = self.cache.key("soap_notes", SOAP_PROMPT_TEMPLATE, transcript, GEMINI_MODEL, SOAP_GENERATION_CONFIG)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        
         try:
-            prompt = f"""You are a medical AI assistant. Based on the clinical transcript provided, generate detailed SOAP (Subjective, Objective, Assessment, and Plan) notes.
-
-**Clinical Transcript:**
-{transcript}
-
-**Instructions:**
-1. Extract and organize information into SOAP format
-2. Be thorough and professional
-3. Use medical terminology appropriately
-4. If information is missing for any section, note it as "Not documented"
-
-**Return the response in JSON format with these exact keys:**
-{{
-  "subjective": "Patient's reported symptoms, complaints, and history",
-  "objective": "Observable findings, vital signs, physical examination results",
-  "assessment": "Clinical diagnosis or impression based on S and O",
-  "plan": "Treatment plan, medications, follow-up, and patient instructions"
-}}
-
-Return ONLY the JSON, no additional text."""
+            prompt = SOAP_PROMPT_TEMPLATE.format(transcript=transcript)
 
             payload = {
                 "contents": [{
@@ -243,95 +925,41 @@ Return ONLY the JSON, no additional text."""
                         "text": prompt
                     }]
                 }],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 2048,
-                }
+                "generationConfig": SOAP_GENERATION_CONFIG
             }
             
             url = f"{self.gemini_url}?key={self.gemini_api_key}"
-            response = requests.post(url, json=payload, timeout=GEMINI_TIMEOUT)
+            response = self._post_gemini(url, json=payload, timeout=GEMINI_TIMEOUT)
             response.raise_for_status()
             
             result = response.json()
             gemini_text = result['candidates'][0]['content']['parts'][0]['text']
             
-            # Parse JSON from response
-            import json
-            import re
+            # Parse and validate against the response schema
+            parsed = self._parse_structured(gemini_text, SOAP_NOTES)
             
-            # Extract JSON from markdown code blocks if present
-            json_match = re.search(r'```json\s*(.*?)\s*```', gemini_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = gemini_text
-            
-            soap_notes = json.loads(json_str.strip())
-            
-            # Validate required keys
-            required_keys = ["subjective", "objective", "assessment", "plan"]
-            if not all(key in soap_notes for key in required_keys):
-                return {
-                    "success": False,
-                    "error": "Invalid SOAP notes structure from Gemini"
-                }
-            
-            return {
+            soap_result = {
                 "success": True,
-                "soap_notes": soap_notes
+                "soap_notes": parsed.value,
+                "truncated": parsed.truncated
             }
+            if not parsed.truncated:
+                self.cache.put(cache_key, soap_result)
+            return soap_result
             
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     def _generate_action_items(self, transcript: str) -> Dict:
-        """Generate patient action items from consultation transcript using Gemini"""
+        """Generate patient action items from consultation transcript using Gemini (cached per transcript)"""
+        cache_key = self.cache.key("action_items", ACTION_ITEMS_PROMPT_TEMPLATE, transcript, GEMINI_MODEL,
+                                   ACTION_ITEMS_GENERATION_CONFIG)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        
         try:
-            prompt = f"""You are a medical AI assistant. Based on the patient consultation transcript provided, extract and generate clear, actionable items for the patient.
-
-**Consultation Transcript:**
-{transcript}
-
-**Instructions:**
-1. Identify all medications, dosages, and schedules
-2. Extract follow-up appointments and timings
-3. List lifestyle modifications or recommendations
-4. Include any tests or procedures to be done
-5. Highlight important precautions or warnings
-6. Make it patient-friendly and easy to understand
-
-**Return the response in JSON format with these exact keys:**
-{{
-  "medications": [
-    {{
-      "name": "medication name",
-      "dosage": "dosage amount",
-      "frequency": "how often",
-      "duration": "how long",
-      "instructions": "special instructions"
-    }}
-  ],
-  "follow_up": {{
-    "when": "time/date for next visit",
-    "purpose": "reason for follow-up"
-  }},
-  "lifestyle_changes": [
-    "recommendation 1",
-    "recommendation 2"
-  ],
-  "tests_procedures": [
-    "test or procedure to be done"
-  ],
-  "precautions": [
-    "important warning or precaution"
-  ],
-  "summary": "Brief 2-3 sentence summary of what patient needs to do"
-}}
-
-Return ONLY the JSON, no additional text."""
+            prompt = ACTION_ITEMS_PROMPT_TEMPLATE.format(transcript=transcript)
 
             payload = {
                 "contents": [{
@@ -339,46 +967,140 @@ Return ONLY the JSON, no additional text."""
                         "text": prompt
                     }]
                 }],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 2048,
-                }
+                "generationConfig": ACTION_ITEMS_GENERATION_CONFIG
             }
             
             url = f"{self.gemini_url}?key={self.gemini_api_key}"
-            response = requests.post(url, json=payload, timeout=GEMINI_TIMEOUT)
+            response = self._post_gemini(url, json=payload, timeout=GEMINI_TIMEOUT)
             response.raise_for_status()
             
             result = response.json()
             gemini_text = result['candidates'][0]['content']['parts'][0]['text']
             
-            # Parse JSON from response
-            import json
-            import re
+            # Parse and validate against the response schema
+            parsed = self._parse_structured(gemini_text, ACTION_ITEMS)
             
-            # Extract JSON from markdown code blocks if present
-            json_match = re.search(r'```json\s*(.*?)\s*```', gemini_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = gemini_text
+            # Create a formatted text version
+            action_items_text = self._format_action_items(parsed.value)
             
-            action_items = json.loads(json_str.strip())
+            action_result = {
+                "success": True,
+                "action_items": parsed.value,
+                "action_items_text": action_items_text,
+                "truncated": parsed.truncated
+            }
+            if not parsed.truncated:
+                self.cache.put(cache_key, action_result)
+            return action_result
             
-            # Create a formatted text version
-            action_items_text = self._format_action_items(action_items)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _update_soap_notes(self, previous_notes: Dict, new_turns: str) -> Dict:
+        """Update SOAP notes with new transcript turns using Gemini (cached per notes + turns)"""
+        previous_json = json.dumps(previous_notes, ensure_ascii=False, indent=2)
+        cache_key = self.cache.key("soap_notes_update", SOAP_UPDATE_PROMPT_TEMPLATE, f"{previous_json}\n{new_turns}",
+                                   GEMINI_MODEL, SOAP_GENERATION_CONFIG)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        
+        try:
+            payload = {
+                "contents": [{
+                    "parts": [{
+                        "text": SOAP_UPDATE_PROMPT_TEMPLATE.format(previous_notes=previous_json, new_turns=new_turns)
+                    }]
+                }],
+                "generationConfig": SOAP_GENERATION_CONFIG
+            }
+            
+            url = f"{self.gemini_url}?key={self.gemini_api_key}"
+            response = self._post_gemini(url, json=payload, timeout=GEMINI_TIMEOUT)
+            response.raise_for_status()
+            
+            result = response.json()
+            gemini_text = result['candidates'][0]['content']['parts'][0]['text']
+            parsed = self._parse_structured(gemini_text, SOAP_NOTES)
             
-            return {
+            update_result = {
                 "success": True,
-                "action_items": action_items,
-                "action_items_text": action_items_text
+                "soap_notes": parsed.value,
+                "truncated": parsed.truncated
+            }
+            if not parsed.truncated:
+                self.cache.put(cache_key, update_result)
+            return update_result
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _extract_findings(self, transcript: str) -> Dict:
+        """Extract clinical findings from one segment of a long transcript using Gemini (cached)"""
+        cache_key = self.cache.key("findings", FINDINGS_PROMPT_TEMPLATE, transcript, GEMINI_MODEL, FINDINGS_GENERATION_CONFIG)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, cached=True)
+        
+        try:
+            payload = {
+                "contents": [{
+                    "parts": [{
+                        "text": FINDINGS_PROMPT_TEMPLATE.format(transcript=transcript)
+                    }]
+                }],
+                "generationConfig": FINDINGS_GENERATION_CONFIG
             }
             
+            url = f"{self.gemini_url}?key={self.gemini_api_key}"
+            response = self._post_gemini(url, json=payload, timeout=GEMINI_TIMEOUT)
+            response.raise_for_status()
+            
+            result = response.json()
+            gemini_text = result['candidates'][0]['content']['parts'][0]['text']
+            parsed = self._parse_structured(gemini_text, FINDINGS)
+            if parsed.truncated:
+                # The segment's transcript is used instead of partial findings
+                raise SchemaError("Findings were cut off at the output limit")
+            
+            findings_result = {
+                "success": True,
+                "findings": parsed.value
+            }
+            self.cache.put(cache_key, findings_result)
+            return findings_result
+        
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _format_findings(self, findings: dict) -> str:
+        """Format one segment's findings as compact bullet lines"""
+        lines = []
+        for key, label in FINDINGS_LABELS.items():
+            values = findings.get(key) or []
+            if isinstance(values, str):
+                values = [values]
+            if values:
+                lines.append(f"- {label}: " + "; ".join(str(value) for value in values))
+        return "\n".join(lines) if lines else "- Nothing clinically relevant"
+    
+    def _parse_structured(self, gemini_text: str, schema: CompiledSchema) -> ParsedAnswer:
+        """Parse and validate a structured Gemini answer, repairing near-misses locally"""
+        parsed = schema.parse(gemini_text)
+        if parsed.repaired:
+            self._count("json_repaired")
+        if parsed.truncated:
+            self._count("json_truncated")
+        return parsed
+    
+    def _flag_truncated(self, result: Dict, step_result: Dict, what: str):
+        """Mark a result whose Gemini answer was cut off at maxOutputTokens"""
+        truncated = result.get("truncated", False) or bool(step_result.get("truncated"))
+        result["truncated"] = truncated
+        if step_result.get("truncated"):
+            result.setdefault("warnings", []).append(
+                f"{what} were cut off at the output limit and may be incomplete")
+    
     def _format_action_items(self, items: dict) -> str:
         """Format action items dict into readable text"""
         text_parts = []
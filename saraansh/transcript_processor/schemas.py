@@ -0,0 +1,54 @@
+"""
+Gemini response schemas for Saraansh
+
+Each JSON prompt is sent with its schema as responseSchema, and the answer is
+read back through the same schema, compiled once at import by the shared
+gemini_schema package (also used by Lipigyan).
+"""
+from gemini_schema import (
+    CompiledSchema,
+    ParsedAnswer,
+    SchemaError,
+    object_schema,
+    string_list_schema,
+    string_schema,
+    structured_config,
+)
+
+
+SOAP_NOTES_SCHEMA = object_schema({
+    "subjective": string_schema("Patient's reported symptoms, complaints, and history"),
+    "objective": string_schema("Observable findings, vital signs, physical examination results"),
+    "assessment": string_schema("Clinical diagnosis or impression based on S and O"),
+    "plan": string_schema("Treatment plan, medications, follow-up, and patient instructions"),
+})
+
+ACTION_ITEMS_SCHEMA = object_schema({
+    "medications": {"type": "ARRAY", "items": object_schema({
+        "name": string_schema(),
+        "dosage": string_schema(),
+        "frequency": string_schema(),
+        "duration": string_schema(),
+        "instructions": string_schema(),
+    }, required=["name"])},
+    "follow_up": object_schema({
+        "when": string_schema(),
+        "purpose": string_schema(),
+    }, required=[]),
+    "lifestyle_changes": string_list_schema(),
+    "tests_procedures": string_list_schema(),
+    "precautions": string_list_schema(),
+    "summary": string_schema("Brief 2-3 sentence summary of what patient needs to do"),
+}, required=["medications", "summary"])
+
+FINDINGS_SCHEMA = object_schema({
+    key: string_list_schema() for key in [
+        "symptoms_history", "examination_findings", "assessment", "plan", "medications",
+        "follow_up", "tests_procedures", "lifestyle_changes", "precautions",
+    ]
+}, required=[])
+
+
+SOAP_NOTES = CompiledSchema(SOAP_NOTES_SCHEMA)
+ACTION_ITEMS = CompiledSchema(ACTION_ITEMS_SCHEMA)
+FINDINGS = CompiledSchema(FINDINGS_SCHEMA)
@@ -0,0 +1,111 @@
+"""
+Incremental parsing of streamed Gemini output
+
+Gemini's streamGenerateContent (alt=sse) sends the completion as a series of
+`data: {...}` lines, each carrying the next piece of text. ObjectMemberParser
+is fed those pieces and returns every top-level member of the JSON object as
+soon as its value is complete, so the first SOAP section can be shown (and
+back-translated) while the rest is still being generated. Anything before
+the opening brace, such as a ```json fence, is skipped.
+"""
+import json
+from typing import Any, Iterator, List, Tuple
+
+
+def iter_stream_text(response) -> Iterator[str]:
+    """Yield the text pieces of a streamed (alt=sse) Gemini response"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        chunk = json.loads(line[len("data:"):].strip())
+        for candidate in chunk.get("candidates", []):
+            for part in candidate.get("content", {}).get("parts", []):
+                if part.get("text"):
+                    yield part["text"]
+
+
+class ObjectMemberParser:
+    """Emit (key, value) for each top-level member of a streamed JSON object"""
+
+    def __init__(self):
+        self.state = "seek_object"
+        self.token: List[str] = []
+        self.key = None
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        members = []
+        for ch in text:
+            if self.state == "seek_object":
+                if ch == "{":
+                    self.state = "seek_key"
+            elif self.state == "seek_key":
+                if ch == '"':
+                    self.state = "key"
+                    self.token = [ch]
+                elif ch == "}":
+                    self.state = "done"
+            elif self.state == "key":
+                self.token.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.key = json.loads("".join(self.token))
+                    self.state = "seek_colon"
+            elif self.state == "seek_colon":
+                if ch == ":":
+                    self.state = "seek_value"
+            elif self.state == "seek_value":
+                if not ch.isspace():
+                    self.state = "value"
+                    self.token = []
+                    self.depth = 0
+                    self.in_string = False
+                    self.escape = False
+                    self._value_char(ch, members)
+            elif self.state == "value":
+                self._value_char(ch, members)
+            elif self.state == "after_value":
+                if ch == ",":
+                    self.state = "seek_key"
+                elif ch == "}":
+                    self.state = "done"
+        return members
+
+    def _value_char(self, ch: str, members: List[Tuple[str, Any]]):
+        if self.in_string:
+            self.token.append(ch)
+            if self.escape:
+                self.escape = False
+            elif ch == "\\":
+                self.escape = True
+            elif ch == '"':
+                self.in_string = False
+                if self.depth == 0:
+                    self._emit(members, "after_value")
+            return
+        if self.depth == 0 and ch in ",}":
+            # End of a bare value (number, true/false/null)
+            self._emit(members, "seek_key" if ch == "," else "done")
+            return
+        self.token.append(ch)
+        if ch == '"':
+            self.in_string = True
+        elif ch in "{[":
+            self.depth += 1
+        elif ch in "}]":
+            self.depth -= 1
+            if self.depth == 0:
+                self._emit(members, "after_value")
+
+    def _emit(self, members: List[Tuple[str, Any]], next_state: str):
+        try:
+            members.append((self.key, json.loads("".join(self.token))))
+        except ValueError:
+            pass  # left for the full parse at the end of the stream
+        self.token = []
+        self.state = next_state
@@ -0,0 +1,3 @@
+from .segmenter import DEFAULT_MAX_CHARS, Segment, join_segments, segment_text, split_sentences
+
+__all__ = ['DEFAULT_MAX_CHARS', 'Segment', 'join_segments', 'segment_text', 'split_sentences']
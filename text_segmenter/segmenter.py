@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+MT Segmenter - Split long inputs into sentence-aligned segments for translation
+
+Bhashini translation quality and latency degrade on long inputs, so the /mt
+endpoint (and s2s, before it fans translations out) splits text on sentence
+boundaries for every supported script
+(Latin '.', '?', '!', Devanagari danda '।' and double danda '॥', Urdu '۔' and
+'؟'), packs consecutive sentences into segments of at most `max_chars`
+characters and reassembles the translated segments in order.
+
+All patterns are compiled once at import time and the scan is a single
+linear pass, so megabyte-sized discharge summaries segment in milliseconds.
+Run this module directly to benchmark it.
+"""
+
+import argparse
+import re
+import sys
+import time
+from typing import List, NamedTuple
+
+# Default upper bound on characters sent to Bhashini in one segment
+DEFAULT_MAX_CHARS = 400
+
+# Sentence terminators, optionally followed by closing quotes/brackets,
+# then whitespace or end of text
+_BOUNDARY_RE = re.compile(
+    r'[.?!।॥۔؟…|]+'
+    r'[\'")\]’”]*'
+    r'(?=\s|$)'
+)
+
+# Blank lines separate paragraphs; they are kept as hard boundaries
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+# Clause punctuation used to split sentences that exceed max_chars
+_CLAUSE_RE = re.compile(r'(?<=[,;:،؛])\s+')
+
+# Last token before a period, used for abbreviation checks
+_LAST_TOKEN_RE = re.compile(r'(\S+)$')
+
+# Abbreviations that end with '.' but do not end a sentence (lowercase, no dot)
+ABBREVIATIONS = frozenset({
+    # English titles and common clinical shorthand
+    "dr", "mr", "mrs", "ms", "prof", "sr", "jr", "st", "vs", "etc", "no",
+    "approx", "dept", "hosp", "tab", "cap", "inj", "syp", "oint", "susp",
+    "e.g", "i.e", "viz", "fig", "ref", "resp", "temp", "wt", "ht",
+    "b.p", "o.d", "b.d", "t.d.s", "q.i.d", "h.s", "s.o.s",
+    # Devanagari and other Indic honorifics written with a period
+    "डॉ", "डा", "श्री", "श्रीमती", "कु", "सं", "प्रो",
+    "ডা", "শ্রী", "டாக்டர்", "డా", "ಡಾ", "ഡോ", "ડૉ", "ਡਾ", "ଡା",
+    # Urdu
+    "ڈاکٹر",
+})
+
+
+class Segment(NamedTuple):
+    """A piece of text to translate and the separator that followed it"""
+    text: str
+    separator: str
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split a paragraph into sentences.
+
+    Args:
+        text (str): Paragraph text (may contain single newlines)
+
+    Returns:
+        List[str]: Sentences with their terminating punctuation
+    """
+    sentences = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        if match.group(0) == '.':
+            token = _LAST_TOKEN_RE.search(text, max(start, match.start() - 16), match.start())
+            if token:
+                word = token.group(1).lower()
+                # Abbreviations and single-letter initials ("A. K. Sharma")
+                if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                    continue
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """
+    Split a sentence longer than max_chars on clauses, then on whitespace;
+    a single token longer than max_chars (a URL, unspaced text) is cut at
+    max_chars so no piece exceeds the limit
+    """
+    pieces = []
+    current = ""
+    for clause in _CLAUSE_RE.split(sentence):
+        if len(clause) > max_chars:
+            words = []
+            for word in clause.split():
+                words.extend(word[i:i + max_chars] for i in range(0, len(word), max_chars))
+        else:
+            words = [clause]
+        for word in words:
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def segment_text(text: str, max_chars: int = DEFAULT_MAX_CHARS) -> List[Segment]:
+    """
+    Segment text into translation units on sentence boundaries.
+
+    Consecutive sentences are packed together up to max_chars so short
+    sentences do not each cost an upstream call. Paragraph breaks are kept
+    as separators so the reassembled translation preserves layout.
+
+    Args:
+        text (str): Input text of any length
+        max_chars (int): Soft upper bound on characters per segment
+
+    Returns:
+        List[Segment]: Segments in input order
+    """
+    segments = []
+    paragraphs = _PARAGRAPH_RE.split(text)
+    for p_index, paragraph in enumerate(paragraphs):
+        current = ""
+        for sentence in split_sentences(paragraph):
+            parts = _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]
+            for part in parts:
+                if current and len(current) + 1 + len(part) > max_chars:
+                    segments.append(Segment(current, " "))
+                    current = part
+                else:
+                    current = f"{current} {part}" if current else part
+        if current:
+            segments.append(Segment(current, " "))
+        if segments and p_index < len(paragraphs) - 1:
+            segments[-1] = Segment(segments[-1].text, "\n\n")
+
+    if segments:
+        segments[-1] = Segment(segments[-1].text, "")
+    return segments
+
+
+def join_segments(segments: List[Segment], translations: List[str]) -> str:
+    """
+    Reassemble translated segments in order using the original separators.
+
+    Args:
+        segments (List[Segment]): Segments returned by segment_text
+        translations (List[str]): Translated text for each segment
+
+    Returns:
+        str: Reassembled translation
+    """
+    return "".join(
+        f"{translated}{segment.separator}"
+        for segment, translated in zip(segments, translations)
+    )
+
+
+def _benchmark_text(size_bytes: int) -> str:
+    """Build a mixed-script clinical text of roughly size_bytes UTF-8 bytes"""
+    sample = (
+        "Dr. A. K. Sharma reviewed the patient on 12.03.2024. BP was 130/90 mmHg, "
+        "tab. Metformin 500 mg b.d. was continued! Any chest pain? "
+        "रोगी को तीन दिन से बुखार है। डॉ. वर्मा ने जाँच की सलाह दी॥ "
+        "مریض کو کھانسی ہے۔ کیا سانس لینے میں تکلیف ہے؟ "
+        "நோயாளிக்கு காய்ச்சல் உள்ளது. రోగికి జ్వరం ఉంది.\n\n"
+    )
+    repeat = max(1, size_bytes // len(sample.encode('utf-8')))
+    return sample * repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the MT sentence segmenter')
+    parser.add_argument('--size-mb', type=float, default=1.0, help='Input size in MB (default: 1)')
+    parser.add_argument('--max-chars', type=int, default=DEFAULT_MAX_CHARS, help='Max characters per segment')
+    parser.add_argument('--runs', type=int, default=5, help='Number of timed runs (default: 5)')
+
+    args = parser.parse_args()
+
+    text = _benchmark_text(int(args.size_mb * 1024 * 1024))
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+
+    timings = []
+    segments = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        segments = segment_text(text, max_chars=args.max_chars)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"Input: {size_mb:.2f} MB, {len(segments)} segments")
+    print(f"Best: {best * 1000:.1f} ms ({size_mb / best:.1f} MB/s), "
+          f"mean: {sum(timings) / len(timings) * 1000:.1f} ms over {args.runs} runs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
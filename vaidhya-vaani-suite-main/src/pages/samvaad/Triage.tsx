@@ -67,6 +67,7 @@ const Triage = () => {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
+            "X-Priority": "triage",
           },
           body: JSON.stringify({
             text: currentQuestion,
@@ -113,6 +114,7 @@ const Triage = () => {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          "X-Priority": "triage",
         },
         body: JSON.stringify({
           text: translatedQuestion,